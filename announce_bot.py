@@ -1,14 +1,12 @@
 """Script to schedule in order to do recurrent actions.
 """
-import requests
-import json
 import logging
 from lib.load_var import get_var
 import datetime
 import lib.birthday_lib as bd_lib
 from discord.ext import commands
 import discord
-import lib.gtranslate as translate
+from lib.translator import create_translator
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
@@ -18,6 +16,7 @@ SERVER_ID = get_var('SERVER_ID')
 BIRTHDAY_CHAN = get_var('BIRTHDAY_CHAN')
 INSPIRE_CHAN = get_var('INSPIRE_CHAN')
 BIRTHDAY_DB = get_var('BIRTHDAY_DB')
+BIRTHDAY_CATCH_UP = get_var('BIRTHDAY_CATCH_UP', 7)
 
 TOKEN = get_var('DISCORD_TOKEN')
 CMD_PREFIX = get_var('CMD_PREFIX', '%')
@@ -34,29 +33,64 @@ today = datetime.date.today()
 # If we're on monday, Inspire
 INSPIRE = today.weekday() == 0
 
-# Change date to query database
-queryday = today.replace(year=1964)
-
 DATABASE = bd_lib.DateDb(BIRTHDAY_DB)
 with DATABASE:
-    BD_USERS = DATABASE.get_birthdays(queryday)
-    # Get list of user in current date
-    # Get also 29-02 if it's the 28-02 and it's not a leap year
-    if today.month == 2 and today.day == 28:
-        if (today.year % 4) == 0:
-            if (today.year % 100) == 0:
-                if (today.year % 400) == 0:
-                    leap = True
-                else:
-                    leap = False
-            else:
-                leap = True
+    DATABASE.init_birthday_db()
+    # First day whose birthdays were not announced, catching up on the days
+    # the script did not run but no further than BIRTHDAY_CATCH_UP days ago
+    LAST_ANNOUNCE = DATABASE.get_last_announce()
+    first_day = today
+    if LAST_ANNOUNCE is not None:
+        first_day = max(
+            LAST_ANNOUNCE + datetime.timedelta(days=1),
+            today - datetime.timedelta(days=BIRTHDAY_CATCH_UP),
+        )
+    yesterday = today - datetime.timedelta(days=1)
+
+    # Get list of user in current date, those born a 29 of february
+    # being celebrated the 28 if it's not a leap year
+    BD_USERS = [
+        bd.user_id
+        for bd in DATABASE.get_birthdays_between(max(first_day, today), today)
+    ]
+    LATE_BD_USERS = [
+        bd.user_id for bd in DATABASE.get_birthdays_between(first_day, yesterday)
+    ]
+DATABASE.close()
+
+
+def format_users(user_mentions: list[str]) -> str:
+    """Join mentions in a French sentence.
+
+    Args:
+        user_mentions: the mentions of the users
+
+    Returns:
+        the mentions separated by commas and "et"
+    """
+    if len(user_mentions) == 1:
+        return user_mentions[0]
+    return ', '.join(user_mentions[:-1]) + f' et {user_mentions[-1]}'
+
+
+def get_mentions(server: discord.Guild, users: list[int]) -> list[str]:
+    """Mention the users still on the server.
+
+    Args:
+        server: the server
+        users: the discord identifiers of the users
+
+    Returns:
+        the mentions of the members, those who left being skipped
+    """
+    user_mentions = []
+    for user in users:
+        member = server.get_member(user)
+        if member is None:
+            log.info(f'User {user} is not on the server anymore, not greeted')
         else:
-            leap = False
-
-        if not leap:
-            # Add birthdays of people born a 29 of february
-            BD_USERS += DATABASE.get_birthdays(datetime.date(1964, 2, 29))
+            user_mentions.append(member.mention)
+    return user_mentions
 
 
 @bot.event
@@ -66,13 +100,19 @@ async def on_ready():
 
     # Targetted server
     server = bot.get_guild(SERVER_ID)
+    if server is None:
+        log.error(f'Server {SERVER_ID} not found, nothing announced')
+        await bot.close()
+        return
 
     # Inspire if needed
     if INSPIRE:
         log.debug("Sending inspiring quote...")
         # Get inspiring quote
-        response = requests.get("https://zenquotes.io/api/random")
-        json_data = json.loads(response.text)
+        translator = create_translator()
+        session = translator.session
+        async with session.get("https://zenquotes.io/api/random") as response:
+            json_data = await response.json(content_type=None)
         quote = json_data[0]['q'] + " -" + json_data[0]['a']
 
         inspire_channel = server.get_channel(INSPIRE_CHAN)
@@ -81,43 +121,54 @@ async def on_ready():
         await inspire_channel.send(quote)
 
         # Translated quote if translation is working
-        quote_translation = translate.translate(quote, 'fr')
+        quote_translation = await translator.translate(quote, 'fr')
         if quote_translation is not None:
             await inspire_channel.send(quote_translation.msg)
+        await translator.close()
         log.info("Inspiration delivered.")
 
     # Greetings for birthdays if needed
-    if BD_USERS:
+    if BD_USERS or LATE_BD_USERS:
         log.info("Greeting birthdays...")
 
         bd_chan = server.get_channel(BIRTHDAY_CHAN)
 
-        # Get user to mention
-        user_mentions = [server.get_member(id).mention for id in BD_USERS]
-
-        # Creating the message to send
-        greeting_base = ("Aujourd'hui n'est pas n'importe quel jour puisque "
-                         "c'est l'anniversaire de ")
-        greeting_end = """ !!!\nJoyeux anniversaire 🎉✨🌈🎊🎂💖"""
-
-        # User string depends on number of birthdays
-        user_string = user_mentions[0]
-        if len(BD_USERS) > 1:
-            for user in user_mentions[1:-1]:
-                user_string += f', {user}'
-            user_string += f' et {user_mentions[-1]}'
-
-        # Send happy birthday !
-        await bd_chan.send(greeting_base + user_string + greeting_end)
+        # Get users to mention
+        user_mentions = get_mentions(server, BD_USERS)
+        if user_mentions:
+            # Creating the message to send
+            greeting_base = ("Aujourd'hui n'est pas n'importe quel jour puisque "
+                             "c'est l'anniversaire de ")
+            greeting_end = """ !!!\nJoyeux anniversaire 🎉✨🌈🎊🎂💖"""
+
+            # Send happy birthday !
+            await bd_chan.send(
+                greeting_base + format_users(user_mentions) + greeting_end,
+            )
+
+        # Birthdays of the days the script did not run
+        user_mentions = get_mentions(server, LATE_BD_USERS)
+        if user_mentions:
+            late_users = format_users(user_mentions)
+            await bd_chan.send(
+                f"Avec un peu de retard, joyeux anniversaire à {late_users} 🎉✨🌈🎊🎂💖",
+            )
 
         log.info("Happy birthdays delivered.")
 
+    with DATABASE:
+        DATABASE.set_last_announce(today)
+    DATABASE.close()
+
     log.info("End of script.")
     await bot.close()
 
 # If needed, connect the bot
-if INSPIRE or BD_USERS:
+if INSPIRE or BD_USERS or LATE_BD_USERS:
     log.info('Starting bot...')
     bot.run(TOKEN)
 else:
+    with DATABASE:
+        DATABASE.set_last_announce(today)
+    DATABASE.close()
     log.info('Nothing to do. End of script.')
@@ -0,0 +1 @@
+"""Speed measurements of the bot's libraries, run with `python -m benchmarks.<name>`."""
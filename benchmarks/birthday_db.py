@@ -0,0 +1,82 @@
+"""Hammer the birthday database from the bot and from concurrent cron processes."""
+
+import datetime
+import logging
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+from typing import Any
+
+from lib.birthday_lib import DateDb
+
+log = logging.getLogger(__name__)
+
+
+def _hammer(database: str, role: str, rounds: int, errors: Any) -> None:
+    """Read and write the database like the bot or the announce script.
+
+    Args:
+        database: path to the database
+        role: 'bot' to keep one connection, 'cron' to open one per round
+        rounds: number of transactions
+        errors: shared counter of the failed transactions
+    """
+    date_db = DateDb(database)
+    for index in range(rounds):
+        try:
+            with date_db:
+                if role == 'bot':
+                    date_db.update_birthday(index % 50, f'1964-01-{index % 28 + 1:02}')
+                    date_db.get_all_birthdays()
+                else:
+                    date_db.get_birthdays(datetime.date(1964, 1, index % 28 + 1))
+                    date_db.update_birthday(1000 + index % 50, '1964-02-29')
+        except sqlite3.OperationalError as error:
+            log.warning(f'{role}: {error}')
+            with errors.get_lock():
+                errors.value += 1
+        if role == 'cron':
+            date_db.close()
+    date_db.close()
+
+
+def stress(rounds: int = 2000, crons: int = 3) -> None:
+    """Hammer a database from a bot process and concurrent cron processes.
+
+    Args:
+        rounds: number of transactions of each process
+        crons: number of processes behaving like the announce script
+    """
+    logging.basicConfig(level=logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        database = f'{directory}/birthday.db'
+        with DateDb(database) as date_db:
+            date_db.init_birthday_db()
+        date_db.close()
+
+        errors = multiprocessing.Value('i', 0)
+        roles = ['bot'] + ['cron'] * crons
+        processes = [
+            multiprocessing.Process(
+                target=_hammer, args=(database, role, rounds, errors),
+            )
+            for role in roles
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+    transactions = rounds * len(roles)
+    print(
+        f'{transactions} transactions from {len(roles)} processes in '
+        f'{elapsed:.2f}s ({transactions / elapsed:,.0f}/s), '
+        f'{errors.value} failed',
+    )
+
+
+if __name__ == '__main__':
+    stress()
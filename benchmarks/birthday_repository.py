@@ -0,0 +1,45 @@
+"""Compare the batched writes of the birthday repository with a transaction for each write."""
+
+import asyncio
+import tempfile
+import time
+
+from lib.birthday_repository import BirthdayRepository
+
+
+def benchmark(writes: int = 2000) -> None:
+    """Compare the batched writes with a transaction for each write.
+
+    The commands of many users writing at the same time are simulated by
+    concurrent calls.
+
+    Args:
+        writes: number of birthdays written
+    """
+    birthdays = [(user, f'1964-{user % 12 + 1:02}-{user % 28 + 1:02}') for user in range(writes)]
+
+    async def one_by_one(database: str) -> None:  # noqa: WPS430
+        repository = BirthdayRepository(database)
+        await repository.init_birthday_db()
+        for user, birthday in birthdays:
+            await repository.update_birthday(user, birthday)
+        await repository.close()
+
+    async def concurrent(database: str) -> None:  # noqa: WPS430
+        repository = BirthdayRepository(database)
+        await repository.init_birthday_db()
+        await asyncio.gather(*(
+            repository.update_birthday(user, birthday) for user, birthday in birthdays
+        ))
+        await repository.close()
+
+    for name, run in (('one by one', one_by_one), ('batched', concurrent)):
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            asyncio.run(run(f'{directory}/birthday.db'))
+            rate = writes / (time.perf_counter() - start)
+        print(f'{name}: {rate:,.0f} writes per second')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,67 @@
+"""Compare the birthday date parser with the former one, based on dateutil."""
+
+import datetime
+import timeit
+
+from dateutil.parser import ParserError, parse
+
+from lib.birthday_lib import MONTHS, date_parser
+
+
+def former_month_number(month: str) -> int | None:
+    """Get the number of a month the former way, searching the French names.
+
+    Args:
+        month: the name of the month in French
+
+    Returns:
+        the number of the month starting with 1 for January
+        or None if the name is incorrect
+    """
+    try:
+        return MONTHS.index(month.lower()) + 1
+    except ValueError:
+        return None
+
+
+def dateutil_parser(date_input: str) -> str | None:
+    """Parse a date the former way, through dateutil.
+
+    Args:
+        date_input: the input to be tested as a date
+
+    Returns:
+        date as '1964-mm-dd' if input is valid, None otherwise
+    """
+    if not date_input:
+        return None
+    words = f'{date_input}-1964'.replace('-', ' ').split(' ')
+    words = [str(former_month_number(word) or word) for word in words]
+    try:
+        date: datetime.datetime = parse(' '.join(words), dayfirst=True, yearfirst=False)
+    except (ParserError, OverflowError):
+        return None
+    return date.date().isoformat()
+
+
+def benchmark(rounds: int = 2000) -> None:
+    """Compare the date parser with the former one, on the doctested inputs.
+
+    Args:
+        rounds: number of times each input is parsed
+    """
+    inputs = ['27-05', '27 05', '27-mai', '27 mai', '   27      05  ', '', '20-mars', '31-02']
+    for date_input in inputs:
+        if date_parser(date_input) != dateutil_parser(date_input):
+            print(f'Different results for {date_input!r}')
+
+    for name, parser in (('dateutil', dateutil_parser), ('date_parser', date_parser)):
+        duration = timeit.timeit(
+            lambda: [parser(date_input) for date_input in inputs], number=rounds,
+        )
+        rate = rounds * len(inputs) / duration
+        print(f'{name}: {rate:,.0f} dates per second')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,47 @@
+"""Compare the routing of the events with starting every handler for every event."""
+
+import asyncio
+import time
+
+from lib.dispatch import Dispatcher, when
+
+
+def benchmark(events: int = 20000) -> None:
+    """Compare the routing with starting every handler for every event.
+
+    Five handlers bound to different channels receive events spread over
+    twenty channels, like the bot's message handlers.
+
+    Args:
+        events: number of events to dispatch
+    """
+    handlers = []
+    for channel in range(5):
+        @when(channel=[channel])
+        async def handler(event, channel=channel):  # noqa: WPS430
+            if event != channel:
+                return
+        handlers.append(handler)
+    dispatcher = Dispatcher(handlers, index='channel')
+
+    async def every_handler() -> None:
+        for event in range(events):
+            channel = event % 20
+            await asyncio.wait([
+                asyncio.ensure_future(handler(channel)) for handler in handlers
+            ])
+
+    async def routed() -> None:
+        for event in range(events):
+            channel = event % 20
+            await dispatcher.dispatch((channel,), channel=channel)
+
+    for name, run in (('every handler', every_handler), ('routed', routed)):
+        start = time.perf_counter()
+        asyncio.run(run())
+        rate = events / (time.perf_counter() - start)
+        print(f'{name}: {rate:,.0f} events per second')
+
+
+if __name__ == '__main__':
+    benchmark()
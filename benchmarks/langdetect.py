@@ -0,0 +1,25 @@
+"""Measure the speed of the offline French detection on the sample corpus."""
+
+import timeit
+
+from lib import langdetect
+from lib.langdetect import LanguageDetector
+
+
+def benchmark(runs: int = 100) -> None:
+    """Print the time taken by a detection.
+
+    Args:
+        runs: number of times the sample corpus is detected
+    """
+    detector = LanguageDetector.load()
+    texts = [text for _, text in langdetect.read_corpus(langdetect.SAMPLES_PATH)]
+    duration = timeit.timeit(
+        lambda: [detector.detect(text) for text in texts], number=runs,
+    )
+    per_text = duration / (runs * len(texts)) * 1e6
+    print(f'{per_text:.1f} µs per detection')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -1,22 +1,29 @@
 """Define commands for the birthday management functionalities."""
 
-import re
+import datetime
+import io
+import tempfile
 from functools import wraps
 from textwrap import dedent
-from typing import Any
+from typing import Any, cast
 
 import discord
 from discord.ext import commands
 
+from lib import birthday_io as bd_io
 from lib import birthday_lib as bd_lib
-from lib.load_var import get_var
+from lib.authorization import has_role, in_server
+from lib.member_index import MemberIndex
+from lib.pagination import Paginator
 
-BIRTHDAY_DB = get_var('BIRTHDAY_DB')
-
-USER_TAG_RE = re.compile(r'.*#\d{4}')
-USER_ID_RE = re.compile(r'\d{18}')
-
-ZAMI_ROLE = get_var('ZAMI_ROLE')
+# Maximum number of days shown by bd.upcoming
+UPCOMING_MAX_DAYS = 366
+# Birthdays shown on each page of bd.list and bd.upcoming, keeping pages under 2000 characters
+LIST_PAGE_SIZE = 20
+# Number of invalid rows detailed after an import
+IMPORT_ERRORS_SHOWN = 10
+# Bytes of an export kept in memory before using a temporary file
+EXPORT_MEMORY = 1024 * 1024
 
 
 def message_command(*args: Any, **kwargs: Any) -> Any:
@@ -59,7 +66,62 @@ class BirthdayCmdCog(commands.Cog, name='Birthday commands'):  # type:ignore
             bot: the Discord bot that will run the commands
         """
         self.bot = bot
-        self.database = bd_lib.DateDb(BIRTHDAY_DB)
+        self.database = bot.birthday_db
+        self.calendar = bot.birthday_calendar
+        self.members: MemberIndex = bot.member_index
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        """Index the members of a server once it is available.
+
+        Args:
+            guild: the server
+        """
+        self.members.load(guild)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before, after):
+        """Index again a user who changed their name.
+
+        The birthday list is rendered again as it shows the names.
+
+        Args:
+            before: the user before the update
+            after: the user after the update
+        """
+        self.members.update_user(self.bot.guilds, after)
+        if str(before) != str(after):
+            self.calendar.rename(after.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        """Index again a member whose profile in the server changed.
+
+        Args:
+            before: the member before the update
+            after: the member after the update
+        """
+        self.members.add(after)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        """Index a member, rendering the birthday list again if they come back.
+
+        Args:
+            member: the member who joined the server
+        """
+        self.members.add(member)
+        self.calendar.rename(member.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        """Forget a member, rendering the birthday list again.
+
+        Args:
+            member: the member who left the server
+        """
+        self.members.remove(member)
+        self.calendar.rename(member.id)
 
     @message_command(name='birthday', aliases=['bd'])
     async def menu(self, _ctx) -> str:
@@ -76,9 +138,15 @@ class BirthdayCmdCog(commands.Cog, name='Birthday commands'):  # type:ignore
         - Ajouter un anniversaire : `bd.add Mudae#0807 11-08`
         - Supprimer un anniversaire : `bd.delete Mudae#0807`
         - Afficher les anniversaire : `bd.list`
+        - Afficher les prochains anniversaires : `bd.upcoming 30`
+        - Importer des anniversaires : `bd.import` avec un fichier CSV ou JSON joint
+          (colonnes `user` et `date`)
+        - Exporter les anniversaires : `bd.export csv` ou `bd.export json`
         """
         return message  # noqa: WPS:331
 
+    @has_role('ZAMI_ROLE')
+    @in_server()
     @message_command(name='birthday.update', aliases=['bd.update', 'bd.add'])
     async def update(self, ctx, user_info, *date_input) -> str:
         """Add or update the birthday of the specified user.
@@ -93,23 +161,15 @@ class BirthdayCmdCog(commands.Cog, name='Birthday commands'):  # type:ignore
 
         Usage : %bd.update Mudae#0807 27-05
         """
-        # Exit if it's not from the adequate server
-        if ctx.guild.id != get_var('SERVER_ID'):
-            return f"""You are not supposed to use this command on this server : {ctx.guild}"""
-
-        # Exit if the user has not the adequate role
-        zamis = ctx.guild.get_role(ZAMI_ROLE)
-        if not zamis or ctx.author not in zamis.members:
-            return "You don't have the adequate role to execute this command."
-
         # Check if the user is valid
-        user = self.user_parser(ctx, user_info)
+        user = await self.user_parser(ctx, user_info)
         if not user:
             cmd_prefix = self.bot.command_prefix
             return f"""\
             Mauvaise utilisation de la commande, l'utilisateur {user_info} n'existe pas.
             Exemple : `{cmd_prefix}bd.update Mudae#0807 27-05`
-            Vérifiez la syntaxe Nom#1234, ou le discord id, ou taggez directement la @personne !
+            Vérifiez la syntaxe Nom#1234 ou le nom d'utilisateur, ou le discord id,
+            ou taggez directement la @personne !
             """
 
         # Check if the date is valid
@@ -121,66 +181,195 @@ class BirthdayCmdCog(commands.Cog, name='Birthday commands'):  # type:ignore
             return message  # noqa: WPS:331
 
         # Update database
-        with self.database as database:
-            database.update_birthday(user.id, date)
+        await self.calendar.update(user.id, date)
 
         message = """La date d'anniversaire {0} a été enregistrée pour l'utilisateur {1} !"""
 
         return message.format(bd_lib.display_db_date(date), user)
 
-    def user_parser(self, ctx, user) -> discord.User | None:
-        """Verify that user exists and returns its discord id.
+    @staticmethod
+    def member_name(guild: discord.Guild, user_id: int) -> str:
+        """Name a user in the birthday lists.
+
+        Args:
+            guild: the server
+            user_id: discord identifier of the user
+
+        Returns:
+            the name of the member, or a mention if they left the server
+        """
+        member = guild.get_member(user_id)
+        return str(member) if member else f'<@{user_id}>'
+
+    async def user_parser(self, ctx, user) -> discord.Member | None:
+        """Verify that user exists and returns them.
 
         Args:
             ctx: message context
-            user: the user to try to find (id or name#discriminator)
+            user: the user to try to find (mention, id, name#discriminator,
+                username or display name)
 
         Returns:
-            user_id: discord id of the user if found, None otherwise
-        """
-        id_match = USER_ID_RE.search(user)
-        tag_match = USER_TAG_RE.search(user)
-
-        # Check if input user exists
-        found_user: discord.User | None = None
-        if id_match:
-            # Try to found user with parsed id
-            found_user = discord.utils.get(
-                ctx.guild.members,
-                id=int(id_match.group(0)),
-            )
-        elif tag_match:
-            name, discriminator = tag_match.group(0).split('#')
-            # Try to found user with parsed name and discriminator
-            found_user = discord.utils.get(
-                ctx.guild.members,
-                name=name,
-                discriminator=discriminator,
-            )
+            the member if found, None otherwise
+        """
+        return await self.members.resolve(ctx.guild, user)
 
-        return found_user
+    @has_role('ZAMI_ROLE')
+    @in_server()
+    @message_command(name='birthday.import', aliases=['bd.import'])
+    async def import_birthdays(self, ctx) -> str:
+        """Add or update the birthdays of a CSV or JSON file.
 
-    @message_command(name='birthday.list', aliases=['bd.list'])
-    async def list(self, ctx) -> str:
-        """Display the list of every birthdays registered in the database.
+        Every valid row is written in a single transaction, the invalid ones
+        being reported.
 
         Args:
             ctx: message context
 
         Returns:
             message to send
+
+        Usage:
+            %bd.import with a file attached
         """
-        # Exit if it's not from the adequate server
-        if ctx.guild.id != get_var('SERVER_ID'):
-            return f"""You are not supposed to use this command on this server : {ctx.guild}"""
+        attachments = ctx.message.attachments
+        file_format = None
+        if attachments:
+            file_format = bd_io.file_format(attachments[0].filename)
+        if not file_format:
+            return """\
+            Il faut joindre à la commande un fichier `.csv` ou `.json`.
+            Les colonnes `user` (Nom#1234 ou discord id) et `date` (`20-03` ou `20 mars`)
+            sont nécessaires."""
+
+        try:
+            content = (await attachments[0].read()).decode('utf-8-sig')
+        except UnicodeDecodeError:
+            return "Le fichier doit être encodé en UTF-8."
+
+        birthdays: list[tuple[int, str]] = []
+        errors: list[str] = []
+        try:
+            for row in bd_io.read_rows(io.StringIO(content), file_format):
+                user = self.members.find(ctx.guild, row.user)
+                date = bd_lib.date_parser(row.date)
+                if not user:
+                    errors.append(f"ligne {row.line} : l'utilisateur {row.user!r} n'existe pas")
+                elif not date:
+                    errors.append(f'ligne {row.line} : la date {row.date!r} est invalide')
+                else:
+                    birthdays.append((user.id, date))
+        except ValueError as error:
+            return f"Le fichier n'a pas pu être lu : {error}"
 
-        with self.database as database:
-            bds = database.get_all_birthdays()
+        # Update database
+        await self.calendar.update_many(birthdays)
 
-        bds_list = (bd.format(ctx.guild.get_member) for bd in bds)
-        bds_display = '\n'.join(bds_list)
-        return "Liste des anniversaires enregistrés :\n" + bds_display
+        message = f"{len(birthdays)} anniversaires ont été enregistrés !"
+        if errors:
+            shown = errors[:IMPORT_ERRORS_SHOWN]
+            message += f"\n{len(errors)} lignes ont été ignorées :\n" + '\n'.join(shown)
+            if len(errors) > len(shown):
+                message += '\n...'
+        return message
+
+    @in_server()
+    @commands.command(name='birthday.export', aliases=['bd.export'])
+    async def export_birthdays(self, ctx, file_format='csv') -> None:
+        """Send every birthday registered in the database as a file.
+
+        Args:
+            ctx: message context
+            file_format: 'csv' or 'json'
 
+        Usage:
+            %bd.export json
+        """
+        file_format = file_format.lower()
+        if file_format not in bd_io.FORMATS:
+            await ctx.send("Les formats disponibles sont `csv` et `json`.")
+            return
+
+        def name(user_id: int) -> str:  # noqa: WPS430
+            member = ctx.guild.get_member(user_id)
+            return str(member) if member else ''
+
+        # Write the rows into a file that stays in memory unless it is big
+        with tempfile.SpooledTemporaryFile(max_size=EXPORT_MEMORY) as export:
+            writer = bd_io.RowWriter(file_format)
+            export.write(writer.start().encode())
+            async for bd in self.database.iter_birthdays():
+                row = bd_io.ExportRow(bd.user_id, name(bd.user_id), bd_io.export_date(bd.birthday))
+                export.write(writer.write(row).encode())
+            export.write(writer.end().encode())
+            export.seek(0)
+            export_file = discord.File(
+                cast(io.BufferedIOBase, export), filename=f'anniversaires.{file_format}',
+            )
+            await ctx.send("Liste des anniversaires enregistrés :", file=export_file)
+
+    @in_server()
+    @commands.command(name='birthday.list', aliases=['bd.list'])
+    async def list(self, ctx) -> None:
+        """Display the list of every birthdays registered in the database.
+
+        The list is split into pages browsed with buttons, each page being
+        formatted only when shown.
+
+        Args:
+            ctx: message context
+        """
+        def page_count() -> int:  # noqa: WPS430
+            return -(-len(self.calendar) // LIST_PAGE_SIZE)
+
+        def get_page(page: int) -> str:  # noqa: WPS430
+            start = page * LIST_PAGE_SIZE
+            bds_list = self.calendar.render(
+                lambda user_id: self.member_name(ctx.guild, user_id),
+                start,
+                start + LIST_PAGE_SIZE,
+            )
+            return "Liste des anniversaires enregistrés :\n" + '\n'.join(bds_list)
+
+        await Paginator(ctx.author.id, page_count, get_page).send(ctx)
+
+    @in_server()
+    @commands.command(name='birthday.upcoming', aliases=['bd.upcoming'])
+    async def upcoming(self, ctx, days='30') -> None:
+        """Display the birthdays of the next days, split into pages.
+
+        Args:
+            ctx: message context
+            days: the number of days to look ahead, today included
+
+        Usage:
+            %bd.upcoming 30
+        """
+        if not days.isdigit() or not 1 <= int(days) <= UPCOMING_MAX_DAYS:
+            await ctx.send(f"Le nombre de jours doit être compris entre 1 et {UPCOMING_MAX_DAYS}.")
+            return
+
+        today = datetime.date.today()
+        last_day = today + datetime.timedelta(days=int(days) - 1)
+        bds = await self.database.get_birthdays_between(today, last_day)
+
+        if not bds:
+            await ctx.send(f"Aucun anniversaire dans les {days} prochains jours.")
+            return
+
+        def get_page(page: int) -> str:  # noqa: WPS430
+            start = page * LIST_PAGE_SIZE
+            bds_list = (
+                bd.format(lambda user_id: self.member_name(ctx.guild, user_id))
+                for bd in bds[start:start + LIST_PAGE_SIZE]
+            )
+            return f"Anniversaires des {days} prochains jours :\n" + '\n'.join(bds_list)
+
+        page_count = -(-len(bds) // LIST_PAGE_SIZE)
+        await Paginator(ctx.author.id, lambda: page_count, get_page).send(ctx)
+
+    @has_role('ZAMI_ROLE')
+    @in_server()
     @message_command(
         name='birthday.delete',
         aliases=['bd.delete', 'bd.remove'],
@@ -198,21 +387,11 @@ class BirthdayCmdCog(commands.Cog, name='Birthday commands'):  # type:ignore
         Usage:
             %bd.delete Mudae#0807
         """
-        # Exit if it's not from the adequate server
-        if ctx.guild.id != get_var('SERVER_ID'):
-            return f"""You are not supposed to use this command on this server : {ctx.guild}"""
-
-        # Exit if the user has not the adequate role
-        zamis = ctx.guild.get_role(ZAMI_ROLE)
-        if not zamis or ctx.author not in zamis.members:
-            return "You don't have the role to execute this command."
-
         # Check if the user is valid
-        user = self.user_parser(ctx, user_info)
+        user = await self.user_parser(ctx, user_info)
         if user:
             # Update database
-            with self.database as database:
-                database.remove_birthday(user.id)
+            await self.calendar.remove(user.id)
 
             return f"L'anniversaire de l'utilisateur {user} a été retiré !"
 
@@ -221,7 +400,8 @@ class BirthdayCmdCog(commands.Cog, name='Birthday commands'):  # type:ignore
         return f"""\
         Mauvaise utilisation de la commande, l'utilisateur {user_info} n'existe pas.
         Exemple : `{cmd_prefix}bd.delete Mudae#0807`
-        Vérifiez la syntaxe Nom#1234, ou le discord id, ou taggez directement la @personne !"""
+        Vérifiez la syntaxe Nom#1234 ou le nom d'utilisateur, ou le discord id,
+        ou taggez directement la @personne !"""
 
 
 async def setup(bot):
@@ -1,11 +1,12 @@
-import discord
+from typing import Any
+
 from discord.ext import commands
-import lib.gtranslate as translate
-import asyncio
+from lib.dispatch import Dispatcher, when
+from lib.langdetect import Verdict
 from lib.load_var import get_var
-import re
-from urllib.parse import urlparse
-import random
+from lib.message_features import MessageFeatures
+from lib.rate_limit import Priority
+from lib.triggers import TriggerEngine
 
 # Channels
 POKEMON_CHAN = get_var('POKEMON_CHAN')
@@ -13,22 +14,101 @@ CAPS_CHAN = get_var('CAPS_CHAN')
 LANG_CHANS = get_var('LANG_CHANS')
 PRES_CHAN = get_var('PRES_CHAN')
 
-# Emojis
-emoji_IDs = get_var('emoji_IDs')
-
-# Rage reactions
-RAGE_RESPONSES = get_var('RAGE_RESPONSES')
-
 # Users
 VIPS = get_var('VIPS')
 MUDAE = get_var('MUDAE')
 
-EMOJI_RE = re.compile(r'\W*:\w+:\W*')
+# Keyword triggers, used when the configuration does not define them
+ZBRRR = 'En mode ZBRRRRRRRRRRRRRRRRRRRRRRRRRRRRRAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA'
+DEFAULT_POKE_TRIGGERS: list[dict[str, Any]] = [
+    {'keywords': ['Psyduck'], 'react': ['PSYDUCK_ID']},
+    {'keywords': ['Magikarp'], 'react': ['KOIKINGU_ID']},
+    {'keywords': ['uncommon nothing'], 'react': ['👍'], 'replies': 'RAGE_RESPONSES'},
+    {'keywords': ['maintenance'], 'react': ['GRRPIN_ID']},
+    {'keywords': ['Pikachu'], 'react': ['PIKAWOW_ID']},
+    {'keywords': ['Butterfree'], 'react': ['BRETAGNE_ID']},
+    {'keywords': ['Piplup'], 'react': ['TIPLOUFSHINE_ID']},
+    {'keywords': ['shinySparkles'], 'react': ['✨']},
+    # One reply for each of these sentences found
+    {'keywords': ['HOW DID YOU DO THAT?!'], 'react': ['👍'], 'reply': ZBRRR},
+    {'keywords': ['belong to our dimension'], 'react': ['👍'], 'reply': ZBRRR},
+    {'keywords': ['LEGENDARY'], 'react': ['👍'], 'reply': ZBRRR},
+    {'keywords': ['ULTRA BEAST'], 'react': ['👍'], 'reply': ZBRRR},
+]
+DEFAULT_KEYWORD_TRIGGERS: list[dict[str, Any]] = [
+    {'keywords': ['bisou'], 'ignore_case': True, 'pool': 'bisous', 'sample': 3},
+]
+
+POKE_TRIGGERS = TriggerEngine.from_config('POKE_TRIGGERS', DEFAULT_POKE_TRIGGERS)
+KEYWORD_TRIGGERS = TriggerEngine.from_config('KEYWORD_TRIGGERS', DEFAULT_KEYWORD_TRIGGERS)
+
+# Reaction pools, as unicode emojis and names of custom emojis
+HEARTS = ('❤️', '🧡', '💛', '💚', '💙', '💜', '🖤', '🤎', '🤍')
+HEARTS_CUSTOM = ('PINKHEART_ID',)
+BISOUS = ('🧡', '💛', '💚', '💙', '💜', '🖤', '🤎',
+          '🤍', '💕', '💞', '💓', '💗', '💖', '♥️')
+BISOUS_CUSTOM = ('LOVE_ID', 'KOIDUCK_ID', 'GHOSTHUG_ID', 'PSYKORGASM_ID',
+                 'BLUSH2_ID', 'BISOU_ID', 'PINKHEART_ID')
 
 
 class MessagesCog(commands.Cog, name="Bot messages actions"):  # type:ignore
     def __init__(self, bot):
         self.bot = bot
+        bot.emoji_registry.register_pool('hearts', HEARTS, HEARTS_CUSTOM)
+        bot.emoji_registry.register_pool('bisous', BISOUS, BISOUS_CUSTOM)
+
+        # Route the messages to the handlers by channel and author
+        self.dispatcher = Dispatcher([
+            auto_language_flag,
+            poke_react,
+            # capital_letters_cop,
+            hearts_on_presentation,
+            keyword_reactions,
+        ], index='channel')
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Resolve the custom emojis once connected."""
+        self.bot.emoji_registry.load(self.bot.emojis)
+
+    @commands.Cog.listener()
+    async def on_guild_emojis_update(self, guild, before, after):
+        """Keep the custom emojis up to date.
+
+        Args:
+            guild: the guild whose emojis changed
+            before: the emojis of the guild before the update
+            after: the emojis of the guild after the update
+        """
+        self.bot.emoji_registry.update(before, after)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        """Forget the translation of an edited message.
+
+        Args:
+            payload: RawMessageUpdateEvent containing the message infos
+        """
+        self.bot.message_translations.discard(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        """Forget the translation of a deleted message.
+
+        Args:
+            payload: RawMessageDeleteEvent containing the message infos
+        """
+        self.bot.message_translations.discard(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        """Forget the translations of deleted messages.
+
+        Args:
+            payload: RawBulkMessageDeleteEvent containing the messages infos
+        """
+        for message_id in payload.message_ids:
+            self.bot.message_translations.discard(message_id)
 
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -43,62 +123,74 @@ class MessagesCog(commands.Cog, name="Bot messages actions"):  # type:ignore
         if message.content.startswith(self.bot.command_prefix):
             return
 
-        # Handle the calls of on_message actions
-        on_message_handlers = [
-            auto_language_flag,
-            poke_react,
-            # capital_letters_cop,
-            hearts_on_presentation,
-            hearts_on_bisou,
-            # hearts_on_jtm,
-        ]
-        await asyncio.wait(
-            [handler(message, self.bot) for handler in on_message_handlers]
+        # Call the on_message actions whose channel and author match,
+        # sharing the features of the message
+        await self.dispatcher.dispatch(
+            (message, self.bot, MessageFeatures(message.content)),
+            channel=message.channel.id,
+            author=str(message.author),
         )
 
 
-async def hearts_on_presentation(message, bot):
+@when(channel=[PRES_CHAN])
+async def hearts_on_presentation(message, bot, features):
     """Add heart reactions in presentation channel.
 
     Args:
         message: The message that was just posted on the channel
         bot: The bot
+        features: The features of the message
     """
     # Keep the bot from triggering himself
     if message.author == bot.user:
         return
 
-    if message.channel.id == PRES_CHAN:
-        hearts = ['❤️', '🧡', '💛', '💚', '💙', '💜', '🖤', '🤎', '🤍',
-                  get_emoji(emoji_IDs['PINKHEART_ID'], bot)]
-        for heart in hearts:
-            await message.add_reaction(heart)
+    for heart in bot.emoji_registry.pool('hearts'):
+        bot.reactions.add(message, heart)
 
 
-async def auto_language_flag(message, bot):
+@when(channel=LANG_CHANS)
+async def auto_language_flag(message, bot, features):
     """Add the flag react in language channels if the message is not french.
 
     Args:
         message: The message that was just posted on the channel
         bot: The bot
+        features: The features of the message
     """
-    if message.channel.id in LANG_CHANS:
+    if features.starts_with_emoji:
+        return
 
-        if EMOJI_RE.match(message.content):
-            return
+    # Check if there is an url in the phrase
+    if features.url_spans:
+        return
 
-        # Check if there is an url in the phrase
-        words = message.content.split()
-        if any(is_url(word) for word in words):
+    # Add flag only if message not from french, asking the local
+    # detector first and the translation service only when it is unsure
+    verdict = bot.language_detector.detect(message.content)
+    if verdict is Verdict.FRENCH:
+        return
+    if verdict is Verdict.NOT_FRENCH:
+        bot.reactions.add(message, '\U0001f6a9')
+
+    # Translate in the background and keep the result for the flag reactions
+    bot.message_translations.expect(message.id)
+    try:
+        translation = await bot.translator.translate(
+            message.content, 'fr', priority=Priority.BACKGROUND,
+        )
+        if translation is None or translation.lang == 'Français':
             return
+        if verdict is Verdict.UNSURE:
+            bot.reactions.add(message, '\U0001f6a9')
+        bot.message_translations.put(message.id, message.content, translation)
+    finally:
+        # Nothing is expected anymore, even if the translation failed
+        bot.message_translations.abandon(message.id)
 
-        # Add flag only if message not from french
-        translation = translate.translate(message.content, 'fr')
-        if translation is not None and translation.lang != 'Français':
-            await message.add_reaction('\U0001f6a9')
 
-
-async def capital_letters_cop(message, bot):
+@when(channel=[CAPS_CHAN])
+async def capital_letters_cop(message, bot, features):
     """React to uncapitalized messages in spicy_capitals, except for VIP people.
 
     When people post messages with less than a certain amount of capitalized
@@ -107,184 +199,54 @@ async def capital_letters_cop(message, bot):
     Args:
         message: The message that was just posted on the channel
         bot: The bot
+        features: The features of the message
     """
     # Keep the bot from triggering himself
     if message.author == bot.user:
         return
 
-    if message.channel.id != CAPS_CHAN:
-        return
-
-    if 'bisou' in message.content.lower():
+    if 'bisou' in features.lower:
         return
 
     if message.author.id in VIPS:
         return
 
-    words = message.content.split()
-    min_count = sum(is_lowercase(word) for word in words)
     threshold = 0.25
 
-    if min_count / len(words) > threshold:
-        await message.add_reaction(get_emoji(emoji_IDs['BLURRYCOP_ID'], bot))
-
-
-async def hearts_on_bisou(message, bot):
-    """React to messages containing "bisou" with full of hearts emojis.
-
-    Args:
-        message: The message that was just posted on the channel
-        bot: The bot
-    """
-    # Keep the bot from triggering himself
-    if message.author == bot.user:
-        return
-
-    if 'bisou' in message.content.lower():
-        bisous = random.sample(bisous_pool(bot), 3)
-        for bisou in bisous:
-            await message.add_reaction(bisou)
+    if features.lowercase_ratio > threshold:
+        bot.reactions.add(message, bot.emoji_registry.get('BLURRYCOP_ID'))
 
 
-async def hearts_on_jtm(message, bot):
-    """React to messages containing 'i love you' like sentences with emojis.
+async def keyword_reactions(message, bot, features):
+    """React to the keywords of the KEYWORD_TRIGGERS, such as "bisou".
 
     Args:
         message: The message that was just posted on the channel
         bot: The bot
+        features: The features of the message
     """
     # Keep the bot from triggering himself
     if message.author == bot.user:
         return
 
-    love_phrases = ["je t'aime", "jtm", "je vous aime"]
-    if any(phrase in message.content.lower() for phrase in love_phrases):
-        await asyncio.wait(
-            [message.add_reaction(bisous) for bisous in bisous_pool(bot)]
-        )
+    await KEYWORD_TRIGGERS.run(message, bot, features.lower)
 
 
-async def poke_react(message, bot):
-    """Reacts to what Mudae returned from te pokeroulette.
+@when(channel=[POKEMON_CHAN], author=[MUDAE])
+async def poke_react(message, bot, features):
+    """Reacts to what Mudae returned from te pokeroulette, following the
+    POKE_TRIGGERS.
 
     Args:
         message: The message that was just posted on the channel
         bot: The bot
+        features: The features of the message
     """
     # Keep the bot from triggering himself
     if message.author == bot.user:
         return
 
-    channel = message.channel.id
-    author = str(message.author)
-
-    # Interract with bot Muade if she spoke pokemon channel
-    if author != MUDAE or channel != POKEMON_CHAN:
-        return
-
-    reaction_triggers = {
-        'Psyduck': 'PSYDUCK_ID',
-        'Magikarp': 'KOIKINGU_ID',
-        # 'uncommon nothing': 'GRRPIN_ID',
-        'uncommon nothing': '👍',
-        'maintenance': 'GRRPIN_ID',
-        'Pikachu': 'PIKAWOW_ID',
-        'Butterfree': 'BRETAGNE_ID',
-        'Piplup': 'TIPLOUFSHINE_ID',
-        'shinySparkles': '✨',
-        'HOW DID YOU DO THAT?!': '👍',
-        'belong to our dimension': '👍',
-        'LEGENDARY': '👍',
-        'ULTRA BEAST': '👍',
-    }
-
-    for sentence, emoji_name in reaction_triggers.items():
-        await poke_case(sentence, emoji_name, message, bot)
-
-
-async def poke_case(sentence, emoji_name, message, bot):
-    """Test if word is in message. If so add reaction identified by emoji_name.
-
-    Args:
-        words: The words to test
-        emoji_name: The name of the emoji_id of the emoji we want to add.
-        message: The message that was just posted on the channel
-        bot: The bot
-    """
-
-    if sentence in message.content:
-        if sentence == 'uncommon nothing':
-            await message.add_reaction(emoji_name)
-            await bot.get_channel(POKEMON_CHAN).send(random.choice(RAGE_RESPONSES))
-        elif sentence == 'HOW DID YOU DO THAT?!' or sentence == 'belong to our dimension' or sentence == 'LEGENDARY' or sentence == 'ULTRA BEAST':
-            await message.add_reaction(emoji_name)
-            await bot.get_channel(POKEMON_CHAN).send('En mode ZBRRRRRRRRRRRRRRRRRRRRRRRRRRRRRAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA')
-        elif sentence == 'shinySparkles':
-            await message.add_reaction(emoji_name)
-        else:
-            await message.add_reaction(get_emoji(emoji_IDs[emoji_name], bot))
-
-
-def get_emoji(emoji_id: int, bot: commands.bot.Bot) -> discord.Emoji:
-    """Get the emoji with given id.
-
-    Args:
-        emoji_id: ID of the emoji we want to fetch.
-
-    Returns:
-        the emoji code
-    """
-    return discord.utils.get(bot.emojis, id=emoji_id)
-
-
-def is_url(string: str) -> bool:
-    """Check if word should be considered to be a URL. This a simple check only.
-
-    Args:
-        string: the string to check for URL
-
-    Returns:
-        true if the word has a scheme and a domain
-    """
-    parsed = urlparse(string)
-    return bool(parsed.scheme and parsed.netloc)
-
-
-def is_lowercase(word: str) -> bool:
-    """Check if word should be considered lowercase.
-
-    Args:
-        word: the string to check for lowercase
-
-    Returns:
-        true if the word is lowercase and is not an emoji or a link
-    """
-    lowercase = word.upper() != word
-    emoji = EMOJI_RE.match(word)
-    url = is_url(word)
-    return lowercase and not emoji and not url
-
-
-def bisous_pool(bot: commands.bot.Bot) -> list:
-    """Return the bisous pool of emojis
-
-    Args:
-        bot: The bot
-
-    Returns:
-        list of kiss emojis
-    """
-    bisous = ['🧡', '💛', '💚', '💙', '💜', '🖤', '🤎',
-              '🤍', '💕', '💞', '💓', '💗', '💖', '♥️',
-              get_emoji(emoji_IDs['LOVE_ID'], bot),
-              get_emoji(emoji_IDs['KOIDUCK_ID'], bot),
-              get_emoji(emoji_IDs['GHOSTHUG_ID'], bot),
-              get_emoji(emoji_IDs['PSYKORGASM_ID'], bot),
-              get_emoji(emoji_IDs['BLUSH2_ID'], bot),
-              get_emoji(emoji_IDs['BISOU_ID'], bot),
-              get_emoji(emoji_IDs['PINKHEART_ID'], bot)]
-
-    return bisous
+    await POKE_TRIGGERS.run(message, bot)
 
 
 async def setup(bot):
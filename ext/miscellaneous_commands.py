@@ -1,10 +1,9 @@
-import requests
-import json
+import asyncio
 from discord.ext import commands
-import lib.gtranslate as translate
 import discord
 import traceback
 import sys
+from lib.authorization import NotAllowed, ROLES
 
 
 class MiscCmdCog(commands.Cog, name="Miscellaneous bot commands"):  # type:ignore
@@ -56,6 +55,12 @@ class MiscCmdCog(commands.Cog, name="Miscellaneous bot commands"):  # type:ignor
         if isinstance(error, commands.DisabledCommand):
             await ctx.send(f'{ctx.command} has been disabled.')
 
+        elif isinstance(error, NotAllowed):
+            await ctx.send(str(error))
+
+        elif isinstance(error, asyncio.TimeoutError):
+            await ctx.send("La base de données ne répond pas, réessayez dans quelques instants.")
+
         elif isinstance(error, commands.NoPrivateMessage):
             try:
                 await ctx.author.send(
@@ -84,6 +89,44 @@ class MiscCmdCog(commands.Cog, name="Miscellaneous bot commands"):  # type:ignor
                 file=sys.stderr
             )
 
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        """Forget the roles resolved for the command checks.
+
+        Args:
+            role: the new role
+        """
+        ROLES.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        """Forget the roles resolved for the command checks.
+
+        Args:
+            before: the role before the update
+            after: the role after the update
+        """
+        ROLES.invalidate(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        """Forget the roles resolved for the command checks.
+
+        Args:
+            role: the deleted role
+        """
+        ROLES.invalidate(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before, after):
+        """Forget the roles resolved for the command checks.
+
+        Args:
+            before: the server before the update
+            after: the server after the update
+        """
+        ROLES.invalidate(after.id)
+
     @commands.command(name='repeat', aliases=['mimic', 'copy', 'say'])
     async def do_repeat(self, ctx, *, inp: str):
         """A simple command which repeats your input!
@@ -111,15 +154,16 @@ class MiscCmdCog(commands.Cog, name="Miscellaneous bot commands"):  # type:ignor
     async def inspire(self, ctx) -> None:
         """Send inspiring quote ☄️
         """
-        response = requests.get("https://zenquotes.io/api/random")
-        json_data = json.loads(response.text)
+        session = self.bot.translator.session
+        async with session.get("https://zenquotes.io/api/random") as response:
+            json_data = await response.json(content_type=None)
         quote = json_data[0]['q'] + " -" + json_data[0]['a']
 
         # Original quote
         await ctx.send(quote)
 
         # Translated quote if translation is working
-        quote_translation = translate.translate(quote, 'fr')
+        quote_translation = await self.bot.translator.translate(quote, 'fr')
         if quote_translation is not None:
             await ctx.send(quote_translation.msg)
 
@@ -1,12 +1,20 @@
 import lib.gtranslate as translate
 from discord.ext import commands
-import asyncio
+from lib.dispatch import Dispatcher, when
+
+# Red flag ':triangular_flag_on_post:'
+RED_FLAG = '\U0001f6a9'
 
 
 class ReactionsCog(commands.Cog, name="Bot reactions actions"):  # type:ignore
     def __init__(self, bot):
         self.bot = bot
 
+        # Route the reactions to the handlers by emoji
+        self.dispatcher = Dispatcher([
+            translate_on_flag,
+        ], index='emoji')
+
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
         """Triggered every time a reaction is added.
@@ -18,12 +26,13 @@ class ReactionsCog(commands.Cog, name="Bot reactions actions"):  # type:ignore
         if payload.user_id == self.bot.user.id:
             return
 
-        # Handle the calls of on_raw_reaction_add actions
-        await asyncio.wait([
-            translate_on_flag(payload, self.bot),
-        ])
+        # Call the on_raw_reaction_add actions whose emoji matches
+        await self.dispatcher.dispatch(
+            (payload, self.bot), emoji=payload.emoji.name,
+        )
 
 
+@when(emoji=[RED_FLAG])
 async def translate_on_flag(payload, bot):
     """Translate the reacted message if the emoji is the red flag.
 
@@ -31,28 +40,30 @@ async def translate_on_flag(payload, bot):
         payload: RawReactionActionEvent containing reaction infos
         bot: the bot
     """
-    # If reaction is the red flag ':triangular_flag_on_post:'
-    if ascii(payload.emoji.name) == r"'\U0001f6a9'":
-
+    # Translation made when the message was posted, if still valid
+    stored = bot.message_translations.get(payload.message_id)
+    if stored is not None:
+        src_msg, translation = stored
+    else:
         # Message source
         channel = bot.get_channel(payload.channel_id)
         message = await channel.fetch_message(payload.message_id)
         src_msg = message.content
 
         # Getting translation infos
-        translation = translate.translate(src_msg, 'fr')
-
-        # Send translation to the private messages of the user reacting
-        # if it worked
-        if translation:
-            user = await bot.fetch_user(payload.user_id)
-            await user.create_dm()
-            await user.dm_channel.send(
-                f"'{src_msg}'\ntraduit du {translation.lang} en\n"
-                f"'{translation.msg}'"
-            )
-        else:
-            await user.dm_channel.send(translate.translate_error_msg)
+        translation = await bot.translator.translate(src_msg, 'fr')
+
+    # Send translation to the private messages of the user reacting
+    # if it worked, the member being known for reactions in a server
+    recipient = payload.member or payload.user_id
+    if translation:
+        await bot.direct_messages.send(
+            recipient,
+            f"'{src_msg}'\ntraduit du {translation.lang} en\n"
+            f"'{translation.msg}'",
+        )
+    else:
+        await bot.direct_messages.send(recipient, translate.translate_error_msg)
 
 
 async def setup(bot):
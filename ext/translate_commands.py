@@ -50,7 +50,7 @@ class TranslateCmdCog(commands.Cog, name="Translate bot commands"):  # type:igno
             return
 
         to_translate = ' '.join(message)
-        translation = translate.translate(to_translate, lang)
+        translation = await self.bot.translator.translate(to_translate, lang)
 
         # Send translation if it worked
         if translation is not None:
@@ -58,6 +58,24 @@ class TranslateCmdCog(commands.Cog, name="Translate bot commands"):  # type:igno
         else:
             await ctx.send(translate.translate_error_msg)
 
+    @commands.command(name='translation.status', aliases=['tr.status'])
+    async def status(self, ctx) -> None:
+        """Send the health of the translation services 🩺
+        """
+        translator = self.bot.translator
+        lines = [
+            f'{name} : {state}'
+            for name, state in translator.backend.status().items()
+        ]
+        stats = translator.stats
+        lines.append(
+            f"Cache : {stats['hits']} trouvées, {stats['misses']} demandées, "
+            f"{stats['negative_hits']} échecs récents, "
+            f"{stats['coalesced']} regroupées, {stats['failures']} échouées, "
+            f"{stats['throttled']} abandonnées"
+        )
+        await ctx.send('\n'.join(lines))
+
     @translate.error
     async def translate_handler(self, ctx, error):
         """A local Error Handler for our command translate.
@@ -0,0 +1,104 @@
+"""Command checks on the server and the roles named in the configuration."""
+
+from typing import Any, Callable
+
+import discord
+from discord.ext import commands
+
+from lib.load_var import get_var
+
+
+class NotAllowed(commands.CheckFailure):
+    """Raised when a command is used where or by whom it should not be.
+
+    The message is meant to be sent back to the user.
+    """
+
+
+class RoleCache(object):
+    """Roles of the configuration, resolved once per server.
+
+    The cache is shared by every cog, and emptied when the roles or the
+    server change.
+    """
+
+    def __init__(self) -> None:
+        """Initialise an empty cache."""
+        self._roles: dict[tuple[int, str], discord.Role | None] = {}
+
+    def role(self, guild: discord.Guild, var: str) -> discord.Role | None:
+        """Get a role from the name of its configuration variable.
+
+        Args:
+            guild: the server of the role
+            var: the configuration variable holding the role id
+
+        Returns:
+            the role, or None if it does not exist in the server
+        """
+        key = (guild.id, var)
+        if key not in self._roles:
+            self._roles[key] = guild.get_role(get_var(var))
+        return self._roles[key]
+
+    def invalidate(self, guild_id: int | None = None) -> None:
+        """Forget the roles of a server, or of every server.
+
+        Args:
+            guild_id: the id of the server, None for every server
+        """
+        if guild_id is None:
+            self._roles.clear()
+            return
+        for key in [key for key in self._roles if key[0] == guild_id]:
+            del self._roles[key]
+
+
+# Cache shared by every check
+ROLES = RoleCache()
+
+
+def in_server(var: str = 'SERVER_ID') -> Callable[[Any], Any]:
+    """Allow a command only on the server of the configuration.
+
+    Args:
+        var: the configuration variable holding the server id
+
+    Returns:
+        a command decorator
+    """
+    server_id = get_var(var)
+
+    async def predicate(ctx: commands.Context[commands.Bot]) -> bool:
+        if ctx.guild is None or ctx.guild.id != server_id:
+            raise NotAllowed(
+                f'You are not supposed to use this command on this server : {ctx.guild}',
+            )
+        return True
+
+    return commands.check(predicate)
+
+
+def has_role(var: str) -> Callable[[Any], Any]:
+    """Allow a command only to the members having a role of the configuration.
+
+    The role is checked among the role ids of the author, without going
+    through the members of the role. Checks run from the decorator closest
+    to the command, so `in_server` goes below it to be checked first.
+
+    Args:
+        var: the configuration variable holding the role id
+
+    Returns:
+        a command decorator
+    """
+    async def predicate(ctx: commands.Context[commands.Bot]) -> bool:
+        if ctx.guild is None:
+            raise commands.NoPrivateMessage()
+        author = ctx.author
+        role = ROLES.role(ctx.guild, var)
+        if role is None or not isinstance(author, discord.Member) or not author._roles.has(role.id):
+            raise NotAllowed("You don't have the adequate role to execute this command.")
+        return True
+
+    return commands.check(predicate)
@@ -0,0 +1,702 @@
+"""Common interface to the translation services, and routing between them."""
+
+import asyncio
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Awaitable, Callable, Sequence
+
+import aiohttp
+
+from lib import bing, circuit_breaker, gtranslate, rate_limit
+from lib.circuit_breaker import CircuitBreaker
+from lib.gtranslate import Translation, TranslationError
+from lib.rate_limit import RateLimitExceeded, TokenBucket
+
+log = logging.getLogger(__name__)
+
+# Number of requests remembered to compute the latency statistics
+STATS_WINDOW = 100
+# Percentile of the primary's latency after which the secondary is called
+HEDGE_PERCENTILE = 0.9
+# Seconds to wait before hedging while too few latencies are known
+HEDGE_DEFAULT_DELAY = 1.0
+# Minimum number of latencies needed to trust the percentile
+HEDGE_MIN_SAMPLES = 10
+# Default number of requests that may be sent at once to a service
+RATE_BURST = 5
+# Text translated to check whether a backend recovered
+PROBE_TEXT = 'Bonjour'
+
+# Google language codes that are spelled differently by Bing
+BING_LANGUAGES = {
+    'zh-CN': 'zh-Hans',
+    'zh': 'zh-Hans',
+    'zh-TW': 'zh-Hant',
+    'iw': 'he',
+    'no': 'nb',
+    'sr': 'sr-Cyrl',
+    'ku': 'ku-Arab',
+}
+
+
+class Backend(ABC):
+    """A translation service.
+
+    Every method raises a TranslationError when the translation failed.
+    """
+
+    name = 'backend'
+
+    @abstractmethod
+    async def translate(
+        self,
+        session: aiohttp.ClientSession,
+        text: str,
+        dest_lang: str,
+        src_lang: str | None = None,
+    ) -> Translation:
+        """Translate the given text to the given language.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            text: the text to translate
+            dest_lang: the language to translate into, as a Google code
+            src_lang: the text's language, or autodetect if it's None
+
+        Returns:
+            the translated text and the detected language
+        """
+
+    async def translate_many(
+        self,
+        session: aiohttp.ClientSession,
+        texts: list[str],
+        dest_lang: str,
+        src_lang: str | None = None,
+    ) -> list[Translation]:
+        """Translate several texts to the given language.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            texts: the texts to translate
+            dest_lang: the language to translate into, as a Google code
+            src_lang: the texts' language, or autodetect if it's None
+
+        Returns:
+            the translations, in the same order as `texts`
+        """
+        return list(await asyncio.gather(*(
+            self.translate(session, text, dest_lang, src_lang) for text in texts
+        )))
+
+    def status(self) -> dict[str, str]:
+        """Describe the health of the backend.
+
+        Returns:
+            a description of each underlying service, by name
+        """
+        return {self.name: 'disponible'}
+
+    async def close(self) -> None:
+        """Stop the background work of the backend."""
+
+
+class GoogleBackend(Backend):
+    """Google's gtx translation endpoints."""
+
+    name = 'google'
+
+    async def translate(self, session, text, dest_lang, src_lang=None):
+        """Translate the given text with Google.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            text: the text to translate
+            dest_lang: the language to translate into
+            src_lang: the text's language, or autodetect if it's None
+
+        Returns:
+            the translated text and the detected language
+        """
+        return await gtranslate.translate(session, text, dest_lang, src_lang)
+
+    async def translate_many(self, session, texts, dest_lang, src_lang=None):
+        """Translate several texts with a single Google request.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            texts: the texts to translate
+            dest_lang: the language to translate into
+            src_lang: the texts' language, or autodetect if it's None
+
+        Returns:
+            the translations, in the same order as `texts`
+        """
+        if len(texts) == 1:
+            return [await self.translate(session, texts[0], dest_lang, src_lang)]
+        return await gtranslate.translate_many(session, texts, dest_lang, src_lang)
+
+
+class BingBackend(Backend):
+    """Bing's ttranslatev3 endpoint."""
+
+    name = 'bing'
+
+    async def translate(self, session, text, dest_lang, src_lang=None):
+        """Translate the given text with Bing.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            text: the text to translate
+            dest_lang: the language to translate into, as a Google code
+            src_lang: the text's language, or autodetect if it's None
+
+        Returns:
+            the translated text and the detected language
+        """
+        translations = await self.translate_many(
+            session, [text], dest_lang, src_lang,
+        )
+        return translations[0]
+
+    async def translate_many(self, session, texts, dest_lang, src_lang=None):
+        """Translate several texts with Bing.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            texts: the texts to translate
+            dest_lang: the language to translate into, as a Google code
+            src_lang: the texts' language, or autodetect if it's None
+
+        Returns:
+            the translations, in the same order as `texts`
+
+        Raises:
+            TranslationError: if a language is not supported by Bing
+                or one of the translations failed, transient when Bing
+                may answer later
+        """
+        dest_lang = self.language_code(dest_lang)
+        if src_lang is not None:
+            src_lang = self.language_code(src_lang)
+
+        results = await bing.BingTranslate(session).translate_many(
+            texts, dest_lang, src_lang,
+        )
+        return [Translation(msg, lang) for msg, lang in results]
+
+    @staticmethod
+    def language_code(lang: str) -> str:
+        """Convert a Google language code to Bing's.
+
+        Args:
+            lang: the Google language code
+
+        Returns:
+            the matching Bing language code
+
+        Raises:
+            TranslationError: if Bing does not support the language
+
+        >>> BingBackend.language_code('zh-CN')
+        'zh-Hans'
+        >>> BingBackend.language_code('de')
+        'de'
+        """
+        lang = BING_LANGUAGES.get(lang, lang)
+        if lang not in bing.translate_table:
+            raise TranslationError(f'Language {lang} not supported by Bing')
+        return lang
+
+
+class GuardedBackend(Backend):
+    """A backend protected by a circuit breaker.
+
+    While the circuit is open, calls fail at once instead of waiting for a
+    doomed request, and a background probe checks when the service is back.
+    """
+
+    def __init__(
+        self,
+        backend: Backend,
+        failure_threshold: int = circuit_breaker.FAILURE_THRESHOLD,
+        reset_timeout: float = circuit_breaker.RESET_TIMEOUT,
+    ) -> None:
+        """Wrap the backend.
+
+        Args:
+            backend: the protected backend
+            failure_threshold: consecutive failures opening the circuit
+            reset_timeout: seconds before the first probe of an open circuit
+        """
+        self.backend = backend
+        self.name = backend.name
+        self.breaker = CircuitBreaker(
+            backend.name,
+            failure_threshold=failure_threshold,
+            reset_timeout=reset_timeout,
+            probe=self._probe,
+        )
+        self._session: aiohttp.ClientSession | None = None
+
+    async def translate(self, session, text, dest_lang, src_lang=None):
+        """Translate the given text if the circuit is closed.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            text: the text to translate
+            dest_lang: the language to translate into
+            src_lang: the text's language, or autodetect if it's None
+
+        Returns:
+            the translated text and the detected language
+        """
+        return await self._guard(
+            session,
+            self.backend.translate(session, text, dest_lang, src_lang),
+        )
+
+    async def translate_many(self, session, texts, dest_lang, src_lang=None):
+        """Translate several texts if the circuit is closed.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            texts: the texts to translate
+            dest_lang: the language to translate into
+            src_lang: the texts' language, or autodetect if it's None
+
+        Returns:
+            the translations, in the same order as `texts`
+        """
+        return await self._guard(
+            session,
+            self.backend.translate_many(session, texts, dest_lang, src_lang),
+        )
+
+    async def _guard(self, session: aiohttp.ClientSession, request: Awaitable[Any]) -> Any:
+        """Run a request through the circuit breaker.
+
+        Args:
+            session: the HTTP session of the request, kept for the probes
+            request: the request to the protected backend
+
+        Returns:
+            the result of the request
+
+        Raises:
+            TranslationError: if the circuit is open or the request failed
+        """
+        self._session = session
+        if not self.breaker.allow():
+            request.close()  # type: ignore
+            raise TranslationError(f'{self.name}: circuit {self.breaker.describe()}')
+        try:
+            result = await request
+        except TranslationError as error:
+            # A request refused by the service does not tell it is down
+            if error.transient:
+                self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def _probe(self) -> None:
+        """Check that the service translates again."""
+        if self._session is None or self._session.closed:
+            raise TranslationError('No open session to probe with')
+        await self.backend.translate(self._session, PROBE_TEXT, 'en', 'fr')
+
+    def status(self) -> dict[str, str]:
+        """Describe the state of the circuit.
+
+        Returns:
+            the state of the circuit of the backend
+        """
+        return {self.name: f'circuit {self.breaker.describe()}'}
+
+    async def close(self) -> None:
+        """Stop probing the service."""
+        self.breaker.cancel()
+
+
+class ThrottledBackend(Backend):
+    """A backend whose requests are limited by a token bucket.
+
+    The lane of each request is read from `rate_limit.current_priority`.
+    """
+
+    def __init__(self, backend: Backend, bucket: TokenBucket) -> None:
+        """Wrap the backend.
+
+        Args:
+            backend: the rate limited backend
+            bucket: the token bucket of the backend
+        """
+        self.backend = backend
+        self.name = backend.name
+        self.bucket = bucket
+
+    async def translate(self, session, text, dest_lang, src_lang=None):
+        """Translate the given text once a token is available.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            text: the text to translate
+            dest_lang: the language to translate into
+            src_lang: the text's language, or autodetect if it's None
+
+        Returns:
+            the translated text and the detected language
+        """
+        await self._acquire()
+        return await self.backend.translate(session, text, dest_lang, src_lang)
+
+    async def translate_many(self, session, texts, dest_lang, src_lang=None):
+        """Translate several texts once a token is available.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            texts: the texts to translate
+            dest_lang: the language to translate into
+            src_lang: the texts' language, or autodetect if it's None
+
+        Returns:
+            the translations, in the same order as `texts`
+        """
+        await self._acquire()
+        return await self.backend.translate_many(
+            session, texts, dest_lang, src_lang,
+        )
+
+    async def _acquire(self) -> None:
+        """Wait for a token.
+
+        Raises:
+            TranslationError: if the request was dropped
+        """
+        try:
+            await self.bucket.acquire()
+        except RateLimitExceeded as error:
+            raise TranslationError(f'{self.name}: {error}', throttled=True) from error
+
+    def status(self) -> dict[str, str]:
+        """Describe the backend and its remaining budget.
+
+        Returns:
+            the status of the wrapped backend with the available tokens
+        """
+        return {
+            self.name: '{0}, {1:.0f} jetons'.format(
+                self.backend.status()[self.name], self.bucket.tokens,
+            ),
+        }
+
+    async def close(self) -> None:
+        """Stop the background work of the wrapped backend."""
+        await self.backend.close()
+
+
+class LatencyStats(object):
+    """Latencies and outcomes of the last requests made to a backend."""
+
+    def __init__(self, window: int = STATS_WINDOW) -> None:
+        """Initialise empty statistics.
+
+        Args:
+            window: number of requests remembered
+        """
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.failures: deque[bool] = deque(maxlen=window)
+
+    def record(self, latency: float, failed: bool) -> None:
+        """Remember the outcome of a request.
+
+        Args:
+            latency: seconds the request took
+            failed: whether the request failed
+        """
+        self.failures.append(failed)
+        if not failed:
+            self.latencies.append(latency)
+
+    def percentile(self, fraction: float) -> float | None:
+        """Get a percentile of the latencies of the successful requests.
+
+        Args:
+            fraction: the percentile, between 0 and 1
+
+        Returns:
+            the latency in seconds, or None if none is known
+
+        >>> stats = LatencyStats()
+        >>> for latency in range(1, 11):
+        ...     stats.record(latency / 10, failed=False)
+        >>> stats.percentile(0.5), stats.percentile(0.9)
+        (0.6, 1.0)
+        """
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    @property
+    def failure_rate(self) -> float:
+        """Share of the last requests that failed.
+
+        Returns:
+            the failure rate, between 0 and 1
+        """
+        if not self.failures:
+            return 0
+        return sum(self.failures) / len(self.failures)
+
+
+class BackendRouter(Backend):
+    """Send translations to the best backend, falling back on the others.
+
+    Backends are ranked by their recent failure rate then their median
+    latency, the ones never heard of keeping their order of preference
+    behind the others. When the chosen backend fails, the next one is tried. In hedged
+    mode, the next one is also called when the chosen one has not answered
+    within its usual latency percentile, and the first answer wins.
+    """
+
+    name = 'router'
+
+    def __init__(
+        self,
+        backends: Sequence[Backend],
+        hedge: bool = False,
+        hedge_percentile: float = HEDGE_PERCENTILE,
+    ) -> None:
+        """Initialise the router.
+
+        Args:
+            backends: the backends, by order of preference
+            hedge: whether to call the next backend when one is slow
+            hedge_percentile: percentile of the latency after which
+                the next backend is called
+        """
+        self.backends = list(backends)
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.stats = {backend.name: LatencyStats() for backend in self.backends}
+
+    def ranked(self) -> list[Backend]:
+        """Sort the backends from the most to the least promising.
+
+        Returns:
+            the backends, healthy and fast ones first
+        """
+        def rank(indexed: tuple[int, Backend]) -> tuple[bool, float, int]:
+            index, backend = indexed
+            stats = self.stats[backend.name]
+            median = stats.percentile(0.5)
+            return (
+                stats.failure_rate > 0.5,
+                median if median is not None else math.inf,
+                index,
+            )
+        return [backend for _, backend in sorted(enumerate(self.backends), key=rank)]
+
+    async def translate(self, session, text, dest_lang, src_lang=None):
+        """Translate the given text with the best available backend.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            text: the text to translate
+            dest_lang: the language to translate into
+            src_lang: the text's language, or autodetect if it's None
+
+        Returns:
+            the translated text and the detected language
+        """
+        return await self._route(
+            lambda backend: backend.translate(session, text, dest_lang, src_lang),
+        )
+
+    async def translate_many(self, session, texts, dest_lang, src_lang=None):
+        """Translate several texts with the best available backend.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+            texts: the texts to translate
+            dest_lang: the language to translate into
+            src_lang: the texts' language, or autodetect if it's None
+
+        Returns:
+            the translations, in the same order as `texts`
+        """
+        return await self._route(
+            lambda backend: backend.translate_many(
+                session, texts, dest_lang, src_lang,
+            ),
+        )
+
+    async def _route(self, call: Callable[[Backend], Awaitable[Any]]) -> Any:
+        """Run a call on the backends until one succeeds.
+
+        Args:
+            call: function making the request to a given backend
+
+        Returns:
+            the result of the first backend that succeeded
+
+        Raises:
+            TranslationError: if every backend failed
+        """
+        candidates = self.ranked()
+        running: dict[asyncio.Task[Any], Backend] = {}
+        errors: list[TranslationError] = []
+        try:
+            while candidates or running:
+                if not running:
+                    self._start(candidates.pop(0), call, running)
+
+                timeout = None
+                if self.hedge and candidates:
+                    timeout = self._hedge_delay(next(iter(running.values())))
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    log.debug('Translation is slow, hedging on another backend')
+                    self._start(candidates.pop(0), call, running)
+                    continue
+
+                for task in done:
+                    running.pop(task)
+                    try:
+                        return task.result()
+                    except TranslationError as error:
+                        errors.append(error)
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise TranslationError(
+            '; '.join(str(error) for error in errors) or 'No backend available',
+            transient=any(error.transient for error in errors),
+            throttled=bool(errors) and all(error.throttled for error in errors),
+        )
+
+    def _start(
+        self,
+        backend: Backend,
+        call: Callable[[Backend], Awaitable[Any]],
+        running: dict[asyncio.Task[Any], Backend],
+    ) -> None:
+        """Start a call on a backend, timing it.
+
+        Args:
+            backend: the backend to call
+            call: function making the request to a given backend
+            running: the running calls, updated with the new one
+        """
+        async def timed() -> Any:
+            start = time.monotonic()
+            try:
+                result = await call(backend)
+            except TranslationError as error:
+                # A request dropped to save the budget says nothing of the backend
+                if not error.throttled:
+                    self.stats[backend.name].record(time.monotonic() - start, failed=True)
+                raise
+            self.stats[backend.name].record(time.monotonic() - start, failed=False)
+            return result
+
+        running[asyncio.create_task(timed())] = backend
+
+    def status(self) -> dict[str, str]:
+        """Describe the health and latency of every backend.
+
+        Returns:
+            a description of each backend, by name
+        """
+        statuses = {}
+        for backend in self.backends:
+            stats = self.stats[backend.name]
+            median = stats.percentile(0.5)
+            latency = f'{median * 1000:.0f} ms' if median is not None else '? ms'
+            statuses[backend.name] = '{0}, {1:.0%} d\'échecs, médiane {2}'.format(
+                backend.status()[backend.name], stats.failure_rate, latency,
+            )
+        return statuses
+
+    async def close(self) -> None:
+        """Stop the background work of every backend."""
+        for backend in self.backends:
+            await backend.close()
+
+    def _hedge_delay(self, backend: Backend) -> float:
+        """Get how long to wait for a backend before calling another one.
+
+        Args:
+            backend: the backend being waited for
+
+        Returns:
+            the number of seconds to wait
+        """
+        stats = self.stats[backend.name]
+        delay = stats.percentile(self.hedge_percentile)
+        if delay is None or len(stats.latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return delay
+
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    BingBackend.name: BingBackend,
+}
+
+
+def create_backend(
+    names: Sequence[str],
+    hedge: bool = False,
+    hedge_percentile: float = HEDGE_PERCENTILE,
+    failure_threshold: int = circuit_breaker.FAILURE_THRESHOLD,
+    reset_timeout: float = circuit_breaker.RESET_TIMEOUT,
+    rates: dict[str, float] | None = None,
+    burst: float = RATE_BURST,
+    reserve: float = rate_limit.RESERVE,
+    background_wait: float = rate_limit.BACKGROUND_WAIT,
+) -> Backend:
+    """Create the backend matching the configured service names.
+
+    Args:
+        names: names of the services, by order of preference
+        hedge: whether to hedge slow requests on the next service
+        hedge_percentile: percentile of the latency before hedging
+        failure_threshold: consecutive failures opening a service's circuit
+        reset_timeout: seconds before probing a service whose circuit opened
+        rates: requests per second allowed to each service, by name,
+            services without a rate are not limited
+        burst: number of requests that may be sent at once
+        reserve: part of the burst kept for interactive requests
+        background_wait: seconds before dropping a background request
+
+    Returns:
+        the only backend, or a router between all of them
+    """
+    rates = rates or {}
+    backends: list[Backend] = []
+    for name in names:
+        backend: Backend = GuardedBackend(
+            BACKENDS[name](),
+            failure_threshold=failure_threshold,
+            reset_timeout=reset_timeout,
+        )
+        if name in rates:
+            backend = ThrottledBackend(backend, TokenBucket(
+                rates[name],
+                burst,
+                reserve=reserve,
+                background_wait=background_wait,
+            ))
+        backends.append(backend)
+    if len(backends) == 1:
+        return backends[0]
+    return BackendRouter(backends, hedge=hedge, hedge_percentile=hedge_percentile)
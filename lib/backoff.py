@@ -0,0 +1,35 @@
+"""Delays between the attempts of a call to a remote service."""
+
+import random
+
+# Seconds of the first backoff, doubled on every new attempt
+BACKOFF_BASE = 0.5
+# Maximum number of seconds to wait between two attempts
+BACKOFF_CAP = 4
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Compute how long to wait before a new attempt.
+
+    Uses the "full jitter" strategy: a random delay between zero and an
+    exponentially growing ceiling, so that the retries of concurrent
+    callers do not hit the service all at once. The delay requested by the
+    service is always honoured.
+
+    Args:
+        attempt: number of the attempt that just failed, starting at 0
+        retry_after: delay requested by the service, if any
+
+    Returns:
+        the number of seconds to wait
+
+    >>> 0 <= backoff_delay(0) <= BACKOFF_BASE
+    True
+    >>> backoff_delay(10) <= BACKOFF_CAP
+    True
+    >>> backoff_delay(0, retry_after=30)
+    30
+    """
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
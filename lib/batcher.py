@@ -0,0 +1,166 @@
+"""Group translation requests into multi-segment upstream calls."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Generic, Sequence, TypeVar
+
+from lib.rate_limit import Priority, current_priority
+
+log = logging.getLogger(__name__)
+
+ResultT = TypeVar('ResultT')
+
+# Default seconds a request waits for others to join its batch
+WINDOW = 0.05
+# Default maximum number of texts in a batch
+MAX_SIZE = 16
+# Default maximum number of characters in a batch
+MAX_CHARS = 4000
+
+BatchKey = tuple[str, str | None, Priority]
+SendFunction = Callable[
+    [list[str], str, str | None], Awaitable[Sequence[ResultT]],
+]
+
+
+class _Batch(Generic[ResultT]):
+    """Texts waiting to be sent together."""
+
+    def __init__(self) -> None:
+        """Initialise an empty batch."""
+        self.texts: list[str] = []
+        self.futures: list[asyncio.Future[ResultT]] = []
+        self.chars = 0
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class TranslationBatcher(Generic[ResultT]):
+    """Collect translation requests and send them upstream in batches.
+
+    Requests sharing the same languages and priority lane are held for at
+    most `window` seconds, or until `max_size` texts or `max_chars`
+    characters are waiting, then sent with a single call to `send` in
+    their lane. Each caller gets its
+    own slice of the result, or the exception raised by `send`.
+
+    >>> async def demo():
+    ...     calls = []
+    ...     async def send(texts, dest_lang, src_lang):
+    ...         calls.append(texts)
+    ...         return [text.upper() for text in texts]
+    ...     batcher = TranslationBatcher(send, window=0.01)
+    ...     results = await asyncio.gather(
+    ...         *(batcher.translate(text, 'fr') for text in ('a', 'b', 'c')),
+    ...     )
+    ...     return results, calls
+    >>> asyncio.run(demo())
+    (['A', 'B', 'C'], [['a', 'b', 'c']])
+    """
+
+    def __init__(
+        self,
+        send: SendFunction[ResultT],
+        window: float = WINDOW,
+        max_size: int = MAX_SIZE,
+        max_chars: int = MAX_CHARS,
+    ) -> None:
+        """Initialise the batcher.
+
+        Args:
+            send: coroutine function translating a list of texts
+                from a source language to a destination language
+            window: seconds a request waits for others to join its batch
+            max_size: maximum number of texts in a batch
+            max_chars: maximum number of characters in a batch
+        """
+        self.send = send
+        self.window = window
+        self.max_size = max_size
+        self.max_chars = max_chars
+        self._batches: dict[BatchKey, _Batch[ResultT]] = {}
+        self._tasks: set[asyncio.Task[Any]] = set()
+
+    async def translate(
+        self,
+        text: str,
+        dest_lang: str,
+        src_lang: str | None = None,
+    ) -> ResultT:
+        """Translate a text as part of the next batch.
+
+        Args:
+            text: the text to translate
+            dest_lang: the language to translate into
+            src_lang: the text's language, or autodetect if it's None
+
+        Returns:
+            the result of `send` for this text
+        """
+        key = (dest_lang, src_lang, current_priority.get())
+        batch = self._batches.get(key)
+        if batch is not None and batch.chars + len(text) > self.max_chars:
+            self._flush(key)
+            batch = None
+        if batch is None:
+            batch = _Batch()
+            self._batches[key] = batch
+            batch.timer = asyncio.get_running_loop().call_later(
+                self.window, self._flush, key,
+            )
+
+        future: asyncio.Future[ResultT] = asyncio.get_running_loop().create_future()
+        batch.texts.append(text)
+        batch.futures.append(future)
+        batch.chars += len(text)
+        if len(batch.texts) >= self.max_size or batch.chars >= self.max_chars:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: BatchKey) -> None:
+        """Send the batch waiting for the given languages.
+
+        Args:
+            key: the languages and the lane of the batch
+        """
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.create_task(self._send(key, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, key: BatchKey, batch: _Batch[ResultT]) -> None:
+        """Send a batch and hand each caller its result.
+
+        Args:
+            key: the languages and the lane of the batch
+            batch: the batch to send
+        """
+        dest_lang, src_lang, priority = key
+        # The task runs in the lane of its callers, whoever flushed it
+        current_priority.set(priority)
+        log.debug(f'Sending a batch of {len(batch.texts)} texts')
+        try:
+            results = await self.send(batch.texts, dest_lang, src_lang)
+            if len(results) != len(batch.texts):
+                raise ValueError(
+                    f'{len(results)} results for {len(batch.texts)} texts',
+                )
+        except Exception as error:
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for future, result in zip(batch.futures, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """Send the waiting batches and wait for every batch to complete."""
+        for key in list(self._batches):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.wait(self._tasks)
@@ -1,9 +1,13 @@
 """Interface to Bing's tranlation API."""
 
-import json
-from functools import lru_cache
+import asyncio
+from typing import Any, Callable, TypeVar
 
-from requests import post
+import aiohttp
+
+from lib.gtranslate import TranslationError, response_error
+
+FieldT = TypeVar('FieldT')
 
 default_headers = {
     'Host': 'www.bing.com',
@@ -79,7 +83,40 @@ translate_table = {
 }
 
 
-MAX_CACHE = 5000
+def parse_answer(answer: Any, read: Callable[[Any], FieldT]) -> FieldT:
+    """Read the wanted fields of an answer of Bing.
+
+    Bing reports its errors, such as rate limiting or an expired IG token,
+    with a JSON object holding a status code instead of the usual answer.
+
+    Args:
+        answer: the decoded answer
+        read: function picking the fields out of the answer
+
+    Returns:
+        the fields
+
+    Raises:
+        TranslationError: if the answer is an error or does not hold the
+            fields, transient for rate limiting and server errors
+
+    >>> parse_answer([{'text': 'Hi'}], lambda answer: answer[0]['text'])
+    'Hi'
+    >>> parse_answer({'statusCode': 429}, lambda answer: answer[0]['text'])
+    Traceback (most recent call last):
+    ...
+    lib.gtranslate.TranslationError: Bing error 429: None
+    """
+    if isinstance(answer, dict) and 'statusCode' in answer:
+        status = answer['statusCode']
+        raise TranslationError(
+            f'Bing error {status}: {answer.get("errorMessage")}',
+            transient=isinstance(status, int) and (status == 429 or status >= 500),
+        )
+    try:
+        return read(answer)
+    except (IndexError, KeyError, TypeError) as error:
+        raise TranslationError(f'Unexpected answer from Bing: {answer!r:.100}') from error
 
 
 class SourceExample(object):
@@ -152,7 +189,15 @@ class Example(object):
 class BingTranslate(object):
     """A Python implementation of Microsoft Bing Translation's APIs."""
 
-    def example(self, text, destination_language, source_language=None):
+    def __init__(self, session: aiohttp.ClientSession) -> None:
+        """Initialise the translator.
+
+        Args:
+            session: the HTTP session whose connection pool is used
+        """
+        self.session = session
+
+    async def example(self, text, destination_language, source_language=None):
         """Return examples for the given text.
 
         Args:
@@ -162,40 +207,32 @@ class BingTranslate(object):
 
         Returns:
             examples of the translation of `text` in target language
+
+        Raises:
+            TranslationError: if a request failed
         """
         if source_language is None:
-            source_language = self.language(text)
-        if source_language is None:
-            return None
+            source_language = await self.language(text)
 
-        translation = self.translate(
+        translation, _ = await self.translate(
             text,
             destination_language,
             source_language,
         )
-        if translation is None:
-            return None
 
-        try:
-            response = post(
-                'https://www.bing.com/texamplev3',
-                headers=default_headers,
-                params=default_parameters,
-                data={
-                    'text': str(text).lower(),
-                    'from': str(source_language),
-                    'to': str(destination_language),
-                    'translation': str(translation).lower(),
-                },
-            )
-        except Exception:
-            return None
-        if not response.ok:
-            return None
-        examples = json.loads(response.text)[0]['examples']
+        response = await self._post(
+            'https://www.bing.com/texamplev3',
+            {
+                'text': str(text).lower(),
+                'from': str(source_language),
+                'to': str(destination_language),
+                'translation': str(translation).lower(),
+            },
+        )
+        examples = parse_answer(response, lambda answer: answer[0]['examples'])
         return [Example(example) for example in examples]
 
-    def spellcheck(self, text, source_language=None):
+    async def spellcheck(self, text, source_language=None):
         """Check the spelling of the given text.
 
         Args:
@@ -204,29 +241,21 @@ class BingTranslate(object):
 
         Returns:
             automatically corrected text
+
+        Raises:
+            TranslationError: if a request failed
         """
         if source_language is None:
-            source_language = self.language(text)
-        if source_language is None:
-            return None
-        try:
-            response = post(
-                'https://www.bing.com/tspellcheckv3',
-                headers=default_headers,
-                params=default_parameters,
-                data={'text': str(text), 'fromLang': str(source_language)},
-            )
-        except Exception:
-            return None
-
-        if not response.ok:
-            return None
+            source_language = await self.language(text)
+        response = await self._post(
+            'https://www.bing.com/tspellcheckv3',
+            {'text': str(text), 'fromLang': str(source_language)},
+        )
 
-        corrected_text = json.loads(response.text)['correctedText']
+        corrected_text = parse_answer(response, lambda answer: answer['correctedText'])
         return corrected_text or text
 
-    @lru_cache(maxsize=MAX_CACHE)
-    def language(self, text):
+    async def language(self, text):
         """Give back the language of the given text.
 
         Args:
@@ -234,27 +263,23 @@ class BingTranslate(object):
 
         Returns:
             the source language of the text
-        """
-        try:
-            response = post(
-                'https://www.bing.com/ttranslatev3',
-                headers=default_headers,
-                params=default_parameters,
-                data={
-                    'text': str(text),
-                    'fromLang': 'auto-detect',
-                    'to': 'en',
-                },
-            )
-        except Exception:
-            return None
 
-        if not response.ok:
-            return None
-        return json.loads(response.text)[0]['detectedLanguage']['language']
+        Raises:
+            TranslationError: if the request failed
+        """
+        response = await self._post(
+            'https://www.bing.com/ttranslatev3',
+            {
+                'text': str(text),
+                'fromLang': 'auto-detect',
+                'to': 'en',
+            },
+        )
+        return parse_answer(
+            response, lambda answer: answer[0]['detectedLanguage']['language'],
+        )
 
-    @lru_cache(maxsize=MAX_CACHE)
-    def translate(self, text, destination_language, source_language=None):
+    async def translate(self, text, destination_language, source_language=None):
         """Translate the given text to the given language.
 
         Args:
@@ -263,32 +288,94 @@ class BingTranslate(object):
             source_language: the text's language, or autodetect if it's None
 
         Returns:
-            translated text if all went well or None otherwise
-            source language if all went well or None otherwise
+            the translated text and the source language
+
+        Raises:
+            TranslationError: if the request failed
+        """
+        response = await self._post(
+            'https://www.bing.com/ttranslatev3',
+            {
+                'text': str(text),
+                'fromLang': str(source_language or 'auto-detect'),
+                'to': str(destination_language),
+            },
+        )
+
+        def read(answer):  # noqa: WPS430
+            msg = answer[0]['translations'][0]['text']
+            # Bing only has to detect the language when it is not given
+            if source_language is not None:
+                return msg, source_language
+            return msg, answer[0]['detectedLanguage']['language']
+
+        msg, language = parse_answer(response, read)
+        return msg, translate_table.get(language, language)
+
+    async def translate_many(
+        self,
+        texts,
+        destination_language,
+        source_language=None,
+    ):
+        """Translate several texts to the given language.
+
+        When the source language is known, the texts are sent as the lines
+        of a single request. Otherwise each text needs its own language
+        detection, so they are sent concurrently over the connection pool.
+
+        Args:
+            texts: the texts to translate
+            destination_language: the language to translate into
+            source_language: the texts' language, or autodetect if it's None
+
+        Returns:
+            a (translated text, source language) tuple for each text
+
+        Raises:
+            TranslationError: if one of the requests failed
+        """
+        joinable = source_language is not None and not any(
+            '\n' in text for text in texts
+        )
+        if joinable and len(texts) > 1:
+            msg, lang = await self.translate(
+                '\n'.join(texts), destination_language, source_language,
+            )
+            lines = msg.split('\n')
+            if len(lines) == len(texts):
+                return [(line, lang) for line in lines]
+
+        return await asyncio.gather(*(
+            self.translate(text, destination_language, source_language)
+            for text in texts
+        ))
+
+    async def _post(self, url, data):
+        """Post a form to Bing and decode its JSON answer.
+
+        Args:
+            url: the endpoint to call
+            data: the form to send
+
+        Returns:
+            the decoded answer
+
+        Raises:
+            TranslationError: if the request failed, transient for network
+                errors, rate limiting and server errors
         """
-        if source_language is None:
-            source_language = 'auto-detect'
         try:
-            response = post(
-                'https://www.bing.com/ttranslatev3',
+            async with self.session.post(
+                url,
                 headers=default_headers,
                 params=default_parameters,
-                data={
-                    'text': str(text),
-                    'fromLang': str(source_language),
-                    'to': str(destination_language),
-                },
-            )
-        except Exception:
-            return (None, None)
-
-        if not response.ok:
-            return (None, None)
-
-        src_lang = translate_table[
-            json.loads(response.text)[0]['detectedLanguage']['language']
-        ]
-        return (
-            json.loads(response.text)[0]['translations'][0]['text'],
-            src_lang,
-        )
+                data=data,
+            ) as response:
+                if not response.ok:
+                    raise response_error(response)
+                return await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            raise TranslationError(str(error), transient=True) from error
+        except ValueError as error:
+            raise TranslationError(f'Invalid answer from Bing: {error}') from error
@@ -0,0 +1,146 @@
+"""In-memory snapshot of the birthdays, written through to the database."""
+
+import datetime
+from typing import Callable, Iterable
+
+from lib.birthday_lib import Birthday, month_day
+from lib.birthday_repository import BirthdayRepository
+
+
+class BirthdayCalendar(object):
+    """Birthdays loaded once and kept in sync with the database.
+
+    Every change is written to the database, then applied to the snapshot
+    once committed, even if the database answered too late for the caller.
+    The sorted birthdays and the ones already rendered are kept until a
+    birthday or the name of a user having one changes.
+    """
+
+    def __init__(self, database: BirthdayRepository) -> None:
+        """Initialise an empty calendar, filled by `load`.
+
+        Args:
+            database: the birthday database
+        """
+        self.database = database
+        self._birthdays: dict[int, str] = {}
+        self._sorted: list[Birthday] | None = None
+        self._rendered: dict[int, str] = {}
+
+    async def load(self) -> None:
+        """Load the birthdays of the database."""
+        self._birthdays = {
+            bd.user_id: bd.birthday for bd in await self.database.get_all_birthdays()
+        }
+        self._invalidate()
+
+    def __contains__(self, user: object) -> bool:
+        """Tell if a user has a birthday.
+
+        Args:
+            user: discord identifier of the user
+
+        Returns:
+            true if the birthday of the user is known
+        """
+        return user in self._birthdays
+
+    def __len__(self) -> int:
+        """Number of birthdays.
+
+        Returns:
+            the number of users having a birthday
+        """
+        return len(self._birthdays)
+
+    async def update(self, user: int, birthday: str) -> None:
+        """Add or modify the birthday of a user.
+
+        Args:
+            user: discord identifier of the user
+            birthday: birthday date of the user ('1964-mm-dd')
+        """
+        def committed() -> None:  # noqa: WPS430
+            self._birthdays[user] = birthday
+            self._invalidate()
+
+        await self.database.update_birthday(user, birthday, on_commit=committed)
+
+    async def update_many(self, birthdays: Iterable[tuple[int, str]]) -> int:
+        """Add or modify many birthdays in a single transaction.
+
+        Args:
+            birthdays: couples of discord identifier and birthday date
+
+        Returns:
+            the number of birthdays written
+        """
+        birthdays = list(birthdays)
+
+        def committed() -> None:  # noqa: WPS430
+            self._birthdays.update(birthdays)
+            self._invalidate()
+
+        return await self.database.update_birthdays(birthdays, on_commit=committed)
+
+    async def remove(self, user: int) -> None:
+        """Remove the birthday of a user.
+
+        Args:
+            user: discord identifier of the user
+        """
+        def committed() -> None:  # noqa: WPS430
+            if self._birthdays.pop(user, None) is not None:
+                self._invalidate()
+
+        await self.database.remove_birthday(user, on_commit=committed)
+
+    def birthdays(self) -> list[Birthday]:
+        """Get all the birthdays.
+
+        Returns:
+            the birthdays, in the order of the year
+        """
+        if self._sorted is None:
+            self._sorted = sorted(
+                (Birthday(*item) for item in self._birthdays.items()),
+                key=lambda bd: month_day(datetime.date.fromisoformat(bd.birthday)),
+            )
+        return self._sorted
+
+    def render(
+        self,
+        get_name: Callable[[int], str],
+        start: int = 0,
+        stop: int | None = None,
+    ) -> list[str]:
+        """Get formatted birthdays, formatting each one only after a change.
+
+        Args:
+            get_name: a function that gives a readable name from an ID
+            start: the position of the first birthday, in the order of the year
+            stop: the position after the last birthday, None for the end
+
+        Returns:
+            the formatted birthdays, in the order of the year
+        """
+        birthdays = self.birthdays()
+        positions = range(len(birthdays))[start:stop]
+        for position in positions:
+            if position not in self._rendered:
+                self._rendered[position] = birthdays[position].format(get_name)
+        return [self._rendered[position] for position in positions]
+
+    def rename(self, user: int) -> None:
+        """Render the list again if the name of a user having a birthday changed.
+
+        Args:
+            user: discord identifier of the user
+        """
+        if user in self._birthdays:
+            self._rendered.clear()
+
+    def _invalidate(self) -> None:
+        """Forget the sorted and rendered birthdays after a change."""
+        self._sorted = None
+        self._rendered.clear()
@@ -0,0 +1,202 @@
+"""Read and write birthdays as CSV or JSON files for bulk imports and exports."""
+
+import csv
+import io
+import json
+from pathlib import PurePath
+from typing import Iterable, Iterator, NamedTuple
+
+FORMATS = ('csv', 'json')
+# Columns of the files, the user being a discord id or a Nom#1234 tag
+FIELDS = ('user', 'name', 'date')
+
+
+class ImportRow(NamedTuple):
+    """A birthday read from a file, not validated yet.
+
+    Attributes:
+        line: the line or position of the row in the file, starting at 1
+        user: the user as written in the file
+        date: the date as written in the file
+    """
+
+    line: int
+    user: str
+    date: str
+
+
+class ExportRow(NamedTuple):
+    """A birthday written to a file.
+
+    Attributes:
+        user: the discord id of the user
+        name: the readable name of the user
+        date: the date as 'dd-mm'
+    """
+
+    user: int
+    name: str
+    date: str
+
+
+def file_format(filename: str) -> str | None:
+    """Get the format of a file from its extension.
+
+    Args:
+        filename: the name of the file
+
+    Returns:
+        'csv' or 'json', None if the format is not supported
+
+    >>> file_format('anniversaires.CSV')
+    'csv'
+    >>> file_format('anniversaires.txt')
+    """
+    suffix = PurePath(filename).suffix.lower().lstrip('.')
+    return suffix if suffix in FORMATS else None
+
+
+def read_rows(lines: Iterable[str], file_format: str) -> Iterator[ImportRow]:
+    """Read the birthdays of a file.
+
+    CSV files are read line by line and need a header with the `user` and
+    `date` columns, a quoted field may span several lines. JSON files hold a
+    list of objects with the same keys.
+
+    Args:
+        lines: the file, or its lines with their line endings
+        file_format: 'csv' or 'json'
+
+    Yields:
+        the rows of the file
+
+    Raises:
+        ValueError: if the file is malformed
+
+    >>> list(read_rows(['user,date', 'Mudae#0807,27-05'], 'csv'))
+    [ImportRow(line=2, user='Mudae#0807', date='27-05')]
+    >>> list(read_rows(io.StringIO('user,date\\n"Mudae\\n#0807",27-05\\n'), 'csv'))
+    [ImportRow(line=3, user='Mudae\\n#0807', date='27-05')]
+    >>> list(read_rows(['[{"user": 1234, "date": "27 mai"}]'], 'json'))
+    [ImportRow(line=1, user='1234', date='27 mai')]
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        if not reader.fieldnames or not {'user', 'date'} <= set(reader.fieldnames):
+            raise ValueError('the header must name the user and date columns')
+        for record in reader:
+            yield ImportRow(
+                reader.line_num,
+                (record['user'] or '').strip(),
+                (record['date'] or '').strip(),
+            )
+        return
+
+    try:
+        records = json.loads(''.join(lines))
+    except json.JSONDecodeError as error:
+        raise ValueError(f'invalid JSON: {error}') from None
+    if not isinstance(records, list):
+        raise ValueError('the file must hold a list of birthdays')
+    for position, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            record = {}
+        yield ImportRow(
+            position,
+            str(record.get('user', '')).strip(),
+            str(record.get('date', '')).strip(),
+        )
+
+
+class RowWriter(object):
+    """Format birthdays into a file one row at a time, to stream an export.
+
+    >>> writer = RowWriter('csv')
+    >>> print(writer.start() + writer.write(ExportRow(1234, 'Mudae#0807', '27-05')) + writer.end())
+    user,name,date
+    1234,Mudae#0807,27-05
+    <BLANKLINE>
+    >>> writer = RowWriter('json')
+    >>> print(writer.start() + writer.write(ExportRow(1234, 'Mudae', '27-05')) + writer.end())
+    [
+    {"user": 1234, "name": "Mudae", "date": "27-05"}
+    ]
+    <BLANKLINE>
+    """
+
+    def __init__(self, file_format: str) -> None:
+        """Initialise the writer before the first row.
+
+        Args:
+            file_format: 'csv' or 'json'
+        """
+        self.file_format = file_format
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer, lineterminator='\n')
+        self._separator = '\n'
+
+    def start(self) -> str:
+        """Begin the file.
+
+        Returns:
+            the CSV header or the opening of the JSON list
+        """
+        if self.file_format == 'csv':
+            return self._csv_line(FIELDS)
+        return '['
+
+    def write(self, row: ExportRow) -> str:
+        """Format a birthday.
+
+        Args:
+            row: the birthday
+
+        Returns:
+            the part of the file holding the birthday
+        """
+        if self.file_format == 'csv':
+            return self._csv_line(row)
+        chunk = self._separator + json.dumps(row._asdict(), ensure_ascii=False)
+        self._separator = ',\n'
+        return chunk
+
+    def end(self) -> str:
+        """Finish the file.
+
+        Returns:
+            the closing of the JSON list, nothing for CSV
+        """
+        if self.file_format == 'csv':
+            return ''
+        return '\n]\n'
+
+    def _csv_line(self, fields: Iterable[object]) -> str:
+        """Format a CSV line.
+
+        Args:
+            fields: the values of the columns
+
+        Returns:
+            the line, quoted as needed
+        """
+        self._csv.writerow(fields)
+        line = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return line
+
+
+def export_date(birthday: str) -> str:
+    """Convert a date of the database to the 'dd-mm' form of the files.
+
+    Args:
+        birthday: the date in the database format
+
+    Returns:
+        the day and the month
+
+    >>> export_date('1964-05-27')
+    '27-05'
+    """
+    _, month, day = birthday.split('-')
+    return f'{day}-{month}'
@@ -1,18 +1,27 @@
 """Functions to manage the birthday functionalities in the database."""
 
+import calendar
 import datetime
 import logging
+import re
 import sqlite3
+import unicodedata
 from contextlib import AbstractContextManager
-from typing import Any, Callable, NamedTuple
-
-from dateutil.parser import ParserError
-from dateutil.parser import parse as parse_date
+from typing import Any, Callable, Iterable, NamedTuple
 
 log = logging.getLogger(__name__)
 
 # https://www.tutorialspoint.com/How-to-store-and-retrieve-date-into-Sqlite3-database-using-Python
 
+# Milliseconds to wait for the other process to release its lock
+BUSY_TIMEOUT = 5000
+# Kibibytes of pages kept in memory by each connection
+CACHE_SIZE = 1024
+# Rows read at once when streaming the birthdays
+FETCH_SIZE = 100
+# Version of the database schema, stored as its user_version
+SCHEMA_VERSION = 1
+
 MONTHS = (
     'janvier',
     'février',
@@ -27,6 +36,54 @@ MONTHS = (
     'novembre',
     'décembre',
 )
+# Usual abbreviations of the months, without accents
+MONTH_ABBREVIATIONS = {
+    'janv': 1,
+    'fev': 2,
+    'fevr': 2,
+    'avr': 4,
+    'juil': 7,
+    'aou': 8,
+    'sept': 9,
+    'oct': 10,
+    'nov': 11,
+    'dec': 12,
+}
+# Days of each month in 1964, the leap year in which birthdays are stored
+DAYS_IN_MONTH = tuple(calendar.monthrange(1964, month)[1] for month in range(1, 13))
+
+_SEPARATOR = r'(?:\s*[-/.]\s*|\s+)'
+# A day followed by a month number or name, and maybe by a year
+DATE_RE = re.compile(
+    rf'\s*(\d{{1,2}})(?:er)?{_SEPARATOR}(\d{{1,2}}|[^\W\d_]+\.?)(?:{_SEPARATOR}(\d{{4}}))?\s*',
+)
+# A date in the ISO format
+ISO_RE = re.compile(r'\s*(\d{4})-(\d{2})-(\d{2})\s*')
+
+
+def fold(text: str) -> str:
+    """Lower a text and remove its accents, to compare names loosely.
+
+    Args:
+        text: the text
+
+    Returns:
+        the text in lowercase ASCII
+
+    >>> fold('FéVriEr')
+    'fevrier'
+    """
+    text = text.casefold()
+    if text.isascii():
+        return text
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+
+
+# Number of each month from its folded name or abbreviation
+MONTH_NUMBERS = {
+    **{fold(name): number for number, name in enumerate(MONTHS, start=1)},
+    **MONTH_ABBREVIATIONS,
+}
 
 
 def get_month(number: int) -> str | None:
@@ -59,16 +116,13 @@ def get_month_number(month: str) -> int | None:
         the number of the month starting with 1 for January
         or None if the name is incorrect
 
-    >>> get_month_number('FéVriEr')
-    2
+    >>> get_month_number('FéVriEr'), get_month_number('fevr.')
+    (2, 2)
 
     >>> get_month_number('')
     >>> get_month_number('may')
     """
-    try:
-        return MONTHS.index(month.lower()) + 1
-    except ValueError:
-        return None
+    return MONTH_NUMBERS.get(fold(month).removesuffix('.'))
 
 
 class Birthday(NamedTuple):
@@ -97,7 +151,13 @@ class Birthday(NamedTuple):
 
 
 class DbContextManager(AbstractContextManager[Any]):
-    """Generic context manager for a sqlite3 connection."""
+    """Generic context manager for a long-running sqlite3 connection.
+
+    The connection is opened on the first `with` block and kept open, each
+    block being a transaction committed or rolled back on exit. The database
+    is in WAL mode so that the bot and the announce script can read and write
+    it at the same time, waiting for each other's lock up to BUSY_TIMEOUT.
+    """
 
     def __init__(self, database: str):
         """Set the database path.
@@ -108,17 +168,33 @@ class DbContextManager(AbstractContextManager[Any]):
         self.database = database
         self.conn: sqlite3.Connection | None = None
 
+    def connect(self) -> sqlite3.Connection:
+        """Open the connection if needed and tune it.
+
+        Returns:
+            the open connection
+        """
+        if self.conn is None:
+            self.conn = sqlite3.connect(
+                self.database, timeout=BUSY_TIMEOUT / 1000,
+            )
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE}')
+            self.conn.execute('PRAGMA temp_store=MEMORY')
+        return self.conn
+
     def __enter__(self) -> Any:
-        """Initialize the connection.
+        """Make sure the connection is open.
 
         Returns:
             the DateDb object with an open connection
         """
-        self.conn = sqlite3.connect(self.database)
+        self.connect()
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        """Commit and close the connection.
+        """Commit or roll back the changes, keeping the connection open.
 
         Args:
             exc_type: type of the exception raised if any
@@ -134,10 +210,15 @@ class DbContextManager(AbstractContextManager[Any]):
                 stack_info=True,
             )
             self.conn.rollback()
-        else:
+        elif self.conn.in_transaction:
             log.info('Committing changes')
             self.conn.commit()
-        self.conn.close()
+
+    def close(self) -> None:
+        """Close the connection, it is opened again by the next block."""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
 
 
 class DateDb(DbContextManager):
@@ -146,7 +227,10 @@ class DateDb(DbContextManager):
     no_connection_error = 'No active DB connection.'
 
     def init_birthday_db(self) -> None:
-        """Initialize the database meant to gather birthday dates."""
+        """Initialize the database meant to gather birthday dates.
+
+        Databases of an older schema version are migrated.
+        """
         if not self.conn:
             log.warning(self.no_connection_error)
             return
@@ -157,17 +241,53 @@ class DateDb(DbContextManager):
         request = """
         CREATE TABLE IF NOT EXISTS birthday_table (
             user INTEGER PRIMARY KEY,
-            birthday TEXT
+            birthday TEXT,
+            month_day INTEGER
+        )
+        """
+        cursor.execute(request)
+
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version < 1:
+            self._add_month_day(cursor)
+
+        request = """
+        CREATE TABLE IF NOT EXISTS settings_table (
+            key TEXT PRIMARY KEY,
+            value TEXT
         )
         """
         cursor.execute(request)
+        cursor.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def _add_month_day(self, cursor: sqlite3.Cursor) -> None:
+        """Migrate to the schema 1, indexing the birthdays by month and day.
+
+        Args:
+            cursor: a cursor of the connection
+        """
+        log.info('Migrating the birthday database to the schema version 1')
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(birthday_table)')}
+        if 'month_day' not in columns:
+            cursor.execute('ALTER TABLE birthday_table ADD COLUMN month_day INTEGER')
+        request = """
+        UPDATE birthday_table SET month_day =
+            CAST(substr(birthday, 6, 2) AS INTEGER) * 100
+            + CAST(substr(birthday, 9, 2) AS INTEGER)
+        """
+        cursor.execute(request)
+        request = """
+        CREATE INDEX IF NOT EXISTS birthday_month_day
+        ON birthday_table (month_day)
+        """
+        cursor.execute(request)
 
     def update_birthday(self, user: int, birthday: str) -> None:
         """Add or modify the birthday of the wanted user.
 
         Args:
             user: discord identifier of the user
-            birthday: birthday date of the user ('dd-mm')
+            birthday: birthday date of the user ('1964-mm-dd')
         """
         if not self.conn:
             log.warning(self.no_connection_error)
@@ -177,8 +297,9 @@ class DateDb(DbContextManager):
 
         # Update birthday for specified user
         request = """INSERT OR REPLACE INTO birthday_table
-                    (user, birthday) VALUES (?,?)"""
-        cursor.execute(request, (user, birthday))
+                    (user, birthday, month_day) VALUES (?,?,?)"""
+        date = datetime.date.fromisoformat(birthday)
+        cursor.execute(request, (user, birthday, month_day(date)))
 
     def remove_birthday(self, user: int) -> None:
         """Remove the birthday of the wanted user.
@@ -216,12 +337,64 @@ class DateDb(DbContextManager):
 
         # Get the list of birthdays
         request = """
-            SELECT user FROM birthday_table WHERE birthday=?
+            SELECT user FROM birthday_table WHERE month_day=?
         """
-        cursor.execute(request, (date.isoformat(),))
+        cursor.execute(request, (month_day(date),))
 
         return [user_record[0] for user_record in cursor]
 
+    def get_birthdays_between(
+        self,
+        start: datetime.date,
+        end: datetime.date,
+    ) -> list[Birthday]:
+        """Get the birthdays celebrated between two dates, both included.
+
+        The range may wrap around the end of the year. Those born on the 29
+        of february celebrate on the 28 in the other years.
+
+        Args:
+            start: the first day
+            end: the last day
+
+        Returns:
+            the birthdays in the order they are celebrated
+        """
+        if not self.conn:
+            log.warning(self.no_connection_error)
+            return []
+        if end < start:
+            return []
+
+        cursor = self.conn.cursor()
+
+        first, last = month_day(start), month_day(end)
+        if end.month == 2 and end.day == 28 and not calendar.isleap(end.year):
+            last = month_day(datetime.date(1964, 2, 29))
+
+        if (end - start).days >= 365:
+            request = """
+            SELECT user, birthday FROM birthday_table
+            ORDER BY month_day < ?, month_day
+            """
+            cursor.execute(request, (first,))
+        elif first <= last:
+            request = """
+            SELECT user, birthday FROM birthday_table
+            WHERE month_day BETWEEN ? AND ?
+            ORDER BY month_day
+            """
+            cursor.execute(request, (first, last))
+        else:
+            request = """
+            SELECT user, birthday FROM birthday_table
+            WHERE month_day >= ? OR month_day <= ?
+            ORDER BY month_day < ?, month_day
+            """
+            cursor.execute(request, (first, last, first))
+
+        return [Birthday(*record) for record in cursor]
+
     def get_all_birthdays(self) -> list[Birthday]:
         """Get all the birthdays.
 
@@ -237,12 +410,118 @@ class DateDb(DbContextManager):
         # Get the list of users
         request = """
         SELECT user, birthday FROM birthday_table
-        ORDER BY birthday
+        ORDER BY month_day
         """
         cursor.execute(request)
 
         return [Birthday(*record) for record in cursor]
 
+    def get_birthdays_after(
+        self,
+        after: Birthday | None,
+        limit: int = FETCH_SIZE,
+    ) -> list[Birthday]:
+        """Get a page of the birthdays, in the order of the year.
+
+        The pages are read in separate transactions, each one starting after
+        the last birthday of the previous page.
+
+        Args:
+            after: the last birthday of the previous page, None for the first
+            limit: the number of birthdays of the page
+
+        Returns:
+            the birthdays, by day then by user
+        """
+        if not self.conn:
+            log.warning(self.no_connection_error)
+            return []
+
+        first = (0, 0)
+        if after is not None:
+            first = (month_day(datetime.date.fromisoformat(after.birthday)), after.user_id)
+
+        cursor = self.conn.cursor()
+        request = """
+        SELECT user, birthday FROM birthday_table
+        WHERE (month_day, user) > (?, ?)
+        ORDER BY month_day, user
+        LIMIT ?
+        """
+        cursor.execute(request, (*first, limit))
+
+        return [Birthday(*record) for record in cursor]
+
+    def update_birthdays(self, birthdays: Iterable[tuple[int, str]]) -> int:
+        """Add or modify many birthdays at once.
+
+        Args:
+            birthdays: couples of discord identifier and birthday date
+                ('1964-mm-dd')
+
+        Returns:
+            the number of birthdays written
+        """
+        if not self.conn:
+            log.warning(self.no_connection_error)
+            return 0
+
+        cursor = self.conn.cursor()
+        request = """INSERT OR REPLACE INTO birthday_table
+                    (user, birthday, month_day) VALUES (?,?,?)"""
+        cursor.executemany(request, (
+            (user, birthday, month_day(datetime.date.fromisoformat(birthday)))
+            for user, birthday in birthdays
+        ))
+        return cursor.rowcount
+
+    def get_last_announce(self) -> datetime.date | None:
+        """Get the last day whose birthdays were announced.
+
+        Returns:
+            the day, or None if no announce was made yet
+        """
+        if not self.conn:
+            log.warning(self.no_connection_error)
+            return None
+
+        cursor = self.conn.cursor()
+        request = """
+        SELECT value FROM settings_table WHERE key='last_announce'
+        """
+        record = cursor.execute(request).fetchone()
+        return datetime.date.fromisoformat(record[0]) if record else None
+
+    def set_last_announce(self, date: datetime.date) -> None:
+        """Remember the last day whose birthdays were announced.
+
+        Args:
+            date: the day
+        """
+        if not self.conn:
+            log.warning(self.no_connection_error)
+            return
+
+        cursor = self.conn.cursor()
+        request = """INSERT OR REPLACE INTO settings_table
+                    (key, value) VALUES ('last_announce', ?)"""
+        cursor.execute(request, (date.isoformat(),))
+
+
+def month_day(date: datetime.date) -> int:
+    """Compute the sortable month and day of a date, as stored in the database.
+
+    Args:
+        date: the date
+
+    Returns:
+        the month times a hundred plus the day
+
+    >>> month_day(datetime.date(1964, 2, 29))
+    229
+    """
+    return date.month * 100 + date.day
+
 
 def display_db_date(date_db: str) -> str:
     """Convert db_date to be nicely displayed.
@@ -265,11 +544,16 @@ def display_db_date(date_db: str) -> str:
 def date_parser(date_input: str) -> str | None:
     """Test if input is a valid birthday date.
 
+    The day comes first, followed by the number, the French name or the
+    abbreviation of the month, in any case and with or without accents. A
+    year may follow, or the date may be in the ISO format, the year being
+    only used to check the 29 of february.
+
     Args:
         date_input: the input to be tested as a date
 
     Returns:
-        date as 'day-month' if input is valid, None otherwise
+        date as '1964-mm-dd' if input is valid, None otherwise
 
     >>> date_parser('27-05')
     '1964-05-27'
@@ -282,17 +566,25 @@ def date_parser(date_input: str) -> str | None:
     >>> date_parser('   27      05  ')
     '1964-05-27'
     >>> date_parser('')
+    >>> date_parser('1er Fevr.'), date_parser('29/02/1992'), date_parser('1992-08-15')
+    ('1964-02-01', '1964-02-29', '1964-08-15')
+    >>> date_parser('31 avril'), date_parser('29-02-1990'), date_parser('27 may')
+    (None, None, None)
+    >>> date_parser('1 ²')
     """
-    if not date_input:
+    match = DATE_RE.fullmatch(date_input)
+    if match:
+        day, month_name, year = match.groups()
+        month = int(month_name) if month_name.isdecimal() else get_month_number(month_name)
+    else:
+        match = ISO_RE.fullmatch(date_input)
+        if not match:
+            return None
+        year, month_name, day = match.groups()
+        month = int(month_name)
+
+    if not month or not 1 <= month <= 12 or not 1 <= int(day) <= DAYS_IN_MONTH[month - 1]:
         return None
-
-    # 1964 is a leap year, so it will allow the 29 of february
-    date_input = f'{date_input}-1964'
-    date_input = date_input.replace('-', ' ').split(' ')
-    # Month in full letter handling
-    date_input = [str(get_month_number(elem) or elem) for elem in date_input]
-    try:
-        date = parse_date(' '.join(date_input), dayfirst=True, yearfirst=False)
-    except (ParserError, OverflowError):
+    if year and (month, int(day)) == (2, 29) and not calendar.isleap(int(year)):
         return None
-    return date.date().isoformat()
+    return f'1964-{month:02}-{int(day):02}'
@@ -0,0 +1,328 @@
+"""Awaitable birthday database, queried on a worker thread."""
+
+import asyncio
+import datetime
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterable, NamedTuple, TypeVar
+
+from lib.birthday_lib import FETCH_SIZE, Birthday, DateDb
+
+log = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Default seconds after which a query is abandoned, above the lock timeout
+TIMEOUT = 10
+# Default number of writes committed in the same transaction
+MAX_BATCH = 500
+
+
+class Write(NamedTuple):
+    """A write waiting for the worker.
+
+    Attributes:
+        method: the DateDb method to call
+        args: its arguments
+        future: where the result is given back
+    """
+
+    method: Callable[..., Any]
+    args: tuple[Any, ...]
+    future: Future[Any]
+
+
+class BirthdayRepository(object):
+    """Birthday database used from the event loop without blocking it.
+
+    Every query runs on a single worker thread owning the connection, so a
+    slow disk or a lock held by the announce script only delays the callers
+    of the repository. The methods are the ones of DateDb, awaited. The
+    writes queued while the worker is busy are committed together in one
+    transaction, and retried one by one if it fails so that only the faulty
+    write fails. A call gives up after `timeout` seconds: a write abandoned
+    before the worker took it is not done, but one the worker already took
+    is still committed. The `on_commit` callback of a write runs on the
+    event loop once it is committed, even after its caller gave up.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        timeout: float = TIMEOUT,
+        max_batch: int = MAX_BATCH,
+    ) -> None:
+        """Initialise the worker, the connection being opened by the first query.
+
+        Args:
+            database: path to the database
+            timeout: seconds after which a query is abandoned
+            max_batch: number of writes committed in the same transaction
+        """
+        self.database = DateDb(database)
+        self.timeout = timeout
+        self.max_batch = max_batch
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='birthday-db',
+        )
+        self._writes: list[Write] = []
+        self._flush_queued = False
+        self._lock = threading.Lock()
+
+    async def init_birthday_db(self) -> None:
+        """Create or migrate the tables."""
+        await self._write(DateDb.init_birthday_db)
+
+    async def update_birthday(
+        self,
+        user: int,
+        birthday: str,
+        on_commit: Callable[[], None] | None = None,
+    ) -> None:
+        """Add or modify the birthday of the wanted user.
+
+        Args:
+            user: discord identifier of the user
+            birthday: birthday date of the user ('1964-mm-dd')
+            on_commit: called on the event loop once the birthday is written
+        """
+        await self._write(DateDb.update_birthday, user, birthday, on_commit=on_commit)
+
+    async def update_birthdays(
+        self,
+        birthdays: Iterable[tuple[int, str]],
+        on_commit: Callable[[], None] | None = None,
+    ) -> int:
+        """Add or modify many birthdays at once.
+
+        Args:
+            birthdays: couples of discord identifier and birthday date
+                ('1964-mm-dd')
+            on_commit: called on the event loop once the birthdays are written
+
+        Returns:
+            the number of birthdays written
+        """
+        return await self._write(
+            DateDb.update_birthdays, list(birthdays), on_commit=on_commit,
+        )
+
+    async def remove_birthday(
+        self,
+        user: int,
+        on_commit: Callable[[], None] | None = None,
+    ) -> None:
+        """Remove the birthday of the wanted user.
+
+        Args:
+            user: discord identifier of the user
+            on_commit: called on the event loop once the birthday is removed
+        """
+        await self._write(DateDb.remove_birthday, user, on_commit=on_commit)
+
+    async def set_last_announce(self, date: datetime.date) -> None:
+        """Remember the last day whose birthdays were announced.
+
+        Args:
+            date: the day
+        """
+        await self._write(DateDb.set_last_announce, date)
+
+    async def get_birthdays(self, date: datetime.date) -> list[int]:
+        """Get the users whose birthdays are on given date.
+
+        Args:
+            date: the date on which we want to know who were born
+
+        Returns:
+            the list of users who were born on date
+        """
+        return await self._read(DateDb.get_birthdays, date)
+
+    async def get_birthdays_between(
+        self,
+        start: datetime.date,
+        end: datetime.date,
+    ) -> list[Birthday]:
+        """Get the birthdays celebrated between two dates, both included.
+
+        Args:
+            start: the first day
+            end: the last day
+
+        Returns:
+            the birthdays in the order they are celebrated
+        """
+        return await self._read(DateDb.get_birthdays_between, start, end)
+
+    async def get_all_birthdays(self) -> list[Birthday]:
+        """Get all the birthdays.
+
+        Returns:
+            the birthdays, in the order of the year
+        """
+        return await self._read(DateDb.get_all_birthdays)
+
+    async def get_last_announce(self) -> datetime.date | None:
+        """Get the last day whose birthdays were announced.
+
+        Returns:
+            the day, or None if no announce was made yet
+        """
+        return await self._read(DateDb.get_last_announce)
+
+    async def iter_birthdays(self) -> AsyncIterator[Birthday]:
+        """Stream all the birthdays, reading FETCH_SIZE of them at a time.
+
+        Each page is read in its own transaction, so the writes committed
+        meanwhile never happen in the middle of a read.
+
+        Yields:
+            the birthdays, in the order of the year
+        """
+        last = None
+        while records := await self._read(DateDb.get_birthdays_after, last, FETCH_SIZE):
+            for record in records:
+                yield record
+            last = records[-1]
+
+    async def close(self) -> None:
+        """Commit the queued writes, then close the connection and the worker."""
+        await self._call(self._close)
+        self._executor.shutdown(wait=False)
+
+    async def _call(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a function on the worker.
+
+        Args:
+            func: the function
+            args: its arguments
+
+        Returns:
+            the result of the function
+
+        Raises:
+            TimeoutError: if the worker did not answer in time
+        """
+        future = self._executor.submit(func, *args)
+        return await self._wait(future)
+
+    async def _read(self, method: Callable[..., T], *args: Any) -> T:
+        """Run a DateDb method in its own transaction on the worker.
+
+        Args:
+            method: the DateDb method
+            args: its arguments
+
+        Returns:
+            the result of the method
+        """
+        return await self._call(self._transaction, method, args)
+
+    async def _write(
+        self,
+        method: Callable[..., T],
+        *args: Any,
+        on_commit: Callable[[], None] | None = None,
+    ) -> T:
+        """Queue a DateDb method to be committed with the other writes.
+
+        Args:
+            method: the DateDb method
+            args: its arguments
+            on_commit: called on the event loop once the write is committed,
+                before the caller resumes
+
+        Returns:
+            the result of the method
+        """
+        future: Future[T] = Future()
+        if on_commit is not None:
+            loop = asyncio.get_running_loop()
+
+            def committed(done: Future[T]) -> None:  # noqa: WPS430
+                if done.cancelled() or done.exception() is not None:
+                    return
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(on_commit)
+
+            future.add_done_callback(committed)
+        with self._lock:
+            self._writes.append(Write(method, args, future))
+            if not self._flush_queued:
+                self._flush_queued = True
+                self._executor.submit(self._flush)
+        return await self._wait(future)
+
+    async def _wait(self, future: Future[T]) -> T:
+        """Wait for a result of the worker.
+
+        Args:
+            future: the result to come
+
+        Returns:
+            the result
+
+        Raises:
+            TimeoutError: if the worker did not answer in time
+        """
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            log.warning(f'The birthday database did not answer within {self.timeout}s')
+            raise
+
+    def _transaction(self, method: Callable[..., T], args: tuple[Any, ...]) -> T:
+        """Call a DateDb method in a transaction, on the worker.
+
+        Args:
+            method: the DateDb method
+            args: its arguments
+
+        Returns:
+            the result of the method
+        """
+        with self.database as database:
+            return method(database, *args)
+
+    def _close(self) -> None:
+        """Commit the writes still queued and close the connection, on the worker."""
+        self._flush()
+        self.database.close()
+
+    def _flush(self) -> None:
+        """Commit the queued writes by batches, on the worker."""
+        while True:
+            with self._lock:
+                batch = self._writes[:self.max_batch]
+                del self._writes[:self.max_batch]
+                if not batch:
+                    self._flush_queued = False
+                    return
+            # The writes abandoned by their callers are dropped
+            self._commit([
+                write for write in batch if write.future.set_running_or_notify_cancel()
+            ])
+
+    def _commit(self, batch: list[Write]) -> None:
+        """Commit writes in one transaction, one by one if it fails.
+
+        Args:
+            batch: the writes, already marked as running
+        """
+        if not batch:
+            return
+        try:
+            with self.database as database:
+                results = [write.method(database, *write.args) for write in batch]
+        except Exception as error:
+            if len(batch) == 1:
+                batch[0].future.set_exception(error)
+                return
+            log.warning(f'A batch of {len(batch)} writes failed, retrying them one by one')
+            for write in batch:
+                self._commit([write])
+            return
+        for write, result in zip(batch, results):
+            write.future.set_result(result)
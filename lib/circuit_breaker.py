@@ -0,0 +1,139 @@
+"""Circuit breaker stopping calls to a failing service until it recovers."""
+
+import asyncio
+import logging
+import time
+from enum import Enum
+from typing import Any, Awaitable, Callable
+
+log = logging.getLogger(__name__)
+
+# Default number of consecutive failures opening the circuit
+FAILURE_THRESHOLD = 5
+# Default seconds before the first probe of an open circuit
+RESET_TIMEOUT = 30
+# Maximum seconds between two probes of an open circuit
+MAX_RESET_TIMEOUT = 600
+
+
+class CircuitState(Enum):
+    """State of a circuit breaker."""
+
+    CLOSED = 'fermé'
+    OPEN = 'ouvert'
+    HALF_OPEN = 'semi-ouvert'
+
+
+class CircuitBreaker(object):
+    """Track the health of a service and fail fast while it is down.
+
+    The circuit opens after `failure_threshold` consecutive failures. While
+    it is open, `allow` refuses every call and a background task probes the
+    service after `reset_timeout` seconds: the circuit is half-open during
+    the probe, then closed if it succeeded or opened again for twice as
+    long if it failed.
+
+    >>> breaker = CircuitBreaker('demo', failure_threshold=2)
+    >>> breaker.record_failure()
+    >>> breaker.allow()
+    True
+    >>> breaker.record_failure()
+    >>> breaker.state, breaker.allow()
+    (<CircuitState.OPEN: 'ouvert'>, False)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+        probe: Callable[[], Awaitable[Any]] | None = None,
+    ) -> None:
+        """Initialise a closed circuit.
+
+        Args:
+            name: name of the protected service
+            failure_threshold: consecutive failures opening the circuit
+            reset_timeout: seconds before the first probe of an open circuit
+            probe: coroutine function raising if the service is still down,
+                the circuit stays open until closed by hand if None
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._timeout = reset_timeout
+        self._probe_task: asyncio.Task[None] | None = None
+
+    def allow(self) -> bool:
+        """Tell if a call to the service may be made.
+
+        Returns:
+            true if the circuit is closed
+        """
+        return self.state is CircuitState.CLOSED
+
+    def record_success(self) -> None:
+        """Remember that a call succeeded."""
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """Remember that a call failed, opening the circuit if needed."""
+        self.failures += 1
+        if self.state is CircuitState.CLOSED and self.failures >= self.failure_threshold:
+            self._open()
+
+    def close(self) -> None:
+        """Close the circuit and let the calls through again."""
+        if self.state is not CircuitState.CLOSED:
+            log.info(f'Circuit {self.name} closed')
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._timeout = self.reset_timeout
+
+    def _open(self) -> None:
+        """Open the circuit and schedule its probe."""
+        log.warning(
+            f'Circuit {self.name} opened for {self._timeout}s '
+            f'after {self.failures} failures',
+        )
+        self.state = CircuitState.OPEN
+        self.opened_at = time.monotonic()
+        if self.probe is not None:
+            self._probe_task = asyncio.get_running_loop().create_task(
+                self._probe_later(),
+            )
+
+    async def _probe_later(self) -> None:
+        """Wait for the reset timeout then probe the service."""
+        await asyncio.sleep(self._timeout)
+        self.state = CircuitState.HALF_OPEN
+        try:
+            await self.probe()  # type: ignore
+        except Exception as error:
+            log.info(f'Circuit {self.name} probe failed: {error}')
+            self._timeout = min(self._timeout * 2, MAX_RESET_TIMEOUT)
+            self._open()
+        else:
+            self.close()
+
+    def describe(self) -> str:
+        """Describe the state of the circuit.
+
+        Returns:
+            a human readable state, in French like the bot's messages
+        """
+        if self.opened_at is None:
+            return self.state.value
+        elapsed = int(time.monotonic() - self.opened_at)
+        return f'{self.state.value} depuis {elapsed}s'
+
+    def cancel(self) -> None:
+        """Stop probing the service."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
@@ -0,0 +1,189 @@
+"""Send private messages without resolving the users and channels each time."""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any
+
+import discord
+
+from lib.backoff import backoff_delay
+
+log = logging.getLogger(__name__)
+
+# Default number of private channels kept
+MAX_CHANNELS = 256
+# Default seconds during which the messages to a user are gathered
+BATCH_WINDOW = 0.5
+# Default new attempts after a transient failure
+RETRIES = 2
+# Characters allowed in a Discord message
+MAX_LENGTH = 2000
+# Separator of the messages sent together
+SEPARATOR = '\n\n'
+
+User = discord.User | discord.Member | int
+
+
+def pack(texts: list[str], max_length: int = MAX_LENGTH) -> list[str]:
+    """Join messages into as few Discord messages as possible.
+
+    Args:
+        texts: the messages, in order
+        max_length: characters allowed in a Discord message
+
+    Returns:
+        the messages to send, each one cut if too long
+
+    >>> pack(['a', 'b', 'c' * 4], max_length=5)
+    ['a\\n\\nb', 'cccc']
+    >>> pack(['abcdefg'], max_length=5)
+    ['abcde', 'fg']
+    """
+    packed: list[str] = []
+    for text in texts:
+        if packed and len(packed[-1]) + len(SEPARATOR) + len(text) <= max_length:
+            packed[-1] = f'{packed[-1]}{SEPARATOR}{text}'
+            continue
+        packed.extend(
+            text[start:start + max_length]
+            for start in range(0, len(text), max_length)
+        )
+    return packed
+
+
+def is_transient(error: discord.HTTPException) -> bool:
+    """Tell if a failed request may succeed later.
+
+    Args:
+        error: the error raised by Discord
+
+    Returns:
+        true for rate limits and server errors
+    """
+    return error.status == 429 or error.status >= 500
+
+
+class DirectMessages(object):
+    """Private message delivery shared by the bot's features.
+
+    The private channels are kept in a least recently used cache, and the
+    users are looked up in the bot's cache before asking Discord. Messages
+    sent to the same user within `batch_window` seconds are delivered
+    together, and transient HTTP errors are retried with backoff.
+    """
+
+    def __init__(
+        self,
+        bot: Any,
+        max_channels: int = MAX_CHANNELS,
+        batch_window: float = BATCH_WINDOW,
+        retries: int = RETRIES,
+    ) -> None:
+        """Initialise the service with empty caches.
+
+        Args:
+            bot: the bot sending the messages
+            max_channels: number of private channels kept
+            batch_window: seconds during which the messages are gathered
+            retries: new attempts after a transient failure
+        """
+        self.bot = bot
+        self.max_channels = max_channels
+        self.batch_window = batch_window
+        self.retries = retries
+        self._channels: OrderedDict[int, discord.DMChannel] = OrderedDict()
+        self._pending: dict[int, list[str]] = {}
+        self._flights: dict[int, asyncio.Task[bool]] = {}
+
+    async def send(self, user: User, text: str) -> bool:
+        """Send a private message, gathered with the others to the same user.
+
+        Args:
+            user: the recipient, or their id
+            text: the message
+
+        Returns:
+            true if the message was delivered
+        """
+        user_id = user if isinstance(user, int) else user.id
+        self._pending.setdefault(user_id, []).append(text)
+        flight = self._flights.get(user_id)
+        if flight is None:
+            flight = asyncio.create_task(self._deliver(user, user_id))
+            self._flights[user_id] = flight
+        return await asyncio.shield(flight)
+
+    async def _deliver(self, user: User, user_id: int) -> bool:
+        """Send the messages gathered for a user once the window is over.
+
+        Args:
+            user: the recipient, or their id
+            user_id: the id of the recipient
+
+        Returns:
+            true if every message was delivered
+        """
+        try:
+            await asyncio.sleep(self.batch_window)
+        finally:
+            del self._flights[user_id]
+            texts = self._pending.pop(user_id)
+        try:
+            channel = await self._channel(user)
+            for content in pack(texts):
+                await self._retry(channel.send, content)
+        except discord.HTTPException as error:
+            log.warning(f'Could not send a private message to {user_id}: {error}')
+            self._channels.pop(user_id, None)
+            return False
+        return True
+
+    async def _channel(self, user: User) -> discord.DMChannel:
+        """Get the private channel of a user, from the caches when possible.
+
+        Args:
+            user: the recipient, or their id
+
+        Returns:
+            the private channel
+        """
+        user_id = user if isinstance(user, int) else user.id
+        channel = self._channels.get(user_id)
+        if channel is None:
+            if isinstance(user, int):
+                user = self.bot.get_user(user_id) or await self._retry(
+                    self.bot.fetch_user, user_id,
+                )
+            channel = user.dm_channel or await self._retry(user.create_dm)
+        self._channels[user_id] = channel
+        self._channels.move_to_end(user_id)
+        while len(self._channels) > self.max_channels:
+            self._channels.popitem(last=False)
+        return channel
+
+    async def _retry(self, func: Any, *args: Any) -> Any:
+        """Call Discord, trying again after transient errors.
+
+        Args:
+            func: the coroutine function calling Discord
+            args: its arguments
+
+        Returns:
+            the result of the call
+
+        Raises:
+            HTTPException: if the last attempt failed or the error is final
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return await func(*args)
+            except discord.HTTPException as error:
+                if attempt == self.retries or not is_transient(error):
+                    raise
+                retry_after = getattr(error, 'retry_after', None)
+                await asyncio.sleep(backoff_delay(attempt, retry_after))
+
+    async def close(self) -> None:
+        """Send the gathered messages before stopping."""
+        await asyncio.gather(*self._flights.values(), return_exceptions=True)
@@ -0,0 +1,111 @@
+"""Route Discord events to the handlers whose preconditions can match."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+Handler = Callable[..., Awaitable[Any]]
+
+CONDITIONS_ATTRIBUTE = 'dispatch_conditions'
+
+
+def when(**conditions: Iterable[Hashable]) -> Callable[[Handler], Handler]:
+    """Declare the preconditions of an event handler.
+
+    Args:
+        conditions: the accepted values of each event attribute,
+            such as `channel=[PRES_CHAN]` or `author=[MUDAE]`
+
+    Returns:
+        a decorator attaching the preconditions to the handler
+    """
+    def decorator(handler: Handler) -> Handler:
+        setattr(handler, CONDITIONS_ATTRIBUTE, {
+            name: frozenset(values) for name, values in conditions.items()
+        })
+        return handler
+    return decorator
+
+
+class Dispatcher(object):
+    """Lookup tables of the handlers of an event, compiled once.
+
+    Handlers are indexed on one event attribute, such as the channel, so
+    that an event only starts the handlers declared for its value plus the
+    ones without any condition on it. Their other preconditions are checked
+    with set lookups before starting them.
+
+    >>> @when(channel=[1], author=['Mudae'])
+    ... async def poke(event): pass
+    >>> async def anywhere(event): pass
+    >>> dispatcher = Dispatcher([poke, anywhere], index='channel')
+    >>> [handler.__name__ for handler in dispatcher.match(channel=1, author='Mudae')]
+    ['poke', 'anywhere']
+    >>> [handler.__name__ for handler in dispatcher.match(channel=1, author='Bob')]
+    ['anywhere']
+    >>> [handler.__name__ for handler in dispatcher.match(channel=2, author='Mudae')]
+    ['anywhere']
+    """
+
+    def __init__(self, handlers: Iterable[Handler], index: str) -> None:
+        """Compile the lookup tables.
+
+        Args:
+            handlers: the event handlers, in calling order
+            index: the event attribute indexing the handlers
+        """
+        self.index = index
+        routes: list[tuple[Handler, frozenset[Hashable] | None, tuple[Any, ...]]] = []
+        for handler in handlers:
+            conditions = dict(getattr(handler, CONDITIONS_ATTRIBUTE, {}))
+            indexed = conditions.pop(index, None)
+            routes.append((handler, indexed, tuple(conditions.items())))
+
+        values = set().union(*(indexed for _, indexed, _ in routes if indexed))
+        self._table = {
+            value: self._compile(
+                route for route in routes if route[1] is None or value in route[1]
+            )
+            for value in values
+        }
+        self._fallback = self._compile(route for route in routes if route[1] is None)
+
+    @staticmethod
+    def _compile(routes: Iterable[tuple[Handler, Any, tuple[Any, ...]]]) -> tuple[Any, ...]:
+        """Keep the handler and other conditions of each route.
+
+        Args:
+            routes: the routes matching an indexed value
+
+        Returns:
+            (handler, other conditions) couples
+        """
+        return tuple((handler, conditions) for handler, _, conditions in routes)
+
+    def match(self, **event: Hashable) -> list[Handler]:
+        """Get the handlers whose preconditions match an event.
+
+        Args:
+            event: the value of each event attribute
+
+        Returns:
+            the handlers to call, in order
+        """
+        candidates = self._table.get(event[self.index], self._fallback)
+        return [
+            handler
+            for handler, conditions in candidates
+            if all(event[name] in values for name, values in conditions)
+        ]
+
+    async def dispatch(self, args: tuple[Any, ...], **event: Hashable) -> None:
+        """Run the handlers matching an event concurrently.
+
+        Args:
+            args: the arguments of the handlers
+            event: the value of each event attribute
+        """
+        handlers = self.match(**event)
+        if len(handlers) == 1:
+            await handlers[0](*args)
+        elif handlers:
+            await asyncio.gather(*(handler(*args) for handler in handlers))
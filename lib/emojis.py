@@ -0,0 +1,120 @@
+"""Registry of the custom emojis used by the bot."""
+
+import logging
+from typing import Iterable, Sequence
+
+import discord
+
+log = logging.getLogger(__name__)
+
+Reaction = discord.Emoji | str
+
+
+class EmojiRegistry(object):
+    """Custom emojis from the configuration, resolved once.
+
+    The emojis listed in the `emoji_IDs` configuration table are looked up
+    among the emojis the bot can see when it connects, then kept up to date
+    from the guild emoji updates. Reaction pools mixing unicode and custom
+    emojis are prebuilt as tuples, skipping the emojis that are not found.
+    """
+
+    def __init__(self, emoji_ids: dict[str, int]) -> None:
+        """Initialise an empty registry.
+
+        Args:
+            emoji_ids: the emoji identifiers, by configuration name
+        """
+        self.emoji_ids = emoji_ids
+        self._wanted = set(emoji_ids.values())
+        self.by_id: dict[int, discord.Emoji] = {}
+        self.by_name: dict[str, discord.Emoji] = {}
+        self._pool_specs: dict[str, tuple[Sequence[str], Sequence[str]]] = {}
+        self._pools: dict[str, tuple[Reaction, ...]] = {}
+
+    def get(self, key: str) -> discord.Emoji | None:
+        """Get a custom emoji from its configuration name.
+
+        Args:
+            key: the name of the emoji in the `emoji_IDs` table
+
+        Returns:
+            the emoji, or None if the bot cannot see it
+        """
+        return self.by_id.get(self.emoji_ids.get(key, 0))
+
+    def register_pool(
+        self,
+        name: str,
+        unicode_emojis: Sequence[str],
+        custom_keys: Sequence[str],
+    ) -> None:
+        """Define a pool of reactions.
+
+        Args:
+            name: the name of the pool
+            unicode_emojis: the unicode emojis of the pool
+            custom_keys: configuration names of the custom emojis of the pool
+        """
+        self._pool_specs[name] = (unicode_emojis, custom_keys)
+        self._build_pool(name)
+
+    def pool(self, name: str) -> tuple[Reaction, ...]:
+        """Get a prebuilt pool of reactions.
+
+        Args:
+            name: the name of the pool
+
+        Returns:
+            the unicode emojis followed by the custom emojis found
+        """
+        return self._pools[name]
+
+    def load(self, emojis: Iterable[discord.Emoji]) -> None:
+        """Resolve the configured emojis among the ones the bot can see.
+
+        Args:
+            emojis: every emoji the bot can use
+        """
+        self.by_id = {emoji.id: emoji for emoji in emojis if emoji.id in self._wanted}
+        self._rebuild()
+        missing = self._wanted - self.by_id.keys()
+        if missing:
+            log.warning(f'Custom emojis not found: {sorted(missing)}')
+
+    def update(
+        self,
+        before: Sequence[discord.Emoji],
+        after: Sequence[discord.Emoji],
+    ) -> None:
+        """Apply the changes of a guild's emojis.
+
+        Args:
+            before: the emojis of the guild before the update
+            after: the emojis of the guild after the update
+        """
+        for emoji in before:
+            self.by_id.pop(emoji.id, None)
+        for emoji in after:
+            if emoji.id in self._wanted:
+                self.by_id[emoji.id] = emoji
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Rebuild the name index and the pools after a change."""
+        self.by_name = {emoji.name: emoji for emoji in self.by_id.values()}
+        for name in self._pool_specs:
+            self._build_pool(name)
+
+    def _build_pool(self, name: str) -> None:
+        """Build a pool from its definition.
+
+        Args:
+            name: the name of the pool
+        """
+        unicode_emojis, custom_keys = self._pool_specs[name]
+        customs = (self.get(key) for key in custom_keys)
+        self._pools[name] = (
+            *unicode_emojis,
+            *(emoji for emoji in customs if emoji is not None),
+        )
@@ -1,12 +1,12 @@
 """Interface to Google translate API."""
 
-import json
-from functools import lru_cache
-from requests import get
+import asyncio
 from operator import add
 from functools import reduce
 from typing import NamedTuple
 
+import aiohttp
+
 translate_table = {
     'af': 'Afrikaans',
     'sq': 'Albanais',
@@ -125,7 +125,47 @@ translate_error_msg = ("Erreur de traduction 😢, veuillez contacter les "
                        "autorités compétentes pour élucider le mystère "
                        "planant derrière cette sombre affaire...")
 
-MAX_CACHE = 5000
+
+class TranslationError(Exception):
+    """Raised when a translation service failed to translate a text.
+
+    Attributes:
+        transient: whether trying again later may succeed
+        retry_after: seconds the service asked us to wait, if any
+        throttled: whether the request was dropped before being sent
+    """
+
+    def __init__(self, message, transient=False, retry_after=None, throttled=False):
+        """Initialise the error.
+
+        Args:
+            message: description of the failure
+            transient: whether trying again later may succeed
+            retry_after: seconds the service asked us to wait, if any
+            throttled: whether the request was dropped before being sent
+        """
+        super().__init__(message)
+        self.transient = transient
+        self.retry_after = retry_after
+        self.throttled = throttled
+
+
+def response_error(response: aiohttp.ClientResponse) -> TranslationError:
+    """Build the error matching a failed HTTP response.
+
+    Args:
+        response: the response whose status is not OK
+
+    Returns:
+        a transient error for rate limiting and server errors,
+        a definitive one otherwise
+    """
+    retry_after = response.headers.get('Retry-After', '')
+    return TranslationError(
+        f'HTTP {response.status} from {response.url.host}',
+        transient=response.status == 429 or response.status >= 500,
+        retry_after=float(retry_after) if retry_after.isdigit() else None,
+    )
 
 
 class Translation(NamedTuple):
@@ -139,18 +179,20 @@ class Translation(NamedTuple):
     lang: str
 
 
-@lru_cache(maxsize=MAX_CACHE)
-def translate(text, dest_lang, src_lang=None):
+async def translate(session: aiohttp.ClientSession, text, dest_lang, src_lang=None):
     """Translate the given text to the given language.
 
     Args:
+        session: the HTTP session whose connection pool is used for the request
         text: the text to translate
         dest_lang: the language to translate into
         src_lang: the text's language, or autodetect if it's None
 
     Returns:
-        Translation or None: A Translation object if the translation succeeded,
-        otherwise None is returned
+        Translation: the translated text and the detected language
+
+    Raises:
+        TranslationError: if the translation failed
     """
     if src_lang is None:
         src_lang = 'auto'
@@ -165,22 +207,72 @@ def translate(text, dest_lang, src_lang=None):
     }
 
     try:
-        response = get(url=base_url, params=params)
-    except Exception:
-        return None
+        async with session.get(base_url, params=params) as response:
+            if not response.ok:
+                raise response_error(response)
+            json_response = await response.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        raise TranslationError(str(error), transient=True) from error
+
+    try:
+        lang = translate_table.get(json_response[2], json_response[2])
+        translated_texts = [sentence[0] for sentence in json_response[0]]
+        msg = reduce(add, [sentence for sentence in translated_texts])
+    except (IndexError, KeyError, TypeError) as error:
+        raise TranslationError(f'Unexpected response: {error!r}') from error
 
-    if not response.ok:
-        return None
+    translation = Translation(msg, lang)
 
-    json_response = json.loads(response.text)
+    return translation
 
-    lang = translate_table[
-        json_response[2]
-    ]
 
-    translated_texts = [sentence[0] for sentence in json_response[0]]
-    msg = reduce(add, [sentence for sentence in translated_texts])
+async def translate_many(session: aiohttp.ClientSession, texts, dest_lang, src_lang=None):
+    """Translate several texts to the given language in a single request.
 
-    translation = Translation(msg, lang)
+    Args:
+        session: the HTTP session whose connection pool is used for the request
+        texts: the texts to translate
+        dest_lang: the language to translate into
+        src_lang: the texts' language, or autodetect if it's None
 
-    return translation
+    Returns:
+        list[Translation]: the translations, in the same order as `texts`
+
+    Raises:
+        TranslationError: if the translation failed
+    """
+    params = {
+        'client': 'gtx',
+        'sl': src_lang or 'auto',
+        'tl': dest_lang,
+    }
+    data = [('q', text) for text in texts]
+    base_url = 'https://translate.googleapis.com/translate_a/t'
+
+    try:
+        async with session.post(base_url, params=params, data=data) as response:
+            if not response.ok:
+                raise response_error(response)
+            json_response = await response.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        raise TranslationError(str(error), transient=True) from error
+
+    # A single autodetected text comes back unwrapped as [msg, lang]
+    if isinstance(json_response, str) or (
+        len(texts) == 1 and src_lang is None and isinstance(json_response[0], str)
+    ):
+        json_response = [json_response]
+    if not isinstance(json_response, list) or len(json_response) != len(texts):
+        raise TranslationError(f'Unexpected response: {json_response!r:.100}')
+
+    translations = []
+    for item in json_response:
+        if isinstance(item, str):
+            msg, code = item, src_lang
+        else:
+            try:
+                msg, code = item[0], item[1]
+            except (IndexError, TypeError) as error:
+                raise TranslationError(f'Unexpected response: {error!r}') from error
+        translations.append(Translation(msg, translate_table.get(code, code)))
+    return translations
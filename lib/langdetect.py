@@ -0,0 +1,208 @@
+"""Offline detection of French texts with a character trigram model.
+
+The model is a naive Bayes classifier between French and other languages:
+every trigram carries the log ratio of its probabilities in both classes, so
+scoring a text is a sum over its trigrams.
+
+Run `python -m lib.langdetect build` to rebuild the model from the training
+corpus. Its accuracy against the sample corpus is checked by the tests.
+"""
+
+import json
+import math
+import sys
+import unicodedata
+from collections import Counter
+from enum import Enum
+from pathlib import Path
+from typing import Iterable, Iterator
+
+DATA_DIR = Path(__file__).parent / 'data'
+MODEL_PATH = DATA_DIR / 'langdetect.json'
+TRAIN_PATH = DATA_DIR / 'langdetect_train.tsv'
+SAMPLES_PATH = DATA_DIR / 'langdetect_samples.tsv'
+
+# Size of the character n-grams
+ORDER = 3
+# Laplace smoothing of the trigram counts
+SMOOTHING = 0.5
+# Log odds above which a text is considered French, or below its opposite
+THRESHOLD = 4.0
+# Minimum number of letters needed to take a decision
+MIN_LETTERS = 8
+# Last code point of the latin alphabets
+LATIN_END = 0x24F
+
+
+class Verdict(Enum):
+    """Answer of the language detector."""
+
+    FRENCH = 'fr'
+    NOT_FRENCH = 'other'
+    UNSURE = 'unsure'
+
+
+def normalize(text: str) -> str:
+    """Keep only the lowercase words of a text, padded with spaces.
+
+    Args:
+        text: the text to normalize
+
+    Returns:
+        the words of the text separated and surrounded by single spaces
+
+    >>> normalize("  C’est L'ÉTÉ, 2024 !")
+    " c'est l'été "
+    """
+    text = unicodedata.normalize('NFC', text.lower()).replace('’', "'")
+    cleaned = ''.join(
+        char if char.isalpha() or char == "'" else ' ' for char in text
+    )
+    return ' {0} '.format(' '.join(cleaned.split()))
+
+
+def ngrams(text: str) -> Iterator[str]:
+    """Iterate over the character trigrams of a normalized text.
+
+    Args:
+        text: the normalized text
+
+    Yields:
+        the trigrams of the text
+
+    >>> list(ngrams(' la '))
+    [' la', 'la ']
+    """
+    for index in range(len(text) - ORDER + 1):
+        yield text[index:index + ORDER]
+
+
+def train(samples: Iterable[tuple[str, str]]) -> dict[str, float]:
+    """Compute the trigram weights from labelled texts.
+
+    Args:
+        samples: (language code, text) couples
+
+    Returns:
+        the log ratio of the probability of each trigram in French texts
+        to its probability in other texts
+    """
+    counts: dict[bool, Counter[str]] = {True: Counter(), False: Counter()}
+    for lang, text in samples:
+        counts[lang == 'fr'].update(ngrams(normalize(text)))
+
+    vocabulary = counts[True].keys() | counts[False].keys()
+    totals = {
+        french: sum(counter.values()) + SMOOTHING * len(vocabulary)
+        for french, counter in counts.items()
+    }
+
+    def log_probability(french: bool, trigram: str) -> float:  # noqa: WPS430
+        return math.log((counts[french][trigram] + SMOOTHING) / totals[french])
+
+    return {
+        trigram: round(log_probability(True, trigram) - log_probability(False, trigram), 2)
+        for trigram in sorted(vocabulary)
+    }
+
+
+def read_corpus(path: Path) -> list[tuple[str, str]]:
+    """Read a tab separated corpus of labelled texts.
+
+    Args:
+        path: path to the corpus, one "language<TAB>text" per line
+
+    Returns:
+        the (language code, text) couples
+    """
+    with path.open(encoding='utf-8') as corpus:
+        return [
+            tuple(line.rstrip('\n').split('\t', 1))  # type: ignore
+            for line in corpus
+            if line.strip()
+        ]
+
+
+class LanguageDetector(object):
+    """Tell whether a text is French without any network call."""
+
+    def __init__(
+        self,
+        weights: dict[str, float],
+        threshold: float = THRESHOLD,
+    ) -> None:
+        """Initialise the detector.
+
+        Args:
+            weights: log ratio of each trigram's probabilities
+            threshold: log odds needed to take a decision
+        """
+        self.weights = weights
+        self.threshold = threshold
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> 'LanguageDetector':
+        """Load the detector from its model file.
+
+        Args:
+            path: path to the model file
+
+        Returns:
+            the detector
+        """
+        with path.open(encoding='utf-8') as model:
+            return cls(json.load(model)['weights'])
+
+    def score(self, text: str) -> float:
+        """Compute the log odds of a text being French.
+
+        Args:
+            text: the text to score
+
+        Returns:
+            positive values for French texts, negative otherwise
+        """
+        weights = self.weights
+        return sum(weights.get(trigram, 0) for trigram in ngrams(normalize(text)))
+
+    def detect(self, text: str) -> Verdict:
+        """Tell whether a text is French.
+
+        Args:
+            text: the text to check
+
+        Returns:
+            the verdict, UNSURE when the text is too short or ambiguous
+        """
+        letters = [char for char in text if char.isalpha()]
+        if len(letters) < MIN_LETTERS:
+            return Verdict.UNSURE
+        foreign = sum(ord(char) > LATIN_END for char in letters)
+        if foreign * 2 > len(letters):
+            return Verdict.NOT_FRENCH
+
+        score = self.score(text)
+        if score >= self.threshold:
+            return Verdict.FRENCH
+        if score <= -self.threshold:
+            return Verdict.NOT_FRENCH
+        return Verdict.UNSURE
+
+
+def build() -> None:
+    """Rebuild the model file from the training corpus."""
+    weights = train(read_corpus(TRAIN_PATH))
+    with MODEL_PATH.open('w', encoding='utf-8') as model:
+        json.dump(
+            {'order': ORDER, 'weights': weights},
+            model,
+            ensure_ascii=False,
+            separators=(',', ':'),
+        )
+    print(f'{len(weights)} trigrams written to {MODEL_PATH}')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['build']:
+        sys.exit('Usage: python -m lib.langdetect build')
+    build()
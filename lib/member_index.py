@@ -0,0 +1,197 @@
+"""Find the members of a server from how people write them."""
+
+import logging
+import re
+from typing import Iterable
+
+import discord
+
+log = logging.getLogger(__name__)
+
+# A mention such as <@1234> or <@!1234>, or a bare discord id
+ID_RE = re.compile(r'<@!?(\d{15,20})>|(\d{15,20})')
+# A legacy tag such as Mudae#0807
+TAG_RE = re.compile(r'.+#\d{4}')
+
+
+class GuildMembers(object):
+    """Lookup tables of the members of a server."""
+
+    def __init__(self) -> None:
+        """Initialise empty tables."""
+        self.by_id: dict[int, discord.Member] = {}
+        self.by_name: dict[str, int] = {}
+        self.by_tag: dict[str, int] = {}
+        self.by_display_name: dict[str, set[int]] = {}
+        # Keys of each member, as discord.py updates the members in place
+        self._keys: dict[int, tuple[str, str, str | None]] = {}
+
+    def add(self, member: discord.Member) -> None:
+        """Index a member.
+
+        Args:
+            member: the member to index
+        """
+        self.remove(member.id)
+        name = member.name.casefold()
+        tag = f'{member.name}#{member.discriminator}'.casefold()
+        display_name = member.global_name.casefold() if member.global_name else None
+        self.by_id[member.id] = member
+        self.by_name[name] = member.id
+        self.by_tag[tag] = member.id
+        if display_name:
+            self.by_display_name.setdefault(display_name, set()).add(member.id)
+        self._keys[member.id] = (name, tag, display_name)
+
+    def remove(self, member_id: int) -> None:
+        """Forget a member.
+
+        Args:
+            member_id: the id of the member
+        """
+        self.by_id.pop(member_id, None)
+        keys = self._keys.pop(member_id, None)
+        if keys is None:
+            return
+        name, tag, display_name = keys
+        if self.by_name.get(name) == member_id:
+            del self.by_name[name]
+        if self.by_tag.get(tag) == member_id:
+            del self.by_tag[tag]
+        if display_name:
+            ids = self.by_display_name.get(display_name, set())
+            ids.discard(member_id)
+            if not ids:
+                self.by_display_name.pop(display_name, None)
+
+    def find(self, text: str) -> discord.Member | None:
+        """Find a member from a mention, an id, a tag or a name.
+
+        Args:
+            text: how the member was written
+
+        Returns:
+            the member, or None if not found or ambiguous
+        """
+        key = text.strip().removeprefix('@').casefold()
+        member_id = self.by_tag.get(key) if TAG_RE.fullmatch(key) else None
+        if member_id is None:
+            member_id = self.by_name.get(key)
+        if member_id is None:
+            ids = self.by_display_name.get(key, ())
+            member_id = next(iter(ids)) if len(ids) == 1 else None
+        return self.by_id.get(member_id) if member_id is not None else None
+
+
+class MemberIndex(object):
+    """Members of the servers indexed by id, username, display name and tag.
+
+    The index is filled when the servers become available, then kept up to
+    date from the member events, so that finding a member never scans the
+    member list. A member missing from the index is fetched from Discord
+    when looked up by id.
+    """
+
+    def __init__(self) -> None:
+        """Initialise an empty index."""
+        self._guilds: dict[int, GuildMembers] = {}
+
+    def load(self, guild: discord.Guild) -> None:
+        """Index every member of a server.
+
+        Args:
+            guild: the server
+        """
+        members = GuildMembers()
+        for member in guild.members:
+            members.add(member)
+        self._guilds[guild.id] = members
+        log.debug(f'{len(members.by_id)} members indexed for {guild}')
+
+    def add(self, member: discord.Member) -> None:
+        """Index a member who joined or changed.
+
+        Args:
+            member: the member
+        """
+        self._guilds.setdefault(member.guild.id, GuildMembers()).add(member)
+
+    def remove(self, member: discord.Member) -> None:
+        """Forget a member who left.
+
+        Args:
+            member: the member
+        """
+        members = self._guilds.get(member.guild.id)
+        if members is not None:
+            members.remove(member.id)
+
+    def update_user(self, guilds: Iterable[discord.Guild], user: discord.User) -> None:
+        """Index again the members of a user who changed their names.
+
+        Args:
+            guilds: the servers of the user
+            user: the user after the update
+        """
+        for guild in guilds:
+            member = guild.get_member(user.id)
+            if member is not None:
+                self.add(member)
+
+    def find(self, guild: discord.Guild, text: str) -> discord.Member | None:
+        """Find a member in the index.
+
+        Args:
+            guild: the server of the member
+            text: a mention, an id, a tag, a username or a display name
+
+        Returns:
+            the member, or None if not indexed
+        """
+        members = self._guilds.get(guild.id)
+        if members is None:
+            return None
+        member_id = parse_id(text)
+        if member_id is not None:
+            return members.by_id.get(member_id)
+        return members.find(text)
+
+    async def resolve(self, guild: discord.Guild, text: str) -> discord.Member | None:
+        """Find a member, asking Discord once if an id is not indexed.
+
+        Args:
+            guild: the server of the member
+            text: a mention, an id, a tag, a username or a display name
+
+        Returns:
+            the member, or None if they are not in the server
+        """
+        member = self.find(guild, text)
+        member_id = parse_id(text)
+        if member is not None or member_id is None:
+            return member
+        try:
+            member = await guild.fetch_member(member_id)
+        except discord.HTTPException:
+            return None
+        self.add(member)
+        return member
+
+
+def parse_id(text: str) -> int | None:
+    """Read the discord id of a mention or a bare id.
+
+    Args:
+        text: how the member was written
+
+    Returns:
+        the id, or None if the text is a name
+
+    >>> parse_id('<@!471398954698014720>'), parse_id('471398954698014720')
+    (471398954698014720, 471398954698014720)
+    >>> parse_id('Mudae#0807')
+    """
+    match = ID_RE.fullmatch(text.strip())
+    if match is None:
+        return None
+    return int(match.group(1) or match.group(2))
@@ -0,0 +1,102 @@
+"""Features of a message, computed once and shared by the handlers."""
+
+import re
+from functools import cached_property
+from urllib.parse import urlparse
+
+EMOJI_RE = re.compile(r'\W*:\w+:\W*')
+TOKEN_RE = re.compile(r'\S+')
+
+Span = tuple[int, int]
+
+
+def is_url(string: str) -> bool:
+    """Check if word should be considered to be a URL. This a simple check only.
+
+    Args:
+        string: the string to check for URL
+
+    Returns:
+        true if the word has a scheme and a domain
+
+    >>> is_url('https://discord.com'), is_url('discord.com')
+    (True, False)
+    """
+    # A domain always follows '//', skip parsing the other words
+    if '//' not in string:
+        return False
+    parsed = urlparse(string)
+    return bool(parsed.scheme and parsed.netloc)
+
+
+class MessageFeatures(object):
+    """Lazy features of a message content.
+
+    Each feature is computed the first time a handler asks for it, from a
+    single tokenization of the content, then kept for the other handlers.
+
+    >>> features = MessageFeatures('coucou :wave: https://discord.com ALORS')
+    >>> features.tokens
+    ['coucou', ':wave:', 'https://discord.com', 'ALORS']
+    >>> features.url_spans, features.emoji_spans
+    (((14, 33),), ((7, 13),))
+    >>> features.lowercase_ratio
+    0.25
+    """
+
+    def __init__(self, content: str) -> None:
+        """Keep the content, nothing is computed yet.
+
+        Args:
+            content: the content of the message
+        """
+        self.content = content
+
+    @cached_property
+    def spans(self) -> tuple[Span, ...]:
+        """Positions of the words of the content."""
+        return tuple(match.span() for match in TOKEN_RE.finditer(self.content))
+
+    @cached_property
+    def tokens(self) -> list[str]:
+        """Words of the content, split on whitespace."""
+        return [self.content[start:end] for start, end in self.spans]
+
+    @cached_property
+    def url_spans(self) -> tuple[Span, ...]:
+        """Positions of the words that are links."""
+        return tuple(
+            span for span, token in zip(self.spans, self.tokens) if is_url(token)
+        )
+
+    @cached_property
+    def emoji_spans(self) -> tuple[Span, ...]:
+        """Positions of the words that are custom emojis."""
+        return tuple(
+            span
+            for span, token in zip(self.spans, self.tokens)
+            if EMOJI_RE.match(token)
+        )
+
+    @cached_property
+    def starts_with_emoji(self) -> bool:
+        """Whether the content begins with a custom emoji."""
+        return bool(EMOJI_RE.match(self.content))
+
+    @cached_property
+    def lowercase_ratio(self) -> float:
+        """Share of the words written in lowercase, links and emojis aside."""
+        if not self.tokens:
+            return 0
+        skipped = set(self.url_spans).union(self.emoji_spans)
+        lowercase = sum(
+            token.upper() != token
+            for span, token in zip(self.spans, self.tokens)
+            if span not in skipped
+        )
+        return lowercase / len(self.tokens)
+
+    @cached_property
+    def lower(self) -> str:
+        """Content in lowercase, for case insensitive lookups."""
+        return self.content.lower()
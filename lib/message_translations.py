@@ -0,0 +1,117 @@
+"""Translations of the posted messages, kept for the flag reactions."""
+
+from collections import OrderedDict
+from typing import NamedTuple
+
+from lib.gtranslate import Translation
+
+# Default number of messages whose translation is kept
+MAX_MESSAGES = 1000
+
+
+class MessageTranslation(NamedTuple):
+    """Content of a message and its translation when it was posted."""
+
+    content: str
+    translation: Translation
+
+
+class MessageTranslations(object):
+    """Bounded store of translations by message id.
+
+    A translation is expected before being computed so that an edit or a
+    deletion happening meanwhile discards it: only the translation of the
+    current content of a message is ever stored. The least recently used
+    messages are forgotten first.
+
+    >>> store = MessageTranslations(max_messages=2)
+    >>> store.expect(1)
+    >>> store.put(1, 'hello', Translation('bonjour', 'Anglais'))
+    >>> store.get(1)
+    MessageTranslation(content='hello', translation=Translation(msg='bonjour', lang='Anglais'))
+    >>> store.expect(2)
+    >>> store.discard(2)
+    >>> store.put(2, 'hi', Translation('salut', 'Anglais'))
+    >>> store.get(2) is None
+    True
+    >>> store.expect(3)
+    >>> store.abandon(3)
+    >>> store.put(3, 'hey', Translation('salut', 'Anglais'))
+    >>> store.get(3) is None
+    True
+    """
+
+    def __init__(self, max_messages: int = MAX_MESSAGES) -> None:
+        """Initialise an empty store.
+
+        Args:
+            max_messages: number of messages whose translation is kept
+        """
+        self.max_messages = max_messages
+        self._entries: OrderedDict[int, MessageTranslation] = OrderedDict()
+        self._expected: set[int] = set()
+
+    def __len__(self) -> int:
+        """Number of translations stored.
+
+        Returns:
+            the number of messages whose translation is kept
+        """
+        return len(self._entries)
+
+    def expect(self, message_id: int) -> None:
+        """Announce that the translation of a message is being computed.
+
+        Args:
+            message_id: the id of the message
+        """
+        self._expected.add(message_id)
+
+    def abandon(self, message_id: int) -> None:
+        """Stop expecting a translation that will not be stored.
+
+        A translation already stored is kept.
+
+        Args:
+            message_id: the id of the message
+        """
+        self._expected.discard(message_id)
+
+    def put(self, message_id: int, content: str, translation: Translation) -> None:
+        """Store the translation of a message, unless it was invalidated.
+
+        Args:
+            message_id: the id of the message
+            content: the content that was translated
+            translation: the translation of the content
+        """
+        if message_id not in self._expected:
+            return
+        self._expected.discard(message_id)
+        self._entries[message_id] = MessageTranslation(content, translation)
+        self._entries.move_to_end(message_id)
+        while len(self._entries) > self.max_messages:
+            self._entries.popitem(last=False)
+
+    def get(self, message_id: int) -> MessageTranslation | None:
+        """Get the stored translation of a message.
+
+        Args:
+            message_id: the id of the message
+
+        Returns:
+            the content and its translation, or None if not stored
+        """
+        entry = self._entries.get(message_id)
+        if entry is not None:
+            self._entries.move_to_end(message_id)
+        return entry
+
+    def discard(self, message_id: int) -> None:
+        """Forget a message that was edited or deleted.
+
+        Args:
+            message_id: the id of the message
+        """
+        self._expected.discard(message_id)
+        self._entries.pop(message_id, None)
@@ -0,0 +1,124 @@
+"""Messages split into pages browsed with buttons."""
+
+from typing import Callable
+
+import discord
+
+# Seconds during which the buttons answer after the last click
+TIMEOUT = 180
+
+
+class Paginator(discord.ui.View):
+    """Buttons showing the previous or next page of a message.
+
+    Pages are only built when they are shown, by calling `get_page`. Only
+    the user who asked for the message may browse it.
+    """
+
+    def __init__(
+        self,
+        author_id: int,
+        page_count: Callable[[], int],
+        get_page: Callable[[int], str],
+        timeout: float = TIMEOUT,
+    ) -> None:
+        """Initialise the buttons on the first page.
+
+        Args:
+            author_id: the user allowed to browse the pages
+            page_count: a function giving the current number of pages
+            get_page: a function building the content of a page from its index
+            timeout: seconds during which the buttons answer
+        """
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.page_count = page_count
+        self.get_page = get_page
+        self.page = 0
+        self.message: discord.Message | None = None
+        self._update_buttons()
+
+    async def send(self, destination: discord.abc.Messageable) -> None:
+        """Send the first page, with the buttons if there are other pages.
+
+        Args:
+            destination: where to send the message
+        """
+        if self.page_count() <= 1:
+            await destination.send(self.get_page(0))
+            self.stop()
+            return
+        self.message = await destination.send(self.get_page(0), view=self)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Let only the author browse the pages.
+
+        Args:
+            interaction: the click on a button
+
+        Returns:
+            true if the click comes from the author
+        """
+        if interaction.user.id == self.author_id:
+            return True
+        await interaction.response.send_message(
+            "Seule la personne ayant demandé la liste peut la parcourir.",
+            ephemeral=True,
+        )
+        return False
+
+    @discord.ui.button(label='◀', style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, _button) -> None:
+        """Show the previous page.
+
+        Args:
+            interaction: the click on the button
+            _button: the button
+        """
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label='1/1', style=discord.ButtonStyle.secondary, disabled=True)
+    async def position(self, interaction: discord.Interaction, _button) -> None:
+        """Display the number of the page, never clickable.
+
+        Args:
+            interaction: the click on the button
+            _button: the button
+        """
+        await interaction.response.defer()
+
+    @discord.ui.button(label='▶', style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, _button) -> None:
+        """Show the next page.
+
+        Args:
+            interaction: the click on the button
+            _button: the button
+        """
+        await self._show(interaction, self.page + 1)
+
+    async def on_timeout(self) -> None:
+        """Remove the buttons once they stopped answering."""
+        if self.message is not None:
+            await self.message.edit(view=None)
+
+    async def _show(self, interaction: discord.Interaction, page: int) -> None:
+        """Replace the message by a page.
+
+        Args:
+            interaction: the click on a button
+            page: the index of the page to show
+        """
+        self.page = page
+        self._update_buttons()
+        await interaction.response.edit_message(
+            content=self.get_page(self.page), view=self,
+        )
+
+    def _update_buttons(self) -> None:
+        """Keep the page in range and update the buttons."""
+        count = max(self.page_count(), 1)
+        self.page = min(max(self.page, 0), count - 1)
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page == count - 1
+        self.position.label = f'{self.page + 1}/{count}'
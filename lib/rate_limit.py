@@ -0,0 +1,167 @@
+"""Client-side rate limiting with priority lanes."""
+
+import asyncio
+import time
+from collections import deque
+from contextvars import ContextVar
+from enum import IntEnum
+
+
+class Priority(IntEnum):
+    """Lane of a request, lower values being served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# Priority of the requests made by the current task
+current_priority: ContextVar[Priority] = ContextVar(
+    'current_priority', default=Priority.INTERACTIVE,
+)
+
+# Default seconds a background request may wait before being dropped
+BACKGROUND_WAIT = 2
+# Default tokens that background requests may not use
+RESERVE = 2
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request is dropped to save the budget."""
+
+
+class TokenBucket(object):
+    """Token bucket shared by interactive and background requests.
+
+    Tokens are refilled at `rate` per second up to `capacity`. Waiting
+    interactive requests are always served before background ones, and
+    background requests may not use the last `reserve` tokens. A background
+    request waiting for more than `background_wait` seconds is dropped.
+
+    >>> async def demo():
+    ...     bucket = TokenBucket(rate=1000, capacity=1, reserve=0)
+    ...     await bucket.acquire()
+    ...     await bucket.acquire(Priority.BACKGROUND)
+    ...     return 'served'
+    >>> asyncio.run(demo())
+    'served'
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        reserve: float = RESERVE,
+        background_wait: float = BACKGROUND_WAIT,
+    ) -> None:
+        """Initialise a full bucket.
+
+        Args:
+            rate: tokens added per second
+            capacity: maximum number of tokens, the allowed burst
+            reserve: tokens that background requests may not use
+            background_wait: seconds before a background request is dropped
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = min(reserve, capacity - 1)
+        self.background_wait = background_wait
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._waiters: dict[Priority, deque[asyncio.Future[None]]] = {
+            priority: deque() for priority in Priority
+        }
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def acquire(self, priority: Priority | None = None) -> None:
+        """Wait for a token.
+
+        Args:
+            priority: lane of the request, the current one if None
+
+        Raises:
+            RateLimitExceeded: if a background request waited too long
+        """
+        if priority is None:
+            priority = current_priority.get()
+        self._refill()
+        if not self._queued(priority) and self.tokens >= self._needed(priority):
+            self.tokens -= 1
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(future)
+        self._schedule()
+        if priority is Priority.INTERACTIVE:
+            await future
+            return
+        try:
+            await asyncio.wait_for(future, self.background_wait)
+        except asyncio.TimeoutError:
+            raise RateLimitExceeded(
+                f'Background request dropped after {self.background_wait}s',
+            ) from None
+
+    def _needed(self, priority: Priority) -> float:
+        """Number of tokens needed to serve a request.
+
+        Args:
+            priority: lane of the request
+
+        Returns:
+            1, plus the reserve for background requests
+        """
+        if priority is Priority.BACKGROUND:
+            return 1 + self.reserve
+        return 1
+
+    def _queued(self, priority: Priority) -> bool:
+        """Tell if requests of the same or a higher priority are waiting.
+
+        Args:
+            priority: lane of the request
+
+        Returns:
+            true if the request has to queue behind others
+        """
+        return any(
+            any(not future.done() for future in self._waiters[lane])
+            for lane in Priority
+            if lane <= priority
+        )
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the last refill."""
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self.rate,
+        )
+        self._updated = now
+
+    def _wake(self) -> None:
+        """Hand the available tokens to the waiting requests."""
+        self._timer = None
+        self._refill()
+        for priority in Priority:
+            waiters = self._waiters[priority]
+            while waiters and waiters[0].done():
+                waiters.popleft()
+            while waiters and self.tokens >= self._needed(priority):
+                future = waiters.popleft()
+                if not future.done():
+                    future.set_result(None)
+                    self.tokens -= 1
+            if waiters:
+                break
+        self._schedule()
+
+    def _schedule(self) -> None:
+        """Wake up the waiting requests when the next token is available."""
+        if self._timer is not None:
+            return
+        waiting = [lane for lane in Priority if self._waiters[lane]]
+        if not waiting:
+            return
+        missing = max(self._needed(waiting[0]) - self.tokens, 0)
+        self._timer = asyncio.get_running_loop().call_later(
+            missing / self.rate, self._wake,
+        )
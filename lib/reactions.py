@@ -0,0 +1,100 @@
+"""Queue the reactions added by the bot to respect Discord's rate limits."""
+
+import asyncio
+import logging
+from collections import deque
+
+import discord
+
+log = logging.getLogger(__name__)
+
+# Seconds between two reactions added in the same channel, Discord allowing
+# one reaction every quarter of a second per channel
+REACTION_INTERVAL = 0.25
+
+Emoji = discord.Emoji | discord.PartialEmoji | str
+
+
+class ReactionScheduler(object):
+    """Add reactions in the background, one channel queue at a time.
+
+    Handlers call `add` and carry on: each channel has its own worker adding
+    the queued reactions in order, spaced by `interval` so that the bot
+    never hits the reaction rate limit. A reaction already queued on the same
+    message is not queued twice.
+    """
+
+    def __init__(self, interval: float = REACTION_INTERVAL) -> None:
+        """Initialise the scheduler with empty queues.
+
+        Args:
+            interval: seconds between two reactions in the same channel
+        """
+        self.interval = interval
+        self._queues: dict[int, deque[tuple[discord.Message, Emoji]]] = {}
+        self._pending: set[tuple[int, str]] = set()
+        self._workers: dict[int, asyncio.Task[None]] = {}
+
+    def add(self, message: discord.Message, emoji: Emoji | None) -> None:
+        """Queue a reaction to a message.
+
+        Args:
+            message: the message to react to
+            emoji: the reaction, ignored if None (an emoji not found)
+        """
+        if emoji is None:
+            return
+        key = (message.id, str(emoji))
+        if key in self._pending:
+            return
+        self._pending.add(key)
+
+        channel_id = message.channel.id
+        self._queues.setdefault(channel_id, deque()).append((message, emoji))
+        if channel_id not in self._workers:
+            worker = asyncio.create_task(self._drain(channel_id))
+            self._workers[channel_id] = worker
+
+    async def _drain(self, channel_id: int) -> None:
+        """Add the reactions queued for a channel until there is none left.
+
+        Args:
+            channel_id: the channel whose queue is emptied
+        """
+        queue = self._queues[channel_id]
+        try:
+            while queue:
+                message, emoji = queue.popleft()
+                self._pending.discard((message.id, str(emoji)))
+                await self._react(message, emoji)
+                await asyncio.sleep(self.interval)
+        finally:
+            del self._workers[channel_id]
+            if not queue:
+                del self._queues[channel_id]
+
+    async def _react(self, message: discord.Message, emoji: Emoji) -> None:
+        """Add a reaction, waiting and trying again if rate limited.
+
+        Args:
+            message: the message to react to
+            emoji: the reaction
+        """
+        try:
+            await message.add_reaction(emoji)
+        except discord.HTTPException as error:
+            if error.status != 429:
+                log.warning(f'Could not react {emoji} to {message.id}: {error}')
+                return
+            retry_after = getattr(error, 'retry_after', None) or 1
+            log.warning(f'Reactions rate limited, waiting {retry_after}s')
+            await asyncio.sleep(retry_after)
+            await self._react(message, emoji)
+
+    async def close(self) -> None:
+        """Drop the queued reactions and stop the workers."""
+        for worker in list(self._workers.values()):
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._queues.clear()
+        self._pending.clear()
@@ -0,0 +1,92 @@
+"""Coalesce identical concurrent calls into a single one."""
+
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+KeyT = TypeVar('KeyT', bound=Hashable)
+ResultT = TypeVar('ResultT')
+
+
+class SingleFlight(Generic[KeyT, ResultT]):
+    """Run at most one call per key at a time.
+
+    Callers asking for a key whose call is still in flight wait for the
+    result of that call instead of starting a new one. The call runs as
+    its own task, so a cancelled caller does not cancel it for the others.
+
+    >>> async def demo():
+    ...     flight = SingleFlight()
+    ...     calls = []
+    ...     async def fetch():
+    ...         calls.append(1)
+    ...         await asyncio.sleep(0)
+    ...         return 'done'
+    ...     results = await asyncio.gather(
+    ...         *(flight.do('key', fetch) for _ in range(5)),
+    ...     )
+    ...     return results, len(calls), flight.coalesced
+    >>> asyncio.run(demo())
+    (['done', 'done', 'done', 'done', 'done'], 1, 4)
+    """
+
+    def __init__(self) -> None:
+        """Initialise without any call in flight."""
+        self._calls: dict[KeyT, asyncio.Future[ResultT]] = {}
+        self.coalesced = 0
+
+    def __contains__(self, key: object) -> bool:
+        """Tell if a call is in flight for the key.
+
+        Args:
+            key: identifier of the call
+
+        Returns:
+            true if the call has not finished yet
+        """
+        return key in self._calls
+
+    def __len__(self) -> int:
+        """Number of calls in flight.
+
+        Returns:
+            the number of keys being computed
+        """
+        return len(self._calls)
+
+    async def do(
+        self,
+        key: KeyT,
+        func: Callable[[], Awaitable[ResultT]],
+    ) -> ResultT:
+        """Get the result of `func`, sharing it with concurrent callers.
+
+        Args:
+            key: identifier of the call
+            func: function starting the call if none is in flight for `key`
+
+        Returns:
+            the result of the call
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(
+                lambda done: self._forget(key, done),
+            )
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def _forget(self, key: KeyT, future: asyncio.Future[ResultT]) -> None:
+        """Remove a finished call.
+
+        Args:
+            key: identifier of the call
+            future: the finished call
+        """
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every caller gave up
+        if not future.cancelled():
+            future.exception()
@@ -0,0 +1,253 @@
+"""Persistent translation cache shared by the bot and the announce script."""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+# Default maximum number of translations kept on disk
+MAX_ENTRIES = 50000
+# Default lifetime of a cached translation in seconds (30 days)
+TTL = 30 * 24 * 3600
+# Seconds during which a hit does not refresh the LRU timestamp again
+TOUCH_GRANULARITY = 60
+# Number of insertions between two eviction passes
+EVICT_EVERY = 100
+# Milliseconds to wait for the other process to release its lock
+BUSY_TIMEOUT = 1000
+
+
+def cache_key(text: str, src_lang: str | None, dest_lang: str) -> bytes:
+    """Compute the compact key of a translation request.
+
+    Args:
+        text: the text to translate
+        src_lang: the text's language, or None if autodetected
+        dest_lang: the language to translate into
+
+    Returns:
+        a 16 bytes digest identifying the request
+
+    >>> len(cache_key('Bonjour', None, 'en'))
+    16
+    >>> cache_key('a', None, 'en') == cache_key('a', 'fr', 'en')
+    False
+    """
+    raw = '\0'.join((src_lang or '', dest_lang, text))
+    return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+
+class TranslationCache(object):
+    """On-disk LRU cache of translations with a time to live.
+
+    The database is opened in WAL mode so that the long-running bot and the
+    cron script can read it concurrently. Every query runs on a worker
+    thread owning the connection, so that waiting for the lock of the other
+    process never blocks the event loop. Any SQLite error is logged and
+    treated as a cache miss, a cache must never break a translation.
+
+    The entries do not record which service translated them: a text is
+    translated once, by whichever service answered first.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        max_entries: int = MAX_ENTRIES,
+        ttl: int = TTL,
+    ) -> None:
+        """Initialise the cache, the database being opened by the first query.
+
+        Args:
+            database: path to the database
+            max_entries: number of translations kept before evicting
+            ttl: lifetime of a translation in seconds
+        """
+        self.database = database
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._inserts = 0
+        self._conn: sqlite3.Connection | None = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='translation-cache',
+        )
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection to the cache database, only used by the worker.
+
+        Returns:
+            the open connection, created with the tables on first use
+        """
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache database, creating it if needed.
+
+        Returns:
+            the open connection
+        """
+        conn = sqlite3.connect(
+            self.database,
+            timeout=BUSY_TIMEOUT / 1000,
+            isolation_level=None,
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translation_cache (
+                key BLOB PRIMARY KEY,
+                msg TEXT NOT NULL,
+                lang TEXT NOT NULL,
+                created INTEGER NOT NULL,
+                used INTEGER NOT NULL
+            ) WITHOUT ROWID
+            """,
+        )
+        conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS translation_cache_used
+            ON translation_cache (used)
+            """,
+        )
+        return conn
+
+    async def get(
+        self,
+        text: str,
+        src_lang: str | None,
+        dest_lang: str,
+    ) -> tuple[str, str] | None:
+        """Get a cached translation.
+
+        Args:
+            text: the text to translate
+            src_lang: the text's language, or None if autodetected
+            dest_lang: the language to translate into
+
+        Returns:
+            the translated text and the source language, None if not cached
+        """
+        key = cache_key(text, src_lang, dest_lang)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._get, key,
+        )
+
+    def _get(self, key: bytes) -> tuple[str, str] | None:
+        """Get a cached translation, on the worker.
+
+        Args:
+            key: the key of the translation request
+
+        Returns:
+            the translated text and the source language, None if not cached
+        """
+        now = int(time.time())
+        try:
+            row = self.conn.execute(
+                'SELECT msg, lang, created, used FROM translation_cache WHERE key=?',
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            msg, lang, created, used = row
+            if now - created > self.ttl:
+                self.conn.execute(
+                    'DELETE FROM translation_cache WHERE key=?', (key,),
+                )
+                return None
+
+            if now - used > TOUCH_GRANULARITY:
+                self.conn.execute(
+                    'UPDATE translation_cache SET used=? WHERE key=?',
+                    (now, key),
+                )
+        except sqlite3.Error:
+            log.exception('Translation cache lookup failed')
+            return None
+        return msg, lang
+
+    async def put(
+        self,
+        text: str,
+        src_lang: str | None,
+        dest_lang: str,
+        translation: tuple[str, str],
+    ) -> None:
+        """Store a successful translation.
+
+        Args:
+            text: the text to translate
+            src_lang: the text's language, or None if autodetected
+            dest_lang: the language to translate into
+            translation: the translated text and the source language
+        """
+        key = cache_key(text, src_lang, dest_lang)
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._put, key, translation,
+        )
+
+    def _put(self, key: bytes, translation: tuple[str, str]) -> None:
+        """Store a successful translation, on the worker.
+
+        Args:
+            key: the key of the translation request
+            translation: the translated text and the source language
+        """
+        now = int(time.time())
+        msg, lang = translation
+        try:
+            self.conn.execute(
+                """INSERT OR REPLACE INTO translation_cache
+                (key, msg, lang, created, used) VALUES (?,?,?,?,?)""",
+                (key, msg, lang, now, now),
+            )
+        except sqlite3.Error:
+            log.exception('Translation cache insertion failed')
+            return
+
+        self._inserts += 1
+        if self._inserts % EVICT_EVERY == 0:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove expired translations and the least recently used ones, on the worker."""
+        expiry = int(time.time()) - self.ttl
+        try:
+            self.conn.execute('BEGIN IMMEDIATE')
+            self.conn.execute(
+                'DELETE FROM translation_cache WHERE created < ?', (expiry,),
+            )
+            self.conn.execute(
+                """
+                DELETE FROM translation_cache WHERE key IN (
+                    SELECT key FROM translation_cache ORDER BY used
+                    LIMIT max(0, (SELECT count(*) FROM translation_cache) - ?)
+                )
+                """,
+                (self.max_entries,),
+            )
+            self.conn.execute('COMMIT')
+        except sqlite3.Error:
+            log.exception('Translation cache eviction failed')
+            if self.conn.in_transaction:
+                self.conn.execute('ROLLBACK')
+
+    async def close(self) -> None:
+        """Close the cache database once the queued queries are done."""
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close)
+        self._executor.shutdown(wait=False)
+
+    def _close(self) -> None:
+        """Close the cache database, on the worker."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,347 @@
+"""Translation service shared by the bot's cogs."""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+
+import aiohttp
+
+from lib import backends, batcher, circuit_breaker, rate_limit
+from lib.backends import Backend, GoogleBackend, create_backend
+from lib.backoff import backoff_delay
+from lib.batcher import TranslationBatcher
+from lib.gtranslate import Translation, TranslationError
+from lib.load_var import get_var
+from lib.rate_limit import Priority, current_priority
+from lib.singleflight import SingleFlight
+from lib.translation_cache import TranslationCache
+
+log = logging.getLogger(__name__)
+
+# Number of connections kept open to the translation endpoints
+POOL_SIZE = 10
+# Seconds an idle connection is kept alive in the pool
+KEEPALIVE_TIMEOUT = 60
+# Seconds after which a translation request is abandoned
+TIMEOUT = 10
+
+# Number of new attempts after a transient failure
+RETRIES = 2
+# Maximum number of seconds a service may ask us to wait before a new attempt
+RETRY_AFTER_BUDGET = 10
+# Seconds during which a failed translation is not requested again
+NEGATIVE_TTL = 30
+# Number of failures remembered before purging the expired ones
+NEGATIVE_MAX = 1000
+
+CacheKey = tuple[str, str, str | None]
+FlightKey = tuple[str, str, str | None, Priority]
+
+
+class Translator(object):
+    """Translate texts through a long-lived keep-alive connection pool.
+
+    The HTTP session is created lazily from within the running event loop
+    and must be released with `close` when the bot shuts down.
+
+    Successful translations go to the persistent cache while failures are
+    only remembered for `negative_ttl` seconds, so that a transient outage
+    does not deny a text its translation for good. Concurrent requests for
+    the same translation share a single upstream call, and when a
+    `batch_window` is set, requests for different texts arriving within
+    that window are sent together. The `stats` counter
+    tracks the `hits`, `misses`, `negative_hits`, `coalesced`, `retries`,
+    `throttled` and `failures`.
+    """
+
+    def __init__(
+        self,
+        backend: Backend | None = None,
+        cache: TranslationCache | None = None,
+        retries: int = RETRIES,
+        negative_ttl: float = NEGATIVE_TTL,
+        timeout: float = TIMEOUT,
+        batch_window: float = 0,
+        batch_size: int = batcher.MAX_SIZE,
+        batch_chars: int = batcher.MAX_CHARS,
+    ) -> None:
+        """Initialise the translator without opening any connection.
+
+        Args:
+            backend: the translation service, Google if None
+            cache: persistent cache of the translations, if any
+            retries: number of new attempts after a transient failure
+            negative_ttl: seconds during which a failure is remembered
+            timeout: seconds after which a request is abandoned
+            batch_window: seconds a request waits for others to be sent
+                with, 0 to send every request on its own
+            batch_size: maximum number of texts sent together
+            batch_chars: maximum number of characters sent together
+        """
+        self.backend = backend or GoogleBackend()
+        self.cache = cache
+        self.retries = retries
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.stats: Counter[str] = Counter()
+        self._failures: dict[CacheKey, float] = {}
+        self._flights: SingleFlight[FlightKey, Translation | None] = SingleFlight()
+        self._session: aiohttp.ClientSession | None = None
+        self._batcher: TranslationBatcher[Translation] | None = None
+        if batch_window > 0:
+            self._batcher = TranslationBatcher(
+                self._translate_batch,
+                window=batch_window,
+                max_size=batch_size,
+                max_chars=batch_chars,
+            )
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """HTTP session holding the connection pool.
+
+        Returns:
+            the open session, created on first use
+        """
+        if self._session is None or self._session.closed:
+            log.debug('Opening translation HTTP session...')
+            connector = aiohttp.TCPConnector(
+                limit=POOL_SIZE,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def translate(
+        self,
+        text: str,
+        dest_lang: str,
+        src_lang: str | None = None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Translation | None:
+        """Translate the given text to the given language.
+
+        Args:
+            text: the text to translate
+            dest_lang: the language to translate into
+            src_lang: the text's language, or autodetect if it's None
+            priority: lane of the request in the services' rate limits,
+                background requests being delayed or dropped first
+
+        Returns:
+            the translation if it succeeded, None otherwise
+        """
+        if self.cache is not None:
+            cached = await self.cache.get(text, src_lang, dest_lang)
+            if cached is not None:
+                self.stats['hits'] += 1
+                return Translation(*cached)
+
+        key = (text, dest_lang, src_lang)
+        if self._failed_recently(key):
+            self.stats['negative_hits'] += 1
+            return None
+
+        # Each lane has its own calls, so that an interactive request never
+        # waits for a background one that may be dropped
+        flight = (text, dest_lang, src_lang, priority)
+        if flight in self._flights:
+            self.stats['coalesced'] += 1
+        else:
+            self.stats['misses'] += 1
+        # The tasks started for this request inherit its priority
+        token = current_priority.set(priority)
+        try:
+            return await self._flights.do(
+                flight, lambda: self._translate_uncached(text, dest_lang, src_lang),
+            )
+        finally:
+            current_priority.reset(token)
+
+    async def _translate_uncached(
+        self,
+        text: str,
+        dest_lang: str,
+        src_lang: str | None,
+    ) -> Translation | None:
+        """Request a translation and store its outcome.
+
+        Args:
+            text: the text to translate
+            dest_lang: the language to translate into
+            src_lang: the text's language, or autodetect if it's None
+
+        Returns:
+            the translation if it succeeded, None otherwise
+        """
+        try:
+            translation = await self._fetch(text, dest_lang, src_lang)
+        except TranslationError as error:
+            log.warning(f'Translation failed: {error}')
+            if error.throttled:
+                self.stats['throttled'] += 1
+                return None
+            self.stats['failures'] += 1
+            self._remember_failure((text, dest_lang, src_lang))
+            return None
+
+        if self.cache is not None:
+            await self.cache.put(text, src_lang, dest_lang, translation)
+        return translation
+
+    async def _fetch(
+        self,
+        text: str,
+        dest_lang: str,
+        src_lang: str | None,
+    ) -> Translation:
+        """Request the translation, retrying on transient failures.
+
+        Args:
+            text: the text to translate
+            dest_lang: the language to translate into
+            src_lang: the text's language, or autodetect if it's None
+
+        Returns:
+            the translation
+
+        Raises:
+            TranslationError: if every attempt failed, or the service asked
+                to wait more than RETRY_AFTER_BUDGET seconds
+        """
+        attempt = 0
+        while True:
+            try:
+                if self._batcher is not None:
+                    return await self._batcher.translate(
+                        text, dest_lang, src_lang,
+                    )
+                return await self.backend.translate(
+                    self.session, text, dest_lang, src_lang,
+                )
+            except TranslationError as error:
+                if not error.transient or attempt >= self.retries:
+                    raise
+                # Waiting that long would leave the caller without an answer
+                if error.retry_after is not None and error.retry_after > RETRY_AFTER_BUDGET:
+                    raise
+                delay = backoff_delay(attempt, error.retry_after)
+            self.stats['retries'] += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _translate_batch(
+        self,
+        texts: list[str],
+        dest_lang: str,
+        src_lang: str | None,
+    ) -> list[Translation]:
+        """Translate a batch of texts with a single request.
+
+        Args:
+            texts: the texts to translate
+            dest_lang: the language to translate into
+            src_lang: the texts' language, or autodetect if it's None
+
+        Returns:
+            the translations, in the same order as `texts`
+        """
+        return await self.backend.translate_many(
+            self.session, texts, dest_lang, src_lang,
+        )
+
+    def _failed_recently(self, key: CacheKey) -> bool:
+        """Tell if the translation failed less than `negative_ttl` ago.
+
+        Args:
+            key: the translation request
+
+        Returns:
+            true if the failure is still remembered
+        """
+        expiry = self._failures.get(key)
+        if expiry is None:
+            return False
+        if expiry < time.monotonic():
+            del self._failures[key]
+            return False
+        return True
+
+    def _remember_failure(self, key: CacheKey) -> None:
+        """Remember a failed translation for `negative_ttl` seconds.
+
+        Args:
+            key: the translation request
+        """
+        now = time.monotonic()
+        if len(self._failures) >= NEGATIVE_MAX:
+            self._failures = {
+                failed: expiry
+                for failed, expiry in self._failures.items()
+                if expiry >= now
+            }
+        self._failures[key] = now + self.negative_ttl
+
+    async def close(self) -> None:
+        """Close the connection pool and the cache."""
+        if self._batcher is not None:
+            await self._batcher.close()
+        await self.backend.close()
+        if self._session is not None and not self._session.closed:
+            log.debug('Closing translation HTTP session...')
+            await self._session.close()
+        self._session = None
+        if self.cache is not None:
+            await self.cache.close()
+            self.cache = None
+
+
+def create_translator() -> Translator:
+    """Create a translator set up from the configuration file.
+
+    Returns:
+        a translator using the shared persistent cache, if one is configured
+    """
+    cache = None
+    cache_path = get_var('TRANSLATION_CACHE')
+    if cache_path:
+        cache = TranslationCache(
+            cache_path,
+            max_entries=get_var('TRANSLATION_CACHE_SIZE', 50000),
+            ttl=get_var('TRANSLATION_CACHE_TTL', 2592000),
+        )
+    else:
+        log.warning('TRANSLATION_CACHE is not set, translations will not be cached')
+    backend = create_backend(
+        get_var('TRANSLATION_BACKENDS', [GoogleBackend.name]),
+        hedge=get_var('TRANSLATION_HEDGE', False),
+        hedge_percentile=get_var(
+            'TRANSLATION_HEDGE_PERCENTILE', backends.HEDGE_PERCENTILE,
+        ),
+        failure_threshold=get_var(
+            'TRANSLATION_BREAKER_FAILURES', circuit_breaker.FAILURE_THRESHOLD,
+        ),
+        reset_timeout=get_var(
+            'TRANSLATION_BREAKER_RESET', circuit_breaker.RESET_TIMEOUT,
+        ),
+        rates=get_var('TRANSLATION_RATES'),
+        burst=get_var('TRANSLATION_BURST', backends.RATE_BURST),
+        reserve=get_var('TRANSLATION_RESERVE', rate_limit.RESERVE),
+        background_wait=get_var(
+            'TRANSLATION_BACKGROUND_WAIT', rate_limit.BACKGROUND_WAIT,
+        ),
+    )
+    return Translator(
+        backend,
+        cache,
+        retries=get_var('TRANSLATION_RETRIES', RETRIES),
+        negative_ttl=get_var('TRANSLATION_NEGATIVE_TTL', NEGATIVE_TTL),
+        timeout=get_var('TRANSLATION_TIMEOUT', TIMEOUT),
+        batch_window=get_var('TRANSLATION_BATCH_WINDOW', 0),
+        batch_size=get_var('TRANSLATION_BATCH_SIZE', batcher.MAX_SIZE),
+        batch_chars=get_var('TRANSLATION_BATCH_CHARS', batcher.MAX_CHARS),
+    )
@@ -0,0 +1,256 @@
+"""Keyword triggers matched in a single pass over the messages."""
+
+import asyncio
+import logging
+import random
+from collections import deque
+from typing import Any, Iterable, NamedTuple
+
+import discord
+
+from lib.load_var import get_var
+
+log = logging.getLogger(__name__)
+
+
+class Automaton(object):
+    """Aho-Corasick automaton finding many patterns in one pass.
+
+    >>> automaton = Automaton(['he', 'she', 'his', 'hers'])
+    >>> sorted(automaton.matches('ushers'))
+    [0, 1, 3]
+    >>> automaton.matches('nothing')
+    set()
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        """Build the automaton.
+
+        Args:
+            patterns: the patterns to find, identified by their position
+        """
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail = [0]
+        self._output: list[tuple[int, ...]] = [()]
+        for index, pattern in enumerate(patterns):
+            self._insert(pattern, index)
+        self._link()
+
+    def _insert(self, pattern: str, index: int) -> None:
+        """Add a pattern to the trie.
+
+        Args:
+            pattern: the pattern to add
+            index: the identifier of the pattern
+        """
+        state = 0
+        for char in pattern:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = following
+        self._output[state] += (index,)
+
+    def _link(self) -> None:
+        """Compute the failure links breadth first."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[following] = link if link != following else 0
+                self._output[following] += self._output[self._fail[following]]
+
+    def matches(self, text: str) -> set[int]:
+        """Find the patterns present in a text.
+
+        Args:
+            text: the text to scan
+
+        Returns:
+            the identifiers of the patterns found
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        found: set[int] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class Trigger(NamedTuple):
+    """Actions run when one of the keywords is found in a message."""
+
+    keywords: tuple[str, ...]
+    ignore_case: bool = False
+    react: tuple[str, ...] = ()
+    pool: str | None = None
+    sample: int | None = None
+    replies: tuple[str, ...] = ()
+
+    @classmethod
+    def from_rule(cls, rule: dict[str, Any]) -> 'Trigger':
+        """Read a trigger from its configuration.
+
+        The rule lists its `keywords` and may set `ignore_case`. Its actions
+        are the emojis to `react` with, given as unicode or as names of the
+        `emoji_IDs` table, a reaction `pool` of which `sample` emojis are
+        picked at random (all of them by default), and a message sent back,
+        either a fixed `reply` or one picked in the `replies` configuration
+        list.
+
+        Args:
+            rule: a table of a triggers array from the configuration
+
+        Returns:
+            the trigger
+
+        Raises:
+            ValueError: if the rule has no keyword
+
+        >>> trigger = Trigger.from_rule({'keywords': ['Psyduck'], 'react': ['PSYDUCK_ID']})
+        >>> trigger.keywords, trigger.react, trigger.replies
+        (('Psyduck',), ('PSYDUCK_ID',), ())
+        """
+        keywords = tuple(rule.get('keywords', ()))
+        if not keywords:
+            raise ValueError(f'Trigger without keywords: {rule}')
+        replies: tuple[str, ...] = ()
+        if 'reply' in rule:
+            replies = (rule['reply'],)
+        elif 'replies' in rule:
+            replies = tuple(get_var(rule['replies'], ()))
+        return cls(
+            keywords=keywords,
+            ignore_case=rule.get('ignore_case', False),
+            react=tuple(rule.get('react', ())),
+            pool=rule.get('pool'),
+            sample=rule.get('sample'),
+            replies=replies,
+        )
+
+    async def run(self, message: discord.Message, bot: Any) -> None:
+        """React and reply to a message.
+
+        Args:
+            message: the message containing a keyword
+            bot: the bot
+        """
+        registry = bot.emoji_registry
+        for emoji in self.react:
+            if emoji in registry.emoji_ids:
+                bot.reactions.add(message, registry.get(emoji))
+            else:
+                bot.reactions.add(message, emoji)
+        if self.pool is not None:
+            pool = registry.pool(self.pool)
+            if self.sample is not None:
+                pool = random.sample(pool, min(self.sample, len(pool)))
+            for emoji in pool:
+                bot.reactions.add(message, emoji)
+        if self.replies:
+            await message.channel.send(random.choice(self.replies))
+
+
+class TriggerEngine(object):
+    """Triggers compiled into automata, one for each case sensitivity.
+
+    >>> engine = TriggerEngine([
+    ...     {'keywords': ['Pikachu'], 'react': ['PIKAWOW_ID']},
+    ...     {'keywords': ['bisou'], 'ignore_case': True, 'pool': 'bisous'},
+    ... ])
+    >>> [trigger.keywords for trigger in engine.match('Pikachu fait des BISOUS')]
+    [('Pikachu',), ('bisou',)]
+    >>> engine.match('pikachu')
+    []
+    """
+
+    def __init__(self, rules: Iterable[dict[str, Any]]) -> None:
+        """Compile the triggers.
+
+        Args:
+            rules: the tables of a triggers array from the configuration
+        """
+        self.triggers = [Trigger.from_rule(rule) for rule in rules]
+        self._automata: dict[bool, tuple[Automaton, list[int]]] = {}
+        for ignore_case in (False, True):
+            patterns: list[str] = []
+            owners: list[int] = []
+            for position, trigger in enumerate(self.triggers):
+                if trigger.ignore_case != ignore_case:
+                    continue
+                for keyword in trigger.keywords:
+                    patterns.append(keyword.lower() if ignore_case else keyword)
+                    owners.append(position)
+            if patterns:
+                self._automata[ignore_case] = (Automaton(patterns), owners)
+
+    @classmethod
+    def from_config(
+        cls,
+        var: str,
+        default: Iterable[dict[str, Any]] = (),
+    ) -> 'TriggerEngine':
+        """Compile the triggers of a configuration array.
+
+        Args:
+            var: the name of the array of tables in the configuration
+            default: the rules used if the array is missing
+
+        Returns:
+            the engine
+        """
+        rules = get_var(var)
+        if rules is None:
+            log.info(f'No {var} in the configuration, using the built-in triggers')
+            rules = default
+        engine = cls(rules)
+        log.debug(f'{len(engine.triggers)} triggers loaded from {var}')
+        return engine
+
+    def match(self, text: str, lowered: str | None = None) -> list[Trigger]:
+        """Find the triggers whose keywords are in a text.
+
+        Args:
+            text: the text to scan
+            lowered: the text in lowercase, if already computed
+
+        Returns:
+            the triggers found, in configuration order
+        """
+        positions: set[int] = set()
+        for ignore_case, (automaton, owners) in self._automata.items():
+            scanned = text
+            if ignore_case:
+                scanned = text.lower() if lowered is None else lowered
+            positions.update(owners[found] for found in automaton.matches(scanned))
+        return [self.triggers[position] for position in sorted(positions)]
+
+    async def run(
+        self,
+        message: discord.Message,
+        bot: Any,
+        lowered: str | None = None,
+    ) -> None:
+        """Run the actions of the triggers found in a message concurrently.
+
+        Args:
+            message: the message to scan
+            bot: the bot
+            lowered: the content in lowercase, if already computed
+        """
+        triggers = self.match(message.content, lowered)
+        if triggers:
+            await asyncio.gather(*(trigger.run(message, bot) for trigger in triggers))
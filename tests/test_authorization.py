@@ -0,0 +1,25 @@
+"""Tests of the command checks."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from discord.ext import commands
+
+from ext.birthday_commands import BirthdayCmdCog
+from lib.authorization import has_role
+
+
+def test_role_is_not_checked_in_private_messages() -> None:
+    """A private message is refused as such, not for a missing role."""
+    predicate = has_role('ZAMI_ROLE').predicate  # type: ignore[attr-defined]
+    with pytest.raises(commands.NoPrivateMessage):
+        asyncio.run(predicate(SimpleNamespace(guild=None, author=None)))
+
+
+@pytest.mark.parametrize('command', ['update', 'import_birthdays', 'delete'])
+def test_server_is_checked_before_the_role(command: str) -> None:
+    """The server check runs first, so another server is told so."""
+    checks = getattr(BirthdayCmdCog, command).checks
+    checks = [check.__qualname__.split('.')[0] for check in checks]
+    assert checks == ['in_server', 'has_role']
@@ -0,0 +1,91 @@
+"""Tests of the routing between translation services."""
+
+import asyncio
+
+import pytest
+
+from lib import bing
+from lib.backends import Backend, BackendRouter, BingBackend
+from lib.gtranslate import Translation, TranslationError
+
+
+class FakeBackend(Backend):
+    """Backend answering the text in uppercase."""
+
+    def __init__(self, name: str) -> None:
+        """Name the backend.
+
+        Args:
+            name: the name of the backend
+        """
+        self.name = name
+
+    async def translate(self, session, text, dest_lang, src_lang=None):
+        """Translate by shouting.
+
+        Args:
+            session: unused
+            text: the text to translate
+            dest_lang: unused
+            src_lang: unused
+
+        Returns:
+            the text in uppercase
+        """
+        return Translation(text.upper(), 'Français')
+
+
+def test_backend_is_abstract() -> None:
+    """A backend has to implement translate."""
+    with pytest.raises(TypeError):
+        Backend()  # type: ignore
+
+
+def test_untried_backend_stays_behind_preferred() -> None:
+    """A backend never called does not jump ahead of a fast preferred one."""
+    google, other = FakeBackend('google'), FakeBackend('bing')
+    router = BackendRouter([google, other])
+    router.stats['google'].record(0.2, failed=False)
+    assert router.ranked() == [google, other]
+
+
+def test_failing_backend_falls_behind() -> None:
+    """A backend failing most of the time is tried last."""
+    google, other = FakeBackend('google'), FakeBackend('bing')
+    router = BackendRouter([google, other])
+    router.stats['google'].record(0.2, failed=True)
+    assert router.ranked() == [other, google]
+
+
+@pytest.mark.parametrize(('answer', 'transient'), [
+    ({'statusCode': 205, 'errorMessage': 'expired token'}, False),
+    ({'statusCode': 429}, True),
+    ([{'unexpected': True}], False),
+])
+def test_bing_error_answers_fail_over(monkeypatch, answer, transient) -> None:
+    """An error answer of Bing raises a TranslationError, so the router fails over."""
+    async def post(_self, url, data):  # noqa: WPS430
+        return answer
+
+    monkeypatch.setattr(bing.BingTranslate, '_post', post)
+
+    with pytest.raises(TranslationError) as error:
+        asyncio.run(BingBackend().translate(None, 'Hello', 'fr'))
+    assert error.value.transient is transient
+
+    router = BackendRouter([BingBackend(), FakeBackend('google')])
+    translation = asyncio.run(router.translate(None, 'Hello', 'fr'))
+    assert translation == Translation('HELLO', 'Français')
+    assert router.stats['bing'].failure_rate == 1
+
+
+def test_bing_batch_with_known_language_needs_no_detection(monkeypatch) -> None:
+    """The joined lines of a batch are read without a detected language."""
+    async def post(_self, url, data):  # noqa: WPS430
+        lines = data['text'].split('\n')
+        return [{'translations': [{'text': '\n'.join(line.upper() for line in lines)}]}]
+
+    monkeypatch.setattr(bing.BingTranslate, '_post', post)
+
+    translations = asyncio.run(BingBackend().translate_many(None, ['a', 'b'], 'fr', 'en'))
+    assert translations == [Translation('A', 'Anglais'), Translation('B', 'Anglais')]
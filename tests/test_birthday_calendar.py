@@ -0,0 +1,51 @@
+"""Tests of the in-memory snapshot of the birthdays."""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from lib.birthday_calendar import BirthdayCalendar
+from lib.birthday_repository import BirthdayRepository
+
+
+def test_changes_are_applied_once_committed(tmp_path) -> None:
+    """The snapshot follows the database, before the caller resumes."""
+    async def run() -> None:  # noqa: WPS430
+        repository = BirthdayRepository(str(tmp_path / 'birthday.db'))
+        await repository.init_birthday_db()
+        calendar = BirthdayCalendar(repository)
+        await calendar.update(1, '1964-05-27')
+        assert 1 in calendar
+        await calendar.update_many([(2, '1964-01-03')])
+        assert [bd.user_id for bd in calendar.birthdays()] == [2, 1]
+        await calendar.remove(1)
+        assert 1 not in calendar
+        await repository.close()
+
+    asyncio.run(run())
+
+
+def test_late_write_still_reaches_the_snapshot(tmp_path) -> None:
+    """A write committed after its caller gave up is applied to the snapshot."""
+    database = str(tmp_path / 'birthday.db')
+
+    async def run() -> None:  # noqa: WPS430
+        repository = BirthdayRepository(database, timeout=0.1)
+        await repository.init_birthday_db()
+        calendar = BirthdayCalendar(repository)
+
+        # The announce script holds the lock while the worker takes the write
+        script = sqlite3.connect(database)
+        script.execute('BEGIN IMMEDIATE')
+        with pytest.raises(asyncio.TimeoutError):
+            await calendar.update(1, '1964-05-27')
+        assert 1 not in calendar
+        script.rollback()
+        script.close()
+
+        await repository.close()
+        await asyncio.sleep(0)
+        assert 1 in calendar
+
+    asyncio.run(run())
@@ -0,0 +1,101 @@
+"""Tests of the birthday database shared by the bot and the announce script."""
+
+import datetime
+import sqlite3
+
+import pytest
+
+from lib.birthday_lib import Birthday, DateDb
+
+
+@pytest.fixture
+def database(tmp_path) -> str:
+    """Create an empty birthday database.
+
+    Args:
+        tmp_path: a temporary directory
+
+    Returns:
+        the path to the database
+    """
+    path = str(tmp_path / 'birthday.db')
+    date_db = DateDb(path)
+    with date_db:
+        date_db.init_birthday_db()
+    date_db.close()
+    return path
+
+
+def test_connection_is_kept_in_wal_mode(database: str) -> None:
+    """The blocks share one tuned connection until it is closed."""
+    date_db = DateDb(database)
+    with date_db:
+        connection = date_db.conn
+        assert connection is not None
+        assert connection.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+    with date_db:
+        assert date_db.conn is connection
+    date_db.close()
+    assert date_db.conn is None
+
+
+def test_blocks_commit_or_roll_back(database: str) -> None:
+    """A block is a transaction, undone if it raises."""
+    date_db = DateDb(database)
+    with date_db:
+        date_db.update_birthday(1, '1964-05-27')
+    with pytest.raises(ValueError):
+        with date_db:
+            date_db.remove_birthday(1)
+            raise ValueError
+    with date_db:
+        assert date_db.get_birthdays(datetime.date(2024, 5, 27)) == [1]
+    date_db.close()
+
+
+def test_reader_is_not_blocked_by_a_writer(database: str) -> None:
+    """The announce script reads while the bot holds a write transaction."""
+    bot, cron = DateDb(database), DateDb(database)
+    with bot:
+        bot.update_birthday(1, '1964-05-27')
+    with bot:
+        bot.update_birthday(2, '1964-05-27')
+        with cron:
+            assert cron.get_birthdays(datetime.date(2024, 5, 27)) == [1]
+    with cron:
+        assert sorted(cron.get_birthdays(datetime.date(2024, 5, 27))) == [1, 2]
+    bot.close()
+    cron.close()
+
+
+def test_birthdays_between_wrap_around_the_year(database: str) -> None:
+    """The range may cross new year, in the order birthdays are celebrated."""
+    date_db = DateDb(database)
+    with date_db:
+        date_db.update_birthdays([
+            (1, '1964-01-02'), (2, '1964-12-30'), (3, '1964-06-01'), (4, '1964-02-29'),
+        ])
+        assert date_db.get_birthdays_between(
+            datetime.date(2023, 12, 29), datetime.date(2024, 1, 5),
+        ) == [Birthday(2, '1964-12-30'), Birthday(1, '1964-01-02')]
+        assert date_db.get_birthdays_between(
+            datetime.date(2023, 2, 27), datetime.date(2023, 2, 28),
+        ) == [Birthday(4, '1964-02-29')]
+    date_db.close()
+
+
+def test_old_schema_is_migrated(tmp_path) -> None:
+    """A database without month_day gets it filled and indexed."""
+    path = str(tmp_path / 'old.db')
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE birthday_table (user INTEGER PRIMARY KEY, birthday TEXT)')
+    connection.execute("INSERT INTO birthday_table VALUES (1, '1964-05-27')")
+    connection.commit()
+    connection.close()
+
+    date_db = DateDb(path)
+    with date_db:
+        date_db.init_birthday_db()
+    with date_db:
+        assert date_db.get_birthdays(datetime.date(2024, 5, 27)) == [1]
+    date_db.close()
@@ -0,0 +1,132 @@
+"""Tests of the birthday database queried from a worker thread."""
+
+import asyncio
+import datetime
+import threading
+
+import pytest
+
+from lib.birthday_lib import FETCH_SIZE, DateDb
+from lib.birthday_repository import BirthdayRepository
+
+
+@pytest.fixture
+def database(tmp_path) -> str:
+    """Give the path of a database not created yet.
+
+    Args:
+        tmp_path: a temporary directory
+
+    Returns:
+        the path to the database
+    """
+    return str(tmp_path / 'birthday.db')
+
+
+def stored(database: str) -> list[int]:
+    """Read the users stored, from another connection.
+
+    Args:
+        database: path to the database
+
+    Returns:
+        the users, in the order of the year
+    """
+    date_db = DateDb(database)
+    with date_db:
+        users = [birthday.user_id for birthday in date_db.get_all_birthdays()]
+    date_db.close()
+    return users
+
+
+def test_failing_write_fails_alone(database: str) -> None:
+    """The writes of a batch are retried one by one if the batch fails."""
+    async def run() -> list[BaseException | None]:  # noqa: WPS430
+        repository = BirthdayRepository(database)
+        await repository.init_birthday_db()
+        results = await asyncio.gather(
+            repository.update_birthday(1, '1964-05-27'),
+            repository.update_birthday(2, '1964-02-30'),
+            repository.update_birthday(3, '1964-05-28'),
+            return_exceptions=True,
+        )
+        await repository.close()
+        return list(results)
+
+    first, second, third = asyncio.run(run())
+    assert first is None and third is None
+    assert isinstance(second, ValueError)
+    assert stored(database) == [1, 3]
+
+
+def test_abandoned_write_is_dropped(database: str) -> None:
+    """A write given up before the worker took it is never done."""
+    async def run() -> None:  # noqa: WPS430
+        repository = BirthdayRepository(database, timeout=0.05)
+        await repository.init_birthday_db()
+        # Keep the worker busy, like a lock held by the announce script
+        release = threading.Event()
+        repository._executor.submit(release.wait)  # noqa: WPS437
+        with pytest.raises(asyncio.TimeoutError):
+            await repository.update_birthday(1, '1964-05-27')
+        release.set()
+        await repository.update_birthday(2, '1964-05-28')
+        await repository.close()
+
+    asyncio.run(run())
+    assert stored(database) == [2]
+
+
+def test_close_commits_the_queued_writes(database: str) -> None:
+    """The writes not awaited yet are committed before closing."""
+    async def run() -> None:  # noqa: WPS430
+        repository = BirthdayRepository(database)
+        await repository.init_birthday_db()
+        writes = [
+            asyncio.create_task(repository.update_birthday(user, '1964-05-27'))
+            for user in range(10)
+        ]
+        await asyncio.sleep(0)
+        await repository.close()
+        await asyncio.gather(*writes)
+
+    asyncio.run(run())
+    assert stored(database) == list(range(10))
+
+
+def test_iteration_reads_pages_between_writes(database: str) -> None:
+    """Every birthday is streamed once, even with writes between the pages."""
+    birthdays = [(user, f'1964-{user % 12 + 1:02}-01') for user in range(FETCH_SIZE * 2 + 50)]
+
+    async def run() -> list[int]:  # noqa: WPS430
+        repository = BirthdayRepository(database)
+        await repository.init_birthday_db()
+        await repository.update_birthdays(birthdays)
+        users: list[int] = []
+        async for birthday in repository.iter_birthdays():
+            if not users:
+                await repository.update_birthday(-1, '1964-12-31')
+            users.append(birthday.user_id)
+        await repository.close()
+        return users
+
+    users = asyncio.run(run())
+    assert sorted(users) == [-1] + [user for user, _ in birthdays]
+    assert users[-1] == -1
+    assert users[:3] == [0, 12, 24]
+    assert stored(database)[-1] == -1
+
+
+def test_reads_give_the_date_db_results(database: str) -> None:
+    """The awaited methods keep the semantics of DateDb."""
+    async def run() -> tuple[list[int], datetime.date | None]:  # noqa: WPS430
+        repository = BirthdayRepository(database)
+        await repository.init_birthday_db()
+        await repository.update_birthday(1, '1964-05-27')
+        await repository.set_last_announce(datetime.date(2024, 5, 26))
+        users = await repository.get_birthdays(datetime.date(2024, 5, 27))
+        last = await repository.get_last_announce()
+        await repository.close()
+        return users, last
+
+    assert asyncio.run(run()) == ([1], datetime.date(2024, 5, 26))
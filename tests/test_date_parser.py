@@ -0,0 +1,40 @@
+"""Tests of the birthday date parser."""
+
+import pytest
+
+from lib.birthday_lib import date_parser
+
+
+@pytest.mark.parametrize(('date_input', 'expected'), [
+    ('27-05', '1964-05-27'),
+    ('27/05/1990', '1964-05-27'),
+    ('27.05', '1964-05-27'),
+    ('1er janvier', '1964-01-01'),
+    ('15 AOÛT', '1964-08-15'),
+    ('15 aout', '1964-08-15'),
+    ('3 déc.', '1964-12-03'),
+    ('29 février 2000', '1964-02-29'),
+    ('1992-08-15', '1964-08-15'),
+])
+def test_valid_dates(date_input: str, expected: str) -> None:
+    """Numbers, French names and abbreviations of the months are read."""
+    assert date_parser(date_input) == expected
+
+
+@pytest.mark.parametrize('date_input', [
+    '1 ²',
+    '²² 05',
+    '27 13',
+    '0 mai',
+    '32 mai',
+    '30 février',
+    '29 février 2023',
+    '27 may',
+    '27',
+    'mai 27',
+    '27-05-90',
+    '1992-13-01',
+])
+def test_invalid_dates(date_input: str) -> None:
+    """Anything but an existing day and month is refused, without raising."""
+    assert date_parser(date_input) is None
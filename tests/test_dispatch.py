@@ -0,0 +1,46 @@
+"""Tests of the routing of the events to their handlers."""
+
+import asyncio
+
+from lib.dispatch import Dispatcher, when
+
+
+def test_handlers_without_index_condition_receive_every_event() -> None:
+    """Handlers are matched on the index, their other conditions and in order."""
+    @when(channel=[1])
+    async def first(event):  # noqa: WPS430
+        """Handle the events of the first channel."""
+
+    @when(author=['Mudae'])
+    async def mudae(event):  # noqa: WPS430
+        """Handle the events of Mudae."""
+
+    dispatcher = Dispatcher([first, mudae], index='channel')
+    assert dispatcher.match(channel=1, author='Mudae') == [first, mudae]
+    assert dispatcher.match(channel=1, author='Bob') == [first]
+    assert dispatcher.match(channel=2, author='Mudae') == [mudae]
+    assert not dispatcher.match(channel=2, author='Bob')
+
+
+def test_dispatch_runs_matching_handlers_concurrently() -> None:
+    """Every matching handler runs, and only them."""
+    calls: list[tuple[str, int]] = []
+
+    @when(channel=[1, 2])
+    async def listed(event):  # noqa: WPS430
+        """Remember the call after the others started."""
+        await asyncio.sleep(0)
+        calls.append(('listed', event))
+
+    async def anywhere(event):  # noqa: WPS430
+        """Remember the call."""
+        calls.append(('anywhere', event))
+
+    dispatcher = Dispatcher([listed, anywhere], index='channel')
+
+    async def run() -> None:  # noqa: WPS430
+        for channel in (1, 3):
+            await dispatcher.dispatch((channel,), channel=channel)
+
+    asyncio.run(run())
+    assert calls == [('anywhere', 1), ('listed', 1), ('anywhere', 3)]
@@ -0,0 +1,59 @@
+"""Tests of the offline French detection."""
+
+import json
+
+import pytest
+
+from lib import langdetect
+from lib.langdetect import LanguageDetector, Verdict
+
+# Minimum share of right verdicts among the decided samples
+MIN_ACCURACY = 0.95
+# Maximum share of samples left undecided
+MAX_UNSURE = 0.1
+
+
+@pytest.fixture(scope='module')
+def detector() -> LanguageDetector:
+    """Load the shipped model once.
+
+    Returns:
+        the detector
+    """
+    return LanguageDetector.load()
+
+
+def test_samples_accuracy(detector: LanguageDetector) -> None:
+    """The model is right on the sample corpus, staying undecided on few texts."""
+    samples = langdetect.read_corpus(langdetect.SAMPLES_PATH)
+    wrong = []
+    unsure = 0
+    for lang, text in samples:
+        expected = Verdict.FRENCH if lang == 'fr' else Verdict.NOT_FRENCH
+        verdict = detector.detect(text)
+        if verdict is Verdict.UNSURE:
+            unsure += 1
+        elif verdict is not expected:
+            wrong.append(text)
+
+    decided = len(samples) - unsure
+    assert unsure <= MAX_UNSURE * len(samples)
+    assert len(wrong) <= (1 - MIN_ACCURACY) * decided, wrong
+
+
+def test_model_matches_training_corpus() -> None:
+    """The shipped model was rebuilt after the last change of the corpus."""
+    with langdetect.MODEL_PATH.open(encoding='utf-8') as model:
+        weights = json.load(model)['weights']
+    assert weights == langdetect.train(langdetect.read_corpus(langdetect.TRAIN_PATH))
+
+
+@pytest.mark.parametrize('text', ['ok', 'mdr 😂', '1234 5678 91011'])
+def test_short_texts_are_unsure(detector: LanguageDetector, text: str) -> None:
+    """Texts with too few letters get no verdict."""
+    assert detector.detect(text) is Verdict.UNSURE
+
+
+def test_non_latin_text_is_not_french(detector: LanguageDetector) -> None:
+    """Texts mostly written out of the latin alphabets are not French."""
+    assert detector.detect('Привет, как у тебя дела сегодня?') is Verdict.NOT_FRENCH
@@ -0,0 +1,26 @@
+"""Tests of the messages browsed with buttons."""
+
+import asyncio
+
+import discord
+
+from lib.pagination import Paginator
+
+
+def test_discord_internals_are_not_overridden() -> None:
+    """The private methods discord.py calls on every view stay its own."""
+    private = {name for name in vars(Paginator) if name.startswith('_')}
+    private -= {name for name in private if name.endswith('__')}
+    internals = {name for cls in discord.ui.View.__mro__ for name in vars(cls)}
+    assert not private & internals
+
+
+def test_buttons_follow_the_page() -> None:
+    """The position is shown and the buttons stop at the first and last pages."""
+    async def build() -> Paginator:  # noqa: WPS430
+        return Paginator(1, lambda: 3, str)
+
+    paginator = asyncio.run(build())
+    assert paginator.position.label == '1/3'
+    assert paginator.previous_page.disabled
+    assert not paginator.next_page.disabled
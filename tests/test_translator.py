@@ -0,0 +1,109 @@
+"""Tests of the translation service shared by the cogs."""
+
+import asyncio
+
+from lib.backends import Backend, BackendRouter
+from lib.gtranslate import Translation, TranslationError
+from lib.rate_limit import Priority, current_priority
+from lib.translator import Translator
+
+
+class LaneBackend(Backend):
+    """Backend remembering the lane of each request."""
+
+    name = 'lanes'
+
+    def __init__(self) -> None:
+        """Initialise without any request."""
+        self.lanes: list[Priority] = []
+
+    async def translate(self, session, text, dest_lang, src_lang=None):
+        """Translate by shouting, after a while.
+
+        Args:
+            session: unused
+            text: the text to translate
+            dest_lang: unused
+            src_lang: unused
+
+        Returns:
+            the text in uppercase
+        """
+        self.lanes.append(current_priority.get())
+        await asyncio.sleep(0.01)
+        return Translation(text.upper(), 'Anglais')
+
+    async def translate_many(self, session, texts, dest_lang, src_lang=None):
+        """Translate by shouting, with a single request.
+
+        Args:
+            session: unused
+            texts: the texts to translate
+            dest_lang: unused
+            src_lang: unused
+
+        Returns:
+            the texts in uppercase
+        """
+        self.lanes.append(current_priority.get())
+        return [Translation(text.upper(), 'Anglais') for text in texts]
+
+
+class DroppingBackend(Backend):
+    """Backend whose requests are always dropped by the rate limit."""
+
+    name = 'dropping'
+
+    async def translate(self, session, text, dest_lang, src_lang=None):
+        """Drop the request.
+
+        Args:
+            session: unused
+            text: unused
+            dest_lang: unused
+            src_lang: unused
+
+        Raises:
+            TranslationError: always, as throttled
+        """
+        raise TranslationError('dropped', throttled=True)
+
+
+async def _both_lanes(translator: Translator, texts: tuple[str, str]) -> None:
+    """Translate a text in the background and another one interactively.
+
+    Args:
+        translator: the translator
+        texts: the background text then the interactive one
+    """
+    background = asyncio.ensure_future(
+        translator.translate(texts[0], 'fr', 'en', priority=Priority.BACKGROUND),
+    )
+    await asyncio.sleep(0)
+    await translator.translate(texts[1], 'fr', 'en', priority=Priority.INTERACTIVE)
+    await background
+    await translator.close()
+
+
+def test_interactive_request_does_not_join_background_flight() -> None:
+    """The same text asked in both lanes is requested in each lane."""
+    backend = LaneBackend()
+    asyncio.run(_both_lanes(Translator(backend), ('Hello', 'Hello')))
+    assert sorted(backend.lanes) == [Priority.INTERACTIVE, Priority.BACKGROUND]
+
+
+def test_interactive_request_does_not_join_background_batch() -> None:
+    """Texts asked in both lanes are sent in one batch per lane."""
+    backend = LaneBackend()
+    translator = Translator(backend, batch_window=0.01)
+    asyncio.run(_both_lanes(translator, ('Hello', 'World')))
+    assert sorted(backend.lanes) == [Priority.INTERACTIVE, Priority.BACKGROUND]
+
+
+def test_throttled_request_is_not_a_backend_failure() -> None:
+    """A request dropped by the rate limit leaves the router stats alone."""
+    fallback = LaneBackend()
+    router = BackendRouter([DroppingBackend(), fallback])
+    translation = asyncio.run(router.translate(None, 'Hello', 'fr'))
+    assert translation == Translation('HELLO', 'Anglais')
+    assert not router.stats['dropping'].failures
@@ -0,0 +1,35 @@
+"""Tests of the keyword triggers."""
+
+from lib import triggers
+from lib.triggers import TriggerEngine
+
+RULES = (
+    {'keywords': ['LEGENDARY'], 'reply': 'ZBRRR'},
+    {'keywords': ['ULTRA BEAST'], 'reply': 'ZBRRR'},
+    {'keywords': ['bisou'], 'ignore_case': True, 'pool': 'bisous'},
+)
+
+
+def test_missing_configuration_falls_back_to_the_default_rules(monkeypatch) -> None:
+    """The built-in rules are used when the array is not configured."""
+    monkeypatch.setattr(triggers, 'get_var', lambda var, default=None: default)
+    engine = TriggerEngine.from_config('POKE_TRIGGERS', RULES)
+    assert len(engine.triggers) == len(RULES)
+
+
+def test_configured_rules_replace_the_default_ones(monkeypatch) -> None:
+    """The configured array wins over the built-in rules."""
+    configured = [{'keywords': ['Psyduck'], 'react': ['PSYDUCK_ID']}]
+    monkeypatch.setattr(triggers, 'get_var', lambda var, default=None: configured)
+    engine = TriggerEngine.from_config('POKE_TRIGGERS', RULES)
+    assert [trigger.keywords for trigger in engine.triggers] == [('Psyduck',)]
+
+
+def test_each_rule_found_runs_once() -> None:
+    """Two sentences of separate rules give two replies, in rule order."""
+    engine = TriggerEngine(RULES)
+    found = engine.match('ULTRA BEAST et LEGENDARY, un BISOU')
+    assert [trigger.keywords for trigger in found] == [
+        ('LEGENDARY',), ('ULTRA BEAST',), ('bisou',),
+    ]
+    assert not engine.match('legendary')
@@ -7,8 +7,16 @@ import traceback
 import discord
 from discord.ext import commands
 
-from lib.birthday_lib import DateDb
+from lib.birthday_calendar import BirthdayCalendar
+from lib.birthday_repository import TIMEOUT as BIRTHDAY_DB_TIMEOUT, BirthdayRepository
+from lib.direct_messages import DirectMessages
+from lib.emojis import EmojiRegistry
+from lib.langdetect import LanguageDetector
 from lib.load_var import get_var
+from lib.member_index import MemberIndex
+from lib.message_translations import MAX_MESSAGES, MessageTranslations
+from lib.reactions import ReactionScheduler
+from lib.translator import create_translator
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
@@ -18,16 +26,53 @@ TOKEN = get_var('DISCORD_TOKEN')
 CMD_PREFIX = get_var('CMD_PREFIX', '%')
 BIRTHDAY_DB = get_var('BIRTHDAY_DB')
 
-log.info('Initialisation de la base de données anniversaire...')
-with DateDb(BIRTHDAY_DB) as database:
-    database.init_birthday_db()
+
+class WholesomeBot(commands.Bot):
+    """Bot owning the services shared by its cogs."""
+
+    def __init__(self, *args, **kwargs):
+        """Create the bot and its shared services.
+
+        Args:
+            args: positional arguments of commands.Bot
+            kwargs: keyword arguments of commands.Bot
+        """
+        super().__init__(*args, **kwargs)
+        self.birthday_db = BirthdayRepository(
+            BIRTHDAY_DB, get_var('BIRTHDAY_DB_TIMEOUT', BIRTHDAY_DB_TIMEOUT),
+        )
+        self.birthday_calendar = BirthdayCalendar(self.birthday_db)
+        self.member_index = MemberIndex()
+        self.translator = create_translator()
+        self.language_detector = LanguageDetector.load()
+        self.reactions = ReactionScheduler()
+        self.direct_messages = DirectMessages(self)
+        self.emoji_registry = EmojiRegistry(get_var('emoji_IDs', {}))
+        self.message_translations = MessageTranslations(
+            get_var('TRANSLATED_MESSAGES', MAX_MESSAGES),
+        )
+
+    async def setup_hook(self):
+        """Load the birthdays before connecting."""
+        log.info('Initialisation de la base de données anniversaire...')
+        await self.birthday_db.init_birthday_db()
+        await self.birthday_calendar.load()
+
+    async def close(self):
+        """Release the shared services before disconnecting."""
+        await self.reactions.close()
+        await self.direct_messages.close()
+        await self.translator.close()
+        await self.birthday_db.close()
+        await super().close()
+
 
 log.debug('Creating bot...')
 # Add intent in order to gather member datas
 intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True
-bot = commands.Bot(command_prefix=CMD_PREFIX, intents=intents)
+bot = WholesomeBot(command_prefix=CMD_PREFIX, intents=intents)
 
 # Commands extensions
 initial_extensions = [